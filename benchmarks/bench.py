@@ -0,0 +1,332 @@
+"""
+Benchmark suite of the simulation, with scaling curves and regression
+baselines.
+
+Times the generation of price paths (`_gen_price_paths`), the scalar option
+pricer (`_get_option_price`) and full simulations (`run_simulation`) over a grid
+of numbers of trading paths, numbers of periods, covered call deadlines and
+engines, with and without saving the log. Every case runs in a fresh
+subprocess, so that its peak resident set size (RSS) is measured in isolation.
+
+The wall time (best of several repeats), the throughput (paths or options per
+second) and the peak RSS of each case are saved in a JSON file, which can serve
+as the baseline of a later run: cases whose throughput drops by more than a
+threshold with respect to the baseline are reported as regressions, and the
+command exits with a non-zero status.
+
+Usage (from the repository root):
+    python -m benchmarks.bench --grid quick --output baseline.json
+    python -m benchmarks.bench --grid quick --baseline baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from itertools import product
+
+import numpy as np
+
+GRIDS = {
+    "quick": {
+        "paths": (1, 1000, 10000),
+        "periods": (12, 60),
+        "deadlines": (7,),
+        "log_paths": 1000,
+        "loop_paths": 1000,
+    },
+    "full": {
+        "paths": (1, 1000, 100000, 1000000),
+        "periods": (12, 60, 240),
+        "deadlines": (7, 20),
+        "log_paths": 1000,
+        "loop_paths": 10000,
+    },
+}
+"""
+Grids of benchmark cases. Logs are only saved, and the loop engine is only run,
+for numbers of trading paths up to 'log_paths' and 'loop_paths', respectively,
+since larger cases would take too long or fill the disk.
+"""
+
+CHUNK_SIZE = 10000
+
+
+def get_cases(grid: str) -> list[dict]:
+    """
+    Returns the benchmark cases of a grid.
+
+    Parameters
+    ----------
+    grid : string
+        Name of the grid, either 'quick' or 'full'.
+
+    Returns
+    -------
+    list[dict]
+        Benchmark cases, each with a unique 'name'.
+    """
+    spec = GRIDS[grid]
+    cases = []
+
+    for npaths, nperiods in product(spec["paths"], spec["periods"]):
+        # All the price paths are generated, chunk by chunk, as in the simulation
+        cases.append(
+            {
+                "benchmark": "gen_price_paths",
+                "paths": npaths,
+                "periods": nperiods,
+                "chunk_size": CHUNK_SIZE,
+            }
+        )
+
+    cases.append({"benchmark": "get_option_price", "options": 20000})
+
+    for npaths, nperiods, deadline, engine, save_log in product(
+        spec["paths"],
+        spec["periods"],
+        spec["deadlines"],
+        ("loop", "vectorized"),
+        (False, True),
+    ):
+        if (engine == "loop" and npaths > spec["loop_paths"]) or (
+            save_log and npaths > spec["log_paths"]
+        ):
+            continue
+
+        cases.append(
+            {
+                "benchmark": "run_simulation",
+                "paths": npaths,
+                "periods": nperiods,
+                "deadline": deadline,
+                "engine": engine,
+                "save_log": save_log,
+            }
+        )
+
+    for case in cases:
+        case["name"] = "/".join("%s=%s" % item for item in case.items())
+
+    return cases
+
+
+def run_case(case: dict, repeat: int) -> dict:
+    """
+    Runs a benchmark case in the current process.
+
+    Parameters
+    ----------
+    case : dict
+        Benchmark case.
+    repeat : integer
+        Number of repeats; the best wall time is kept.
+
+    Returns
+    -------
+    dict
+        Best wall time, in seconds, throughput, in paths (or options) per
+        second, and peak RSS, in megabytes.
+    """
+    from wheel_mc import run_simulation
+    from wheel_mc.wheel_mc import _gen_price_paths, _get_option_price
+
+    rng = np.random.default_rng(0)
+
+    if case["benchmark"] == "gen_price_paths":
+        count = case["paths"]
+
+        def func():
+            for start in range(0, case["paths"], case["chunk_size"]):
+                _gen_price_paths(
+                    100.0,
+                    0.01,
+                    0.2,
+                    case["periods"],
+                    min(case["chunk_size"], case["paths"] - start),
+                    rng=rng,
+                )
+
+    elif case["benchmark"] == "get_option_price":
+        count = case["options"]
+        s = np.round(rng.uniform(10.0, 200.0, count), 2)
+        x = np.round(s * 1.05, 2)
+        t = rng.integers(1, 21, count) / 252.0
+
+        def func():
+            for i in range(count):
+                _get_option_price("call", s[i], x[i], 0.01, 0.2, t[i])
+
+    else:
+        count = case["paths"]
+        tmpdir = tempfile.mkdtemp()
+        inputs = {
+            "number_of_trading_paths": case["paths"],
+            "number_of_periods": case["periods"],
+            "covered_calls_deadline": case["deadline"],
+            "engine": case["engine"],
+            "save_log": case["save_log"],
+            "log_file": os.path.join(tmpdir, "log.dat"),
+            "log_format": "binary",
+            "seed": 0,
+            "chunk_size": CHUNK_SIZE,
+            "summarize": True,
+            "keep_path_results": False,
+        }
+
+        def func():
+            run_simulation(inputs)
+
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    if case["benchmark"] == "run_simulation":
+        shutil.rmtree(tmpdir)
+
+    # On Linux, ru_maxrss is in kilobytes; on macOS, in bytes
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss /= 1024.0**2 if sys.platform == "darwin" else 1024.0
+
+    return {"wall_time": best, "throughput": count / best, "peak_rss_mb": rss}
+
+
+def run_suite(grid: str, repeat: int) -> dict:
+    """
+    Runs every case of a grid, each in its own subprocess.
+
+    Parameters
+    ----------
+    grid : string
+        Name of the grid.
+    repeat : integer
+        Number of repeats of each case.
+
+    Returns
+    -------
+    dict
+        Benchmark report, with the machine description and the results keyed by
+        case name.
+    """
+    import wheel_mc
+
+    results = {}
+
+    for case in get_cases(grid):
+        out = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.bench",
+                "--run-case",
+                json.dumps(case),
+                "--repeat",
+                str(repeat),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        results[case["name"]] = case | json.loads(out.stdout)
+        print(
+            "%-90s %10.4f s %14.0f/s %9.1f MB"
+            % (
+                case["name"],
+                results[case["name"]]["wall_time"],
+                results[case["name"]]["throughput"],
+                results[case["name"]]["peak_rss_mb"],
+            ),
+            flush=True,
+        )
+
+    return {
+        "grid": grid,
+        "version": wheel_mc.__version__,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Compares the throughputs of a benchmark report with those of a baseline.
+
+    Parameters
+    ----------
+    report : dict
+        Current benchmark report.
+    baseline : dict
+        Baseline benchmark report.
+    threshold : float
+        Maximum allowed relative drop in throughput (e.g., 0.1 for 10%).
+
+    Returns
+    -------
+    list[str]
+        Names of the cases whose throughput regressed beyond the threshold.
+    """
+    regressions = []
+
+    for name, result in report["results"].items():
+        if name not in baseline["results"]:
+            continue
+
+        ratio = result["throughput"] / baseline["results"][name]["throughput"]
+
+        if ratio < 1.0 - threshold:
+            regressions.append(name)
+            print("REGRESSION %-79s %+8.1f%%" % (name, 100.0 * (ratio - 1.0)))
+
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--grid", choices=sorted(GRIDS), default="quick")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="JSON file where the report is saved")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="maximum relative drop in throughput (default: 0.1)",
+    )
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_case is not None:
+        print(json.dumps(run_case(json.loads(args.run_case), args.repeat)))
+
+        return 0
+
+    report = run_suite(args.grid, args.repeat)
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        if compare(report, baseline, args.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
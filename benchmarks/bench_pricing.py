@@ -0,0 +1,97 @@
+"""
+Micro-benchmark of the Black-Scholes pricer.
+
+Compares the throughput, in options priced per second, of the scalar wrapper
+`_get_option_price` (one call per option, as in the loop engine) with the
+batched pricer `price_options` for several batch sizes, and the time of the
+loop engine with and without the premium cache: the command exits with a
+non-zero status if the cache makes the loop engine slower.
+
+Usage (from the repository root): python -m benchmarks.bench_pricing
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from wheel_mc import price_options, run_simulation
+from wheel_mc.wheel_mc import _get_option_price
+
+R = 0.01
+VOL = 0.2
+
+
+def _gen_inputs(n: int, rng: np.random.Generator) -> tuple:
+    s = np.round(rng.uniform(10.0, 200.0, n), 2)
+    x = np.round(s * 1.05, 2)
+    t = rng.integers(1, 21, n) / 252.0
+
+    return s, x, t
+
+
+def bench_scalar(n: int, rng: np.random.Generator) -> float:
+    s, x, t = _gen_inputs(n, rng)
+    start = time.perf_counter()
+
+    for i in range(n):
+        _get_option_price("call", s[i], x[i], R, VOL, t[i])
+
+    return n / (time.perf_counter() - start)
+
+
+def bench_batched(n: int, rng: np.random.Generator, repeat: int = 5) -> float:
+    s, x, t = _gen_inputs(n, rng)
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        price_options("call", s, x, R, VOL, t)
+        best = min(best, time.perf_counter() - start)
+
+    return n / best
+
+
+def bench_premium_cache(premium_cache: bool, repeat: int = 3) -> float:
+    inputs = dict(
+        number_of_trading_paths=300,
+        number_of_periods=60,
+        covered_calls_deadline=7,
+        write_puts_if_no_calls=True,
+        engine="loop",
+        premium_cache=premium_cache,
+        seed=0,
+    )
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run_simulation(inputs)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+
+    print("%-28s %18s" % ("Pricer", "Options/second"))
+    print("%-28s %18.0f" % ("_get_option_price (scalar)", bench_scalar(20000, rng)))
+
+    for n in (100, 10000, 1000000):
+        print("%-28s %18.0f" % ("price_options (batch=%d)" % n, bench_batched(n, rng)))
+
+    print()
+    print("%-28s %18s" % ("Loop engine", "Seconds"))
+
+    times = {}
+
+    for premium_cache in (False, True):
+        times[premium_cache] = bench_premium_cache(premium_cache)
+        print(
+            "%-28s %18.3f" % ("premium_cache=%s" % premium_cache, times[premium_cache])
+        )
+
+    if times[True] > times[False]:
+        print("Regression: the premium cache slows the loop engine down")
+        sys.exit(1)
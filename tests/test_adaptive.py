@@ -0,0 +1,54 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from wheel_mc import run_simulation, InputData
+
+INPUTS = dict(
+    number_of_trading_paths=400,
+    number_of_periods=12,
+    engine="vectorized",
+    seed=11,
+    shard_size=50,
+)
+
+
+def test_stops_when_target_is_met():
+    ret = run_simulation(InputData(target_relative_error=0.03, **INPUTS))
+
+    assert ret.convergence["converged"]
+    assert ret.convergence["paths"] < 400
+    assert ret.convergence["paths"] % 50 == 0
+    assert ret.money.shape[0] == ret.convergence["paths"]
+    assert ret.convergence["relative_errors"]["final_position"] <= 0.03
+
+    full = run_simulation(InputData(**INPUTS))
+
+    assert np.array_equal(ret.money, full.money[: ret.money.shape[0]])
+
+
+def test_paths_used_do_not_depend_on_number_of_workers():
+    inputs = InputData(
+        target_relative_error=0.05,
+        target_metrics=("final_position", "invested_money"),
+        confidence_level=0.95,
+        n_workers=3,
+        **INPUTS,
+    )
+    serial = run_simulation(inputs.model_copy(update={"n_workers": 1}))
+
+    with ThreadPoolExecutor(3) as executor:
+        parallel = run_simulation(inputs, executor=executor)
+
+    # Stops within the second wave of three shards
+    assert serial.convergence["paths"] == 200
+    assert serial.convergence == parallel.convergence
+    assert np.array_equal(serial.money, parallel.money)
+
+
+def test_budget_is_exhausted():
+    ret = run_simulation(InputData(target_relative_error=1e-6, **INPUTS))
+
+    assert not ret.convergence["converged"]
+    assert ret.convergence["paths"] == 400
+    assert ret.convergence["relative_errors"]["final_position"] > 1e-6
@@ -0,0 +1,28 @@
+from benchmarks.bench import compare, get_cases
+
+
+def report(**throughputs):
+    return {
+        "results": {
+            name: {"throughput": throughput} for name, throughput in throughputs.items()
+        }
+    }
+
+
+def test_compare_reports_regressions_beyond_threshold():
+    baseline = report(a=100.0, b=100.0, c=100.0, d=100.0)
+    current = report(a=95.0, b=89.0, c=150.0, e=1.0)
+
+    # 'e' is not in the baseline, and 'd' is not in the report
+    assert compare(current, baseline, 0.1) == ["b"]
+    assert compare(current, baseline, 0.02) == ["a", "b"]
+    assert compare(baseline, baseline, 0.0) == []
+
+
+def test_price_path_cases_cover_the_whole_grid():
+    cases = [
+        case for case in get_cases("full") if case["benchmark"] == "gen_price_paths"
+    ]
+
+    assert max(case["paths"] for case in cases) == 1000000
+    assert len({case["name"] for case in cases}) == len(cases)
@@ -0,0 +1,140 @@
+import os
+
+import numpy as np
+import pytest
+
+from wheel_mc import (
+    run_simulation,
+    InputData,
+    save_state,
+    load_state,
+    read_events,
+    render_log,
+    select_events,
+)
+from wheel_mc.events import LOT_HELD
+from wheel_mc.models import SimulationState
+
+INPUTS = dict(
+    number_of_trading_paths=60,
+    number_of_periods=6,
+    covered_calls_deadline=7,
+    write_puts_if_no_calls=True,
+    seed=3,
+    shard_size=25,
+    chunk_size=10,
+    summarize=True,
+)
+FIELDS = ("stock_prices", "money", "stock", "invested_money", "exercised_calls")
+
+
+def assert_same_results(a, b):
+    for field in FIELDS:
+        assert np.array_equal(getattr(a, field), getattr(b, field))
+
+    assert a.summary.to_dict() == pytest.approx(b.summary.to_dict())
+
+
+def test_resumed_simulation_gives_same_results(tmp_path):
+    inputs = InputData(checkpoint_dir=str(tmp_path), **INPUTS)
+    fresh = run_simulation(InputData(**INPUTS))
+    first = run_simulation(inputs)
+
+    # Drops some blocks, as if the first run had been interrupted
+    for name in ("shard-1-20-5.npz", "shard-2-0-10.npz"):
+        os.remove(tmp_path / name)
+
+    resumed = run_simulation(inputs)
+
+    assert_same_results(first, fresh)
+    assert_same_results(resumed, fresh)
+
+
+def test_extended_simulation_reuses_saved_blocks(tmp_path):
+    inputs = dict(INPUTS, number_of_trading_paths=50, checkpoint_dir=str(tmp_path))
+    run_simulation(inputs)
+    saved = {name: os.path.getmtime(tmp_path / name) for name in os.listdir(tmp_path)}
+    extended = run_simulation(dict(inputs, number_of_trading_paths=60))
+
+    assert_same_results(extended, run_simulation(InputData(**INPUTS)))
+    assert all(os.path.getmtime(tmp_path / name) == saved[name] for name in saved)
+
+
+def test_checkpoints_of_another_simulation_are_rejected(tmp_path):
+    run_simulation(dict(INPUTS, checkpoint_dir=str(tmp_path)))
+
+    with pytest.raises(ValueError):
+        run_simulation(dict(INPUTS, checkpoint_dir=str(tmp_path), volatility=0.3))
+
+
+@pytest.mark.parametrize("engine", ["loop", "vectorized"])
+def test_continued_simulation(engine):
+    inputs = dict(INPUTS, engine=engine, keep_state=True)
+    first = run_simulation(inputs)
+    state = first.state
+    second = run_simulation(inputs, initial_state=state)
+
+    assert state.periods == 6
+    assert second.state.periods == 12
+    assert np.array_equal(state.money, first.money[:, -1])
+    assert np.array_equal((state.lots > 0.0).sum(axis=1) * 100, state.stock)
+    assert np.all(second.invested_money >= first.invested_money)
+    assert np.all(second.open_puts >= first.open_puts)
+    assert np.all(second.exercised_calls >= first.exercised_calls)
+    assert np.array_equal(
+        (second.state.lots > 0.0).sum(axis=1) * 100, second.stock[:, -1]
+    )
+    assert not np.array_equal(second.stock_prices[:, 0], first.stock_prices[:, -1])
+
+
+def test_continuation_is_engine_independent():
+    inputs = dict(INPUTS, keep_state=True, write_puts_if_no_calls=False)
+    state = run_simulation(inputs).state
+    loop = run_simulation(inputs, initial_state=state)
+    vectorized = run_simulation(dict(inputs, engine="vectorized"), initial_state=state)
+
+    assert_same_results(loop, vectorized)
+
+
+def test_state_roundtrip(tmp_path):
+    state = run_simulation(dict(INPUTS, keep_state=True)).state
+    save_state(state, str(tmp_path / "state.npz"))
+    loaded = load_state(str(tmp_path / "state.npz"))
+
+    assert loaded.periods == state.periods
+
+    for field in SimulationState.model_fields:
+        assert np.array_equal(getattr(loaded, field), getattr(state, field))
+
+
+@pytest.mark.parametrize("engine", ["loop", "vectorized"])
+def test_continued_simulation_saves_log(tmp_path, engine):
+    inputs = dict(number_of_trading_paths=20, number_of_periods=24, seed=1)
+    state = run_simulation(dict(inputs, keep_state=True)).state
+    text_log = str(tmp_path / "log.dat")
+    binary_log = str(tmp_path / "log.bin")
+    run_simulation(
+        dict(inputs, engine=engine, save_log=True, log_file=text_log),
+        initial_state=state,
+    )
+    run_simulation(
+        dict(
+            inputs,
+            engine=engine,
+            save_log=True,
+            log_file=binary_log,
+            log_format="binary",
+        ),
+        initial_state=state,
+    )
+
+    with open(text_log) as f:
+        text = f.read()
+
+    events = read_events(binary_log)
+
+    # Periods are numbered after those of the state, and the lots carried over
+    # are logged, so that the binary log renders on its own
+    assert "PERIOD #24" in text and "PERIOD #0\n" not in text
+    assert select_events(events, kind=LOT_HELD).size == (state.lots > 0.0).sum()
+    assert "-------- LOG --------\n\n" + render_log(events) == text
@@ -0,0 +1,197 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from wheel_mc import run_simulation, run_sweep, InputData
+from wheel_mc.kernels import NUMBA_AVAILABLE
+from wheel_mc.profiling import SimulationProfile
+from wheel_mc.wheel_mc import _get_first_call_days, _gen_price_paths, _simulate_chunk
+
+FIELDS = (
+    "stock_prices",
+    "final_stock_prices",
+    "money",
+    "stock",
+    "invested_money",
+    "missed_trades",
+    "open_calls",
+    "open_puts",
+    "exercised_calls",
+    "exercised_puts",
+)
+OPTIONS = [
+    dict(covered_calls_deadline=7, write_puts_if_no_calls=True),
+    dict(covered_calls_deadline=21, write_puts_if_no_calls=False),
+    dict(call_strike_factor=-0.02, put_strike_factor=-0.03, initial_money=1000.0),
+    dict(minimum_price_factor=0.9, volatility=0.5, covered_calls_deadline=3),
+]
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+@pytest.mark.parametrize("engine", ["vectorized", "numba"])
+def test_engine_matches_loop_engine(engine, options):
+    if engine == "numba":
+        pytest.importorskip("numba")
+
+    inputs = dict(
+        number_of_trading_paths=100,
+        number_of_periods=24,
+        initial_stock_price=25.0,
+        **options,
+    )
+
+    np.random.seed(0)
+    loop = run_simulation(InputData(engine="loop", **inputs))
+    np.random.seed(0)
+    other = run_simulation(InputData(engine=engine, **inputs))
+
+    for field in FIELDS:
+        assert np.array_equal(getattr(loop, field), getattr(other, field)), field
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+def test_kernel_matches_loop_engine(options):
+    # The kernel of the 'numba' engine runs as plain Python without Numba
+    inputs = dict(number_of_trading_paths=100, number_of_periods=24, **options)
+    stock_prices = _gen_price_paths(
+        25.0, 0.0, 0.3, 24, 100, rng=np.random.default_rng(0)
+    )
+    loop_profile, compiled_profile = SimulationProfile(), SimulationProfile()
+    loop = _simulate_chunk(
+        InputData(engine="loop", **inputs), stock_prices, 0, profile=loop_profile
+    )
+    compiled = _simulate_chunk(
+        InputData(engine="numba", **inputs), stock_prices, 0, profile=compiled_profile
+    )
+
+    for field in FIELDS[2:]:
+        assert np.array_equal(getattr(loop, field), getattr(compiled, field)), field
+
+    assert compiled_profile.counts == loop_profile.counts
+
+
+@pytest.mark.skipif(NUMBA_AVAILABLE, reason="Numba is installed")
+def test_numba_engine_falls_back_without_numba():
+    inputs = dict(
+        number_of_trading_paths=50,
+        number_of_periods=12,
+        covered_calls_deadline=5,
+        write_puts_if_no_calls=True,
+        seed=9,
+    )
+    loop = run_simulation(InputData(**inputs))
+
+    with pytest.warns(UserWarning, match="Numba is not installed"):
+        compiled = run_simulation(InputData(engine="numba", **inputs))
+
+    for field in FIELDS:
+        assert np.array_equal(getattr(loop, field), getattr(compiled, field)), field
+
+    with pytest.warns(UserWarning, match="Numba is not installed"):
+        summaries = run_sweep(
+            dict(inputs, summarize=True), dict(engine=["loop", "numba"])
+        )
+
+    assert [summary.pop("engine") for summary in summaries] == ["loop", "numba"]
+    assert summaries[0] == summaries[1]
+
+
+@pytest.mark.parametrize("engine", ["loop", "vectorized"])
+def test_premium_cache_gives_identical_results(engine):
+    inputs = dict(
+        number_of_trading_paths=50,
+        number_of_periods=24,
+        covered_calls_deadline=10,
+        write_puts_if_no_calls=True,
+        engine=engine,
+        seed=9,
+    )
+    priced = run_simulation(InputData(**inputs))
+    cached = run_simulation(InputData(premium_cache=True, **inputs))
+
+    for field in FIELDS:
+        assert np.array_equal(getattr(priced, field), getattr(cached, field)), field
+
+
+def test_numba_engine_then_worker_processes():
+    pytest.importorskip("numba")
+    # Numba's threads do not survive a fork, which used to hang the
+    # interpreter at exit once worker processes had been forked
+    script = """
+from wheel_mc import run_simulation
+
+if __name__ == "__main__":
+    inputs = dict(number_of_trading_paths=40, number_of_periods=6, seed=1)
+    compiled = run_simulation(dict(inputs, engine="numba", shard_size=10))
+    parallel = run_simulation(dict(inputs, n_workers=2, shard_size=10))
+    assert (compiled.money == parallel.money).all()
+"""
+    subprocess.run([sys.executable, "-c", script], check=True, timeout=300)
+
+
+def test_numba_engine_continues_state():
+    pytest.importorskip("numba")
+    inputs = dict(
+        number_of_trading_paths=50,
+        number_of_periods=12,
+        covered_calls_deadline=5,
+        write_puts_if_no_calls=True,
+        keep_state=True,
+        seed=9,
+    )
+    state = run_simulation(InputData(**inputs)).state
+    loop = run_simulation(InputData(**inputs), initial_state=state)
+    compiled = run_simulation(InputData(engine="numba", **inputs), initial_state=state)
+
+    for field in FIELDS:
+        assert np.array_equal(getattr(loop, field), getattr(compiled, field)), field
+
+    assert np.array_equal(loop.state.lots, compiled.state.lots)
+
+
+def _scan_first_call_days(thresholds, purchase_price):
+    # Day-by-day search of the first day on which strike plus premium exceeds
+    # the purchase price of each lot, as the loop engine used to do
+    days = []
+
+    for price in purchase_price:
+        day = len(thresholds)
+
+        for d, threshold in enumerate(thresholds):
+            if threshold > price:
+                day = d
+                break
+
+        days.append(day)
+
+    return days
+
+
+@pytest.mark.parametrize(
+    "thresholds, purchase_price",
+    [
+        ([105.0, 103.0, 107.0], [100.0, 104.0, 106.0]),  # First day and later
+        ([95.0, 97.0, 96.0], [100.0, 98.0]),  # No call day
+        ([100.0, 101.0, 100.0], [100.0, 101.0, 99.99]),  # Ties at the price
+        ([102.0], [102.0, 101.0]),  # Single day
+        ([103.0, 101.0], []),  # No lots
+    ],
+)
+def test_first_call_days_match_linear_scan(thresholds, purchase_price):
+    days = _get_first_call_days(np.array(thresholds), purchase_price)
+
+    assert list(days) == _scan_first_call_days(thresholds, purchase_price)
+
+
+def test_first_call_days_match_linear_scan_on_random_windows():
+    rng = np.random.default_rng(0)
+
+    for _ in range(200):
+        thresholds = np.round(rng.uniform(90.0, 110.0, rng.integers(1, 21)), 2)
+        purchase_price = list(np.round(rng.uniform(90.0, 110.0, 5), 2))
+        purchase_price.append(float(thresholds[rng.integers(thresholds.size)]))
+        days = _get_first_call_days(thresholds, purchase_price)
+
+        assert list(days) == _scan_first_call_days(thresholds, purchase_price)
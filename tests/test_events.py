@@ -0,0 +1,68 @@
+import os
+
+import numpy as np
+
+from wheel_mc import run_simulation, InputData
+from wheel_mc.events import (
+    read_events,
+    render_log,
+    select_events,
+    PERIOD_SUMMARY,
+    PUT_EXERCISED,
+)
+
+LOG = os.path.join(os.path.dirname(__file__), "log.dat")
+INPUTS = dict(
+    number_of_options=100,
+    number_of_trading_paths=1,
+    number_of_periods=120,
+    initial_money=0.0,
+    initial_stock_price=25.0,
+    volatility=0.2,
+    risk_free_rate=0.01,
+    call_strike_factor=0.05,
+    put_strike_factor=0.05,
+    covered_calls_deadline=7,
+    write_puts_if_no_calls=True,
+    save_log=True,
+)
+
+
+def _run(tmp_path, name, **options):
+    np.random.seed(0)
+    run_simulation(InputData(log_file=str(tmp_path / name), **INPUTS, **options))
+
+    return tmp_path / name
+
+
+def test_text_log_is_unchanged(tmp_path):
+    for engine in ("loop", "vectorized"):
+        text = _run(tmp_path, engine + ".dat", engine=engine).read_text()
+
+        assert text == open(LOG).read()
+
+
+def test_binary_log_renders_to_text_log(tmp_path):
+    events = read_events(_run(tmp_path, "log.bin", log_format="binary"))
+
+    assert "-------- LOG --------\n\n" + render_log(events) == open(LOG).read()
+    assert select_events(events, kind=PERIOD_SUMMARY).size == 120
+    assert (select_events(events, period=3)["period"] == 3).all()
+
+
+def test_binary_logs_match_across_engines(tmp_path):
+    options = dict(number_of_trading_paths=30, number_of_periods=24, seed=2)
+    inputs = dict(INPUTS, **options)
+    logs = []
+
+    for engine in ("loop", "vectorized"):
+        filename = str(tmp_path / (engine + ".bin"))
+        run_simulation(
+            InputData(engine=engine, log_format="binary", log_file=filename, **inputs)
+        )
+        logs.append(read_events(filename))
+
+    order = np.argsort(logs[1]["path"], kind="stable")
+
+    assert np.array_equal(logs[0], logs[1][order])
+    assert select_events(logs[0], path=7, kind=PUT_EXERCISED).size > 0
@@ -0,0 +1,126 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from wheel_mc import run_simulation, read_export, load_export, InputData
+from wheel_mc.export import PYARROW_AVAILABLE
+
+INPUTS = dict(
+    number_of_trading_paths=60,
+    number_of_periods=6,
+    covered_calls_deadline=7,
+    write_puts_if_no_calls=True,
+    engine="vectorized",
+    seed=3,
+    shard_size=25,
+    chunk_size=10,
+)
+FIELDS = ("stock_prices", "money", "stock", "invested_money", "exercised_calls")
+
+
+def test_export_matches_output(tmp_path):
+    result = run_simulation(dict(INPUTS, export_dir=str(tmp_path)))
+    exported = load_export(str(tmp_path))
+
+    for field in FIELDS:
+        assert np.array_equal(getattr(exported, field), getattr(result, field))
+
+    with open(tmp_path / "manifest.json") as f:
+        manifest = json.load(f)
+
+    first_paths = [block["first_path"] for block in manifest["blocks"]]
+
+    assert first_paths == [0, 10, 20, 25, 35, 45, 50]
+    assert manifest["columns"]["money"] == {"dtype": "<f8", "shape": [6]}
+
+
+def test_export_is_read_lazily(tmp_path):
+    result = run_simulation(
+        dict(
+            INPUTS,
+            export_dir=str(tmp_path),
+            keep_path_results=False,
+            final_values_only=True,
+            summarize=True,
+        )
+    )
+
+    assert result.money.size == 0
+    assert result.summary.count == 60
+
+    blocks = list(read_export(str(tmp_path), ["money"]))
+    expected = run_simulation(dict(INPUTS, final_values_only=True))
+
+    assert all(isinstance(block.money, np.memmap) for _, block in blocks)
+    assert blocks[0][1].model_fields_set == {"money"}
+
+    for first_path, block in blocks:
+        assert np.array_equal(
+            block.money, expected.money[first_path : first_path + block.money.size]
+        )
+
+    with pytest.raises(ValueError):
+        list(read_export(str(tmp_path), ["summary"]))
+
+
+def test_adaptive_export_keeps_used_shards(tmp_path):
+    result = run_simulation(
+        dict(
+            INPUTS,
+            number_of_trading_paths=200,
+            export_dir=str(tmp_path),
+            target_relative_error=1.0,
+        )
+    )
+    exported = load_export(str(tmp_path), ["money"])
+
+    assert result.convergence["paths"] == 25
+    assert np.array_equal(exported.money, result.money)
+    assert not any(name.startswith("block-25-") for name in os.listdir(tmp_path))
+
+
+def test_export_with_checkpoints(tmp_path):
+    inputs = dict(
+        INPUTS,
+        export_dir=str(tmp_path / "export"),
+        checkpoint_dir=str(tmp_path / "checkpoints"),
+        keep_path_results=False,
+    )
+    run_simulation(inputs)
+    os.remove(tmp_path / "checkpoints" / "shard-1-0-10.npz")
+    run_simulation(inputs)
+    exported = load_export(str(tmp_path / "export"))
+    expected = run_simulation(InputData(**INPUTS))
+
+    for field in FIELDS:
+        assert np.array_equal(getattr(exported, field), getattr(expected, field))
+
+
+def test_checkpoints_without_export(tmp_path):
+    inputs = dict(INPUTS, checkpoint_dir=str(tmp_path / "checkpoints"))
+    run_simulation(inputs)
+
+    # The saved blocks were not exported, and would not be exported again
+    with pytest.raises(ValueError, match="different simulation"):
+        run_simulation(dict(inputs, export_dir=str(tmp_path / "export")))
+
+    assert not os.path.exists(tmp_path / "export")
+
+
+@pytest.mark.skipif(PYARROW_AVAILABLE, reason="PyArrow is installed")
+def test_arrow_export_requires_pyarrow(tmp_path):
+    with pytest.raises(ValueError):
+        run_simulation(dict(INPUTS, export_dir=str(tmp_path), export_format="arrow"))
+
+
+@pytest.mark.skipif(not PYARROW_AVAILABLE, reason="PyArrow is not installed")
+def test_arrow_export_matches_output(tmp_path):
+    result = run_simulation(
+        dict(INPUTS, export_dir=str(tmp_path), export_format="arrow")
+    )
+    exported = load_export(str(tmp_path))
+
+    for field in FIELDS:
+        assert np.array_equal(getattr(exported, field), getattr(result, field))
@@ -0,0 +1,166 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+
+import numpy as np
+import pytest
+
+from wheel_mc import (
+    run_simulation,
+    run_simulation_async,
+    InputData,
+    JobManager,
+    ResultCache,
+)
+
+INPUTS = dict(
+    number_of_trading_paths=40,
+    number_of_periods=6,
+    engine="vectorized",
+    seed=3,
+)
+
+
+class BlockingExecutor(ThreadPoolExecutor):
+    """
+    Single-thread executor whose jobs wait for a signal before running.
+    """
+
+    def __init__(self):
+        super().__init__(1)
+        self.go = Event()
+        self.submitted = 0
+
+    def submit(self, fn, *args, **kwargs):
+        self.submitted += 1
+
+        def run():
+            self.go.wait()
+            return fn(*args, **kwargs)
+
+        return super().submit(run)
+
+
+def test_results_match_run_simulation():
+    with JobManager(max_workers=2) as manager:
+        futures = [manager.submit(dict(INPUTS, volatility=vol)) for vol in (0.2, 0.3)]
+
+        for vol, future in zip((0.2, 0.3), futures):
+            expected = run_simulation(dict(INPUTS, volatility=vol))
+            assert np.array_equal(future.result().money, expected.money)
+
+
+def test_requests_are_coalesced_and_cached():
+    executor = BlockingExecutor()
+    manager = JobManager(executor=executor)
+    first = manager.submit(INPUTS)
+    second = manager.submit(dict(INPUTS, n_workers=1, engine="loop"))
+
+    assert manager.pending == 1
+    executor.go.set()
+    assert first.result() is second.result()
+
+    cached = manager.submit(INPUTS)
+
+    assert cached.done() and cached.result() is first.result()
+    assert executor.submitted == 1
+
+    # Unseeded simulations are neither coalesced nor cached
+    manager.submit(dict(INPUTS, seed=None)).result()
+    manager.submit(dict(INPUTS, seed=None)).result()
+
+    assert executor.submitted == 3
+    manager.shutdown()
+    executor.shutdown()
+
+
+def test_cancellation():
+    executor = BlockingExecutor()
+    manager = JobManager(executor=executor, max_pending=2)
+    running = manager.submit(INPUTS)
+    queued = manager.submit(dict(INPUTS, seed=4))
+    coalesced = manager.submit(dict(INPUTS, seed=4))
+
+    with pytest.raises(RuntimeError):
+        manager.submit(dict(INPUTS, seed=5))
+
+    # The queued job is only cancelled when no request waits for it
+    assert queued.cancel()
+    assert manager.pending == 2
+    assert coalesced.cancel()
+    assert manager.pending == 1
+
+    # A cancelled job is no longer pending, so the same inputs start a new job
+    resubmitted = manager.submit(dict(INPUTS, seed=4))
+
+    assert manager.pending == 2
+
+    executor.go.set()
+    assert running.result().money.shape == (40, 6)
+    assert resubmitted.result().money.shape == (40, 6)
+    manager.shutdown()
+    executor.shutdown()
+
+
+def test_requests_of_cancelled_jobs_are_cancelled():
+    executor = BlockingExecutor()
+    manager = JobManager(executor=executor)
+    running = manager.submit(INPUTS)
+    queued = manager.submit(dict(INPUTS, seed=4))
+
+    # The job is cancelled from outside, e.g., by the executor shutting down
+    (job,) = [job for job in manager._jobs.values() if queued in job.requests]
+    assert job.future.cancel()
+    assert queued.cancelled()
+    assert manager.pending == 1
+
+    executor.go.set()
+    running.result()
+    manager.shutdown()
+    executor.shutdown()
+
+
+def test_persistent_cache(tmp_path):
+    inputs = InputData(**INPUTS)
+    result = run_simulation(inputs)
+    ResultCache(directory=str(tmp_path)).put(inputs, result)
+    cached = ResultCache(directory=str(tmp_path)).get(inputs)
+
+    assert np.array_equal(cached.money, result.money)
+    assert (
+        ResultCache(directory=str(tmp_path)).get(InputData(**dict(INPUTS, seed=4)))
+        is None
+    )
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+
+    for seed in (1, 2, 3):
+        cache.put(InputData(**dict(INPUTS, seed=seed)), seed)
+
+    cache.get(InputData(**dict(INPUTS, seed=2)))
+    cache.put(InputData(**dict(INPUTS, seed=4)), 4)
+
+    assert [cache.get(InputData(**dict(INPUTS, seed=s))) for s in (1, 2, 3, 4)] == [
+        None,
+        2,
+        None,
+        4,
+    ]
+
+
+def test_run_simulation_async():
+    async def main(manager):
+        return await asyncio.gather(
+            *(
+                run_simulation_async(dict(INPUTS, seed=seed), manager)
+                for seed in (3, 3, 4)
+            )
+        )
+
+    with JobManager(max_workers=1) as manager:
+        results = asyncio.run(main(manager))
+
+    assert results[0] is results[1]
+    assert np.array_equal(results[2].money, run_simulation(dict(INPUTS, seed=4)).money)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from wheel_mc import run_simulation, InputData
+
+INPUTS = dict(
+    number_of_trading_paths=40,
+    number_of_periods=12,
+    engine="vectorized",
+    seed=7,
+    chunk_size=16,
+)
+
+
+def test_lean_output_matches_full_output():
+    full = run_simulation(InputData(**INPUTS))
+    lean = run_simulation(
+        InputData(
+            keep_price_paths=False,
+            final_values_only=True,
+            compact_output=True,
+            **INPUTS,
+        )
+    )
+
+    assert lean.stock_prices.size == 0
+    assert lean.final_stock_prices.dtype == np.int32
+    assert np.array_equal(lean.final_stock_prices / 100.0, full.stock_prices[:, -1])
+    assert np.array_equal(lean.money, full.money[:, -1])
+    assert lean.stock.dtype == np.int32
+    assert np.array_equal(lean.stock, full.stock[:, -1])
+    assert lean.missed_trades.dtype == np.int16
+    assert np.array_equal(lean.exercised_puts, full.exercised_puts)
+    assert np.array_equal(lean.open_calls, full.open_calls)
+
+
+def test_compact_prices_are_cents():
+    full = run_simulation(InputData(**INPUTS))
+    compact = run_simulation(InputData(compact_output=True, **INPUTS))
+
+    assert compact.stock_prices.dtype == np.int32
+    assert np.array_equal(compact.stock_prices / 100.0, full.stock_prices)
+
+
+def test_compact_prices_must_fit_in_32_bits():
+    inputs = dict(INPUTS, initial_stock_price=3e7, keep_price_paths=False)
+
+    with pytest.raises(ValueError, match="32-bit"):
+        run_simulation(InputData(compact_output=True, **inputs))
@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+
+from wheel_mc import run_simulation, run_sweep, InputData, PathStore
+from wheel_mc.models import SimulationData
+
+INPUTS = dict(
+    number_of_trading_paths=60,
+    number_of_periods=6,
+    engine="vectorized",
+    seed=3,
+    shard_size=25,
+    chunk_size=10,
+)
+
+
+def test_stored_paths_give_same_results(tmp_path):
+    store = PathStore(str(tmp_path))
+    generated = run_simulation(InputData(**INPUTS))
+    stored = run_simulation(InputData(**INPUTS), path_store=store)
+    cached = run_simulation(InputData(**INPUTS), path_store=store)
+
+    assert len(os.listdir(tmp_path)) == 1
+
+    for field in SimulationData.model_fields:
+        if field != "summary":
+            assert np.array_equal(getattr(generated, field), getattr(stored, field))
+            assert np.array_equal(getattr(generated, field), getattr(cached, field))
+
+
+def test_sweep_reads_from_store(tmp_path):
+    store = PathStore(str(tmp_path))
+    grid = {"call_strike_factor": [0.0, 0.1]}
+
+    assert run_sweep(INPUTS, grid, path_store=store) == run_sweep(INPUTS, grid)
+
+
+def test_least_recently_used_paths_are_evicted(tmp_path):
+    size = 60 * 6 * 21 * 8
+    store = PathStore(str(tmp_path), max_bytes=2 * size + 1024)
+    first = store.get(InputData(**INPUTS))
+    second = store.get(InputData(**dict(INPUTS, seed=4)))
+    os.utime(first, (0, 0))
+    os.utime(second, (1, 1))
+    store.get(InputData(**dict(INPUTS, seed=5)))
+
+    assert not os.path.exists(first)
+    assert os.path.exists(second)
+    assert len(os.listdir(tmp_path)) == 2
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from wheel_mc import run_portfolio, run_simulation, InputData
+from wheel_mc.wheel_mc import _simulate_chunk
+
+INPUTS = dict(
+    number_of_trading_paths=60,
+    number_of_periods=12,
+    covered_calls_deadline=7,
+    write_puts_if_no_calls=True,
+    engine="vectorized",
+    seed=3,
+    shard_size=25,
+    chunk_size=10,
+)
+UNDERLYINGS = [
+    dict(initial_stock_price=50.0, volatility=0.3),
+    dict(initial_stock_price=120.0, volatility=0.15, initial_money=10000.0),
+    dict(initial_stock_price=80.0, engine="loop"),
+]
+CORRELATION = [[1.0, 0.6, 0.3], [0.6, 1.0, 0.2], [0.3, 0.2, 1.0]]
+
+
+@pytest.mark.parametrize("shared_cash", [False, True])
+def test_single_underlying_matches_run_simulation(shared_cash):
+    portfolio = run_portfolio(INPUTS, [{}], shared_cash=shared_cash)
+    expected = run_simulation(INPUTS)
+
+    for field in ("stock_prices", "money", "stock", "exercised_puts"):
+        assert np.array_equal(
+            getattr(portfolio.underlyings[0], field), getattr(expected, field)
+        )
+
+    assert np.array_equal(portfolio.money, expected.money)
+
+
+def test_portfolio_totals():
+    portfolio = run_portfolio(INPUTS, UNDERLYINGS, CORRELATION)
+    underlyings = portfolio.underlyings
+
+    assert len(underlyings) == 3
+    assert np.allclose(portfolio.money, sum(u.money for u in underlyings))
+    assert np.allclose(
+        portfolio.final_position,
+        sum(
+            u.money[:, -1] + u.stock[:, -1] * u.final_stock_prices for u in underlyings
+        ),
+    )
+    assert np.array_equal(underlyings[0].stock_prices[:, 0], np.full(60, 50.0))
+
+
+def test_underlyings_match_engines():
+    portfolio = run_portfolio(INPUTS, UNDERLYINGS, CORRELATION)
+
+    for underlying, result in zip(UNDERLYINGS, portfolio.underlyings):
+        expected = _simulate_chunk(
+            InputData(**dict(INPUTS, **underlying)), result.stock_prices, 0
+        )
+
+        for field in ("money", "stock", "invested_money", "exercised_calls"):
+            assert np.array_equal(getattr(result, field), getattr(expected, field))
+
+
+def test_shared_cash_reuses_money():
+    separate = run_portfolio(INPUTS, UNDERLYINGS, CORRELATION)
+    shared = run_portfolio(INPUTS, UNDERLYINGS, CORRELATION, shared_cash=True)
+
+    for a, b in zip(separate.underlyings, shared.underlyings):
+        assert np.array_equal(a.stock_prices, b.stock_prices)
+
+    # The shared account is the balance left by the last underlying
+    assert np.array_equal(shared.money, shared.underlyings[-1].money)
+    assert shared.invested_money.sum() <= separate.invested_money.sum()
+
+
+def test_correlated_paths():
+    portfolio = run_portfolio(
+        dict(INPUTS, number_of_trading_paths=2000, shard_size=2000, chunk_size=None),
+        UNDERLYINGS[:2],
+        [[1.0, 0.7], [0.7, 1.0]],
+    )
+    returns = [
+        np.diff(np.log(u.stock_prices), axis=1).ravel() for u in portfolio.underlyings
+    ]
+
+    assert np.corrcoef(*returns)[0, 1] == pytest.approx(0.7, abs=0.05)
+
+
+def test_invalid_portfolios():
+    with pytest.raises(ValueError):
+        run_portfolio(INPUTS, [{}, dict(number_of_periods=6)])
+
+    with pytest.raises(ValueError):
+        run_portfolio(INPUTS, UNDERLYINGS[:2], [[1.0, 1.5], [1.5, 1.0]])
+
+    with pytest.raises(ValueError):
+        run_portfolio(dict(INPUTS, profile=True), UNDERLYINGS)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from wheel_mc import price_options, PremiumCache
+from wheel_mc.wheel_mc import _get_option_price
+
+
+def _reference_price(optype, s, x, r, vol, t):
+    d1 = (np.log(s / x) + (r + vol * vol / 2.0) * t) / (vol * np.sqrt(t))
+    d2 = d1 - vol * np.sqrt(t)
+
+    if optype == "call":
+        premium = s * stats.norm.cdf(d1) - x * np.exp(-r * t) * stats.norm.cdf(d2)
+    else:
+        premium = x * np.exp(-r * t) * stats.norm.cdf(-d2) - s * stats.norm.cdf(-d1)
+
+    return max(np.round(premium, 2), 0.01)
+
+
+@pytest.mark.parametrize("optype", ["call", "put"])
+def test_batched_prices_match_scalar_prices(optype):
+    rng = np.random.default_rng(1)
+    s = np.round(rng.uniform(5.0, 150.0, 500), 2)
+    x = np.round(s * rng.uniform(0.8, 1.2, 500), 2)
+    t = rng.integers(1, 21, 500) / 252.0
+    premiums = price_options(optype, s, x, 0.01, 0.2, t)
+
+    for i in range(s.size):
+        expected = _reference_price(optype, s[i], x[i], 0.01, 0.2, t[i])
+        assert premiums[i] == expected
+        assert _get_option_price(optype, s[i], x[i], 0.01, 0.2, t[i]) == expected
+
+
+def test_premium_floor_and_broadcasting():
+    premiums = price_options("call", np.array([[10.0], [20.0]]), 100.0, 0.01, 0.2, 0.01)
+    assert premiums.shape == (2, 1)
+    assert (premiums == 0.01).all()
+
+
+@pytest.mark.parametrize("optype,factor", [("call", 0.05), ("put", -0.03)])
+def test_premium_cache_matches_pricer(optype, factor):
+    cache = PremiumCache(0.01, 0.3, 0.05, 0.03, page_size=256, max_pages=4)
+    rng = np.random.default_rng(2)
+    s = np.round(rng.uniform(0.01, 80.0, 5000), 2)
+    days = rng.integers(1, 21, 5000)
+    expected = price_options(
+        optype, s, np.round(s + s * factor, 2), 0.01, 0.3, days / 252.0
+    )
+
+    assert np.array_equal(cache.lookup(optype, s, days), expected)
+    assert cache.premium(optype, s[0], days[0]) == expected[0]
+    assert cache._npages <= 4 or len(cache._tables) == 1
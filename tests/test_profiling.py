@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from wheel_mc import run_simulation, InputData
+
+INPUTS = dict(
+    number_of_trading_paths=60,
+    number_of_periods=12,
+    covered_calls_deadline=7,
+    write_puts_if_no_calls=True,
+    seed=3,
+    shard_size=25,
+    chunk_size=10,
+)
+
+
+@pytest.mark.parametrize("engine", ["loop", "vectorized", "numba"])
+def test_profiling_does_not_change_results(engine):
+    if engine == "numba":
+        pytest.importorskip("numba")
+
+    plain = run_simulation(InputData(engine=engine, **INPUTS))
+    profiled = run_simulation(InputData(engine=engine, profile=True, **INPUTS))
+
+    assert plain.profile is None
+    assert np.array_equal(plain.money, profiled.money)
+    assert np.array_equal(plain.stock, profiled.stock)
+
+    stats = profiled.profile.to_dict()
+
+    assert stats["paths_completed"] == 60
+    assert stats["options_priced"] >= (profiled.open_calls + profiled.open_puts).sum()
+    assert stats["lots_scanned"] > 0
+    assert stats["wall_time"] > 0.0
+    assert all(stats[phase + "_time"] >= 0.0 for phase in profiled.profile.phases)
+
+
+@pytest.mark.parametrize("engine", ["vectorized", "numba"])
+def test_counters_match_loop_engine(engine):
+    if engine == "numba":
+        pytest.importorskip("numba")
+
+    loop, other = (
+        run_simulation(InputData(engine=name, profile=True, **INPUTS)).profile.counts
+        for name in ("loop", engine)
+    )
+
+    assert loop["lots_scanned"] > 0
+    assert other == loop
+
+
+def test_progress_callback():
+    reports = []
+    run_simulation(
+        InputData(progress_every=20, **INPUTS),
+        callback=lambda done, total, profile: reports.append((done, total)),
+    )
+
+    # Progress is reported at block granularity (blocks of 10 in shards of 25)
+    assert reports == [(20, 60), (45, 60), (60, 60)]
+
+
+def test_progress_callback_in_parallel_run():
+    reports = []
+
+    with ThreadPoolExecutor(2) as executor:
+        run_simulation(
+            InputData(profile=True, **INPUTS),
+            executor=executor,
+            callback=lambda done, total, profile: reports.append(
+                (done, profile.counts["paths_completed"])
+            ),
+        )
+
+    assert reports == [(25, 25), (50, 50), (60, 60)]
@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from wheel_mc import run_simulation, InputData
+from wheel_mc.qmc import _get_bridge_order
+
+INPUTS = dict(
+    number_of_trading_paths=256,
+    number_of_periods=6,
+    engine="vectorized",
+    sampler="sobol",
+    qmc_replicates=4,
+    seed=2,
+    summarize=True,
+)
+
+
+def test_bridge_order_puts_period_ends_first():
+    order = _get_bridge_order(6)
+
+    assert sorted(order) == list(range(1, 6 * 21))
+    assert order[0] == 6 * 21 - 1
+    assert sorted(order[:6]) == [(j + 1) * 21 - 1 for j in range(6)]
+
+
+def test_paths_do_not_depend_on_shards_and_chunks():
+    whole = run_simulation(InputData(**INPUTS))
+    chunked = run_simulation(InputData(chunk_size=50, **INPUTS))
+
+    with ThreadPoolExecutor(2) as executor:
+        sharded = run_simulation(InputData(shard_size=100, **INPUTS), executor=executor)
+
+    assert np.array_equal(whole.stock_prices, chunked.stock_prices)
+    assert np.array_equal(whole.stock_prices, sharded.stock_prices)
+    assert whole.summary.estimate("final_position") == pytest.approx(
+        sharded.summary.estimate("final_position")
+    )
+
+
+def test_terminal_price_distribution():
+    ret = run_simulation(InputData(**(INPUTS | {"number_of_trading_paths": 4096})))
+    T = 6 * 21 - 1
+    log_returns = np.log(ret.stock_prices[:, -1] / 100.0)
+
+    assert log_returns.mean() == pytest.approx((0.01 - 0.02) / 252.0 * T, abs=1e-3)
+    assert log_returns.std() == pytest.approx(0.2 * np.sqrt(T / 252.0), rel=1e-2)
+
+
+def test_replicates_give_error_estimates():
+    ret = run_simulation(InputData(**INPUTS))
+    mean, stderr = ret.summary.estimate("final_position")
+
+    assert mean == pytest.approx(ret.summary.mean("final_position"))
+    assert 0.0 < stderr < np.inf
+    assert ret.summary.to_dict()["final_position_estimate_stderr"] == stderr
@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from wheel_mc import run_simulation, InputData
+from wheel_mc.models import SimulationData
+
+INPUTS = dict(
+    number_of_trading_paths=90,
+    number_of_periods=12,
+    covered_calls_deadline=7,
+    write_puts_if_no_calls=True,
+    engine="vectorized",
+    seed=123,
+    shard_size=25,
+)
+
+
+def _assert_equal(a, b):
+    for field in SimulationData.model_fields:
+        assert np.array_equal(getattr(a, field), getattr(b, field)), field
+
+
+def test_results_do_not_depend_on_number_of_workers():
+    serial = run_simulation(InputData(**INPUTS))
+    parallel = run_simulation(InputData(n_workers=2, **INPUTS))
+
+    with ThreadPoolExecutor(3) as executor:
+        threaded = run_simulation(InputData(**INPUTS), executor=executor)
+
+    assert serial.stock_prices.shape == (90, 12 * 21)
+    _assert_equal(serial, parallel)
+    _assert_equal(serial, threaded)
+
+
+def test_shards_use_independent_streams():
+    ret = run_simulation(InputData(**INPUTS))
+
+    assert not np.array_equal(ret.stock_prices[:25], ret.stock_prices[25:50])
+
+
+def test_unseeded_serial_run_uses_global_random_state():
+    inputs = dict(INPUTS, seed=None)
+
+    np.random.seed(0)
+    sharded = run_simulation(InputData(**inputs))
+    np.random.seed(0)
+    single = run_simulation(InputData(**dict(inputs, shard_size=1000)))
+
+    _assert_equal(sharded, single)
+
+
+def test_results_do_not_depend_on_chunk_size():
+    whole = run_simulation(InputData(**INPUTS))
+    chunked = run_simulation(InputData(chunk_size=7, **INPUTS))
+
+    _assert_equal(whole, chunked)
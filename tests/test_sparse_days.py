@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from wheel_mc import run_simulation, fill_price_paths, InputData
+from wheel_mc.wheel_mc import _simulate_loop
+
+INPUTS = dict(
+    number_of_trading_paths=200,
+    number_of_periods=12,
+    covered_calls_deadline=7,
+    write_puts_if_no_calls=True,
+    seed=9,
+    sparse_days=True,
+)
+FIELDS = ("money", "stock", "open_calls", "open_puts", "exercised_puts")
+
+
+def test_only_observed_days_are_simulated():
+    ret = run_simulation(InputData(**INPUTS))
+
+    assert ret.stock_prices.shape == (200, 12 * 8)
+    assert np.array_equal(ret.final_stock_prices, ret.stock_prices[:, -1])
+
+
+def test_engines_agree_on_sparse_days():
+    loop = run_simulation(InputData(**INPUTS))
+    vectorized = run_simulation(InputData(engine="vectorized", **INPUTS))
+
+    for field in FIELDS:
+        assert np.array_equal(getattr(loop, field), getattr(vectorized, field))
+
+
+def test_filled_paths_give_the_same_results():
+    inputs = InputData(**INPUTS)
+    ret = run_simulation(inputs)
+    filled = fill_price_paths(inputs, ret.stock_prices, np.random.default_rng(0))
+
+    assert filled.shape == (200, 12 * 21)
+    assert np.array_equal(filled[:, 20::21], ret.stock_prices[:, 7::8])
+
+    dense = _simulate_loop(inputs, filled)
+
+    for field in FIELDS:
+        assert np.array_equal(getattr(ret, field), getattr(dense, field))
+
+
+def test_sparse_paths_have_the_same_distribution():
+    inputs = dict(
+        INPUTS, number_of_trading_paths=20000, number_of_periods=2, engine="vectorized"
+    )
+    sparse = run_simulation(InputData(keep_path_results=True, **inputs)).stock_prices
+    dense = run_simulation(InputData(**(inputs | {"sparse_days": False}))).stock_prices
+    filled = fill_price_paths(InputData(**inputs), sparse, np.random.default_rng(1))
+
+    for day in (10, 20, 30, 41):
+        assert filled[:, day].mean() == pytest.approx(dense[:, day].mean(), rel=2e-3)
+        assert filled[:, day].std() == pytest.approx(dense[:, day].std(), rel=3e-2)
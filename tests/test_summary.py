@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from wheel_mc import run_simulation, InputData, SimulationSummary
+
+INPUTS = dict(
+    number_of_trading_paths=300,
+    number_of_periods=12,
+    engine="vectorized",
+    seed=11,
+    shard_size=100,
+    chunk_size=40,
+)
+
+
+def test_summary_matches_full_output():
+    ret = run_simulation(InputData(summarize=True, **INPUTS))
+    final_position = ret.money[:, -1] + ret.stock[:, -1] * ret.final_stock_prices
+
+    assert ret.summary.count == 300
+    assert ret.summary.mean("final_position") == pytest.approx(final_position.mean())
+    assert ret.summary.std("final_position") == pytest.approx(
+        final_position.std(ddof=1)
+    )
+    assert ret.summary.mean("open_calls") == pytest.approx(ret.open_calls.mean())
+
+    for q in (0.05, 0.5, 0.95):
+        assert ret.summary.quantile("final_position", q) == pytest.approx(
+            np.quantile(final_position, q, method="lower"), rel=0.02
+        )
+
+
+def test_summary_only_output():
+    full = run_simulation(InputData(summarize=True, **INPUTS))
+    lean = run_simulation(InputData(summarize=True, keep_path_results=False, **INPUTS))
+
+    assert lean.money.size == 0
+    assert lean.summary.to_dict() == full.summary.to_dict()
+
+
+def _split(ret, rows):
+    return ret.model_copy(
+        update={
+            field: getattr(ret, field)[rows]
+            for field in type(ret).model_fields
+            if isinstance(getattr(ret, field), np.ndarray) and field != "stock_prices"
+        }
+    )
+
+
+def test_merged_summaries_match_single_summary():
+    ret = run_simulation(InputData(summarize=True, **INPUTS))
+    first, second = SimulationSummary(), SimulationSummary()
+    first.update(_split(ret, slice(0, 170)))
+    second.update(_split(ret, slice(170, None)))
+    merged = first.merge(second)
+
+    for metric in SimulationSummary.metrics:
+        assert merged.mean(metric) == pytest.approx(ret.summary.mean(metric))
+        assert merged.variance(metric) == pytest.approx(ret.summary.variance(metric))
+        assert merged.quantile(metric, 0.5) == ret.summary.quantile(metric, 0.5)
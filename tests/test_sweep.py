@@ -0,0 +1,56 @@
+import pytest
+
+from wheel_mc import run_simulation, run_sweep, InputData
+
+BASE = dict(
+    number_of_trading_paths=120,
+    number_of_periods=12,
+    engine="vectorized",
+    seed=5,
+    shard_size=50,
+    chunk_size=20,
+)
+
+
+def test_sweep_matches_individual_runs():
+    grid = {
+        "call_strike_factor": [0.0, 0.05],
+        "covered_calls_deadline": [5, 21],
+        "volatility": [0.2, 0.3],
+    }
+    records = run_sweep(BASE, grid)
+
+    assert len(records) == 8
+
+    for record in records:
+        point = {key: record[key] for key in grid}
+        summary = run_simulation(
+            InputData(summarize=True, **BASE, **point)
+        ).summary.to_dict()
+
+        for key, value in summary.items():
+            assert record[key] == pytest.approx(value), key
+
+
+def test_sweep_accepts_explicit_points():
+    records = run_sweep(
+        BASE, [{"write_puts_if_no_calls": True}, {"put_strike_factor": 0.1}]
+    )
+
+    assert records[0]["write_puts_if_no_calls"] is True
+    assert records[1]["put_strike_factor"] == 0.1
+    assert records[1]["paths"] == 120
+
+
+@pytest.mark.parametrize(
+    "inputs",
+    [
+        dict(target_relative_error=0.1),
+        dict(checkpoint_dir="checkpoints"),
+        dict(profile=True),
+        dict(save_log=True),
+    ],
+)
+def test_sweep_rejects_unsupported_inputs(inputs):
+    with pytest.raises(ValueError):
+        run_sweep(dict(BASE, **inputs), {"volatility": [0.2, 0.3]})
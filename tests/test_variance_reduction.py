@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from wheel_mc import run_simulation, InputData
+
+INPUTS = dict(
+    number_of_trading_paths=400,
+    number_of_periods=12,
+    engine="vectorized",
+    seed=5,
+    summarize=True,
+)
+
+
+def test_antithetic_pairs():
+    ret = run_simulation(InputData(antithetic=True, **INPUTS))
+    log_returns = np.log(ret.stock_prices[:, -1] / 100.0)
+    drift = (0.01 - 0.5 * 0.2**2) / 252.0 * (12 * 21 - 1)
+
+    # Log returns of a pair are symmetric about the drift, up to rounding
+    assert np.allclose(log_returns[0::2] + log_returns[1::2], 2.0 * drift, atol=1e-3)
+
+
+def test_antithetic_paths_do_not_depend_on_chunk_size():
+    whole = run_simulation(InputData(antithetic=True, **INPUTS))
+    chunked = run_simulation(InputData(antithetic=True, chunk_size=30, **INPUTS))
+
+    assert np.array_equal(whole.stock_prices, chunked.stock_prices)
+    assert whole.summary.estimate("final_position") == pytest.approx(
+        chunked.summary.estimate("final_position")
+    )
+
+
+def test_antithetic_requires_even_sizes():
+    with pytest.raises(ValueError):
+        InputData(antithetic=True, chunk_size=25)
+
+
+def test_control_variate_reduces_error():
+    ret = run_simulation(
+        InputData(control_variate=True, **(INPUTS | {"number_of_periods": 60}))
+    )
+    mean, stderr = ret.summary.estimate("final_position")
+    stats = ret.summary.to_dict()
+
+    assert stderr < 0.5 * ret.summary.stderr("final_position")
+    assert abs(mean - ret.summary.mean("final_position")) < 4.0 * ret.summary.stderr(
+        "final_position"
+    )
+    assert stats["final_position_estimate"] == mean
+    assert stats["final_position_estimate_stderr"] == stderr
+
+
+def test_plain_estimate_is_sample_mean():
+    ret = run_simulation(InputData(**INPUTS))
+
+    assert ret.summary.estimate("invested_money") == pytest.approx(
+        (ret.summary.mean("invested_money"), ret.summary.stderr("invested_money"))
+    )
+    assert "final_position_estimate" not in ret.summary.to_dict()
@@ -1,4 +1,15 @@
 from .wheel_mc import run_simulation
-from .models import InputData, SimulationData
+from .sweep import run_sweep
+from .portfolio import run_portfolio
+from .models import InputData, SimulationData, SimulationState, PortfolioData
+from .pricing import price_options, PremiumCache
+from .summary import SimulationSummary
+from .profiling import SimulationProfile
+from .bridge import fill_price_paths
+from .path_store import PathStore
+from .checkpoint import save_state, load_state
+from .export import read_export, load_export
+from .jobs import run_simulation_async, JobManager, ResultCache
+from .events import read_events, render_log, select_events
 
 __version__ = "0.9.1"
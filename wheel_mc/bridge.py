@@ -0,0 +1,152 @@
+from bisect import bisect, insort
+
+from numpy import (
+    array,
+    zeros,
+    arange,
+    ascontiguousarray,
+    setdiff1d,
+    exp,
+    log,
+    round,
+    sqrt,
+    ndarray,
+)
+from numpy.random import default_rng, Generator
+
+from .models import InputData, _DAYS_PER_PERIOD, _get_observed_days
+
+
+def fill_price_paths(
+    inputs: InputData | dict, stock_prices: ndarray, rng: Generator | None = None
+) -> ndarray:
+    """
+    Fills in the prices on the days skipped by a simulation with sparse days
+    (see `sparse_days` in `run_simulation`), drawing them from a Brownian bridge
+    between the simulated days, so that the filled-in price paths have the
+    same distribution as fully simulated ones. Useful for logs and plots; the
+    simulation results do not depend on the skipped days.
+
+    Parameters
+    ----------
+    inputs : InputData | dict
+        Inputs used in the simulation.
+    stock_prices : ndarray
+        Price paths output by the simulation (not in compact form).
+    rng : Generator | None, optional
+        Random number generator of the bridge. Default is None, which means a
+        freshly seeded one.
+
+    Returns
+    -------
+    ndarray
+        Price paths with every trading day, the simulated days unchanged.
+    """
+    inputs = (
+        inputs if isinstance(inputs, InputData) else InputData.model_validate(inputs)
+    )
+    days = _get_observed_days(inputs)
+
+    if days is None:
+        return stock_prices
+
+    T = inputs.number_of_periods * _DAYS_PER_PERIOD
+    known = (
+        arange(inputs.number_of_periods)[:, None] * _DAYS_PER_PERIOD + array(days)
+    ).ravel()
+    missing = setdiff1d(arange(T), known)
+    vol = inputs.volatility / sqrt(252.0)  # Daily volatility
+    drift = (inputs.risk_free_rate - 0.5 * inputs.volatility**2.0) / 252.0
+
+    # Brownian motion driving the price paths, known on the simulated days
+    w = zeros((stock_prices.shape[0], T), order="F")
+    w[:, known] = (
+        log(stock_prices) - log(inputs.initial_stock_price) - drift * known
+    ) / vol
+    _build_bridge(
+        w,
+        (default_rng() if rng is None else rng).standard_normal(
+            (stock_prices.shape[0], missing.size)
+        ),
+        _get_bridge_schedule(missing.tolist(), known.tolist()),
+    )
+
+    w *= vol
+    w += drift * arange(T)
+    w += log(inputs.initial_stock_price)
+    s = ascontiguousarray(w)
+    del w
+    exp(s, out=s)
+    round(s, 2, out=s)
+    s[:, known] = stock_prices
+
+    return s
+
+
+def _get_bridge_schedule(order: list[int], known: list[int] | None = None) -> tuple:
+    """
+    Returns the construction schedule of a Brownian bridge: each point is
+    drawn conditionally on its nearest already constructed neighbors.
+
+    Parameters
+    ----------
+    order : list[int]
+        Times of the points, in construction order.
+    known : list[int] | None, optional
+        Times of the points known beforehand. Default is None, which means only
+        time zero, where the Brownian motion is zero.
+
+    Returns
+    -------
+    tuple
+        Arrays of the times of the points, of their left and right neighbors,
+        of the weights of the neighbors and of the conditional standard
+        deviations. A point with no right neighbor extends the motion from its
+        left neighbor (its right weight is zero).
+    """
+    known = [0] if known is None else sorted(known)
+    schedule = []
+
+    for t in order:
+        k = bisect(known, t)
+        left = known[k - 1]
+
+        if k < len(known):
+            right = known[k]
+            schedule.append(
+                (
+                    t,
+                    left,
+                    right,
+                    (right - t) / (right - left),
+                    (t - left) / (right - left),
+                    ((t - left) * (right - t) / (right - left)) ** 0.5,
+                )
+            )
+        else:
+            schedule.append((t, left, left, 1.0, 0.0, (t - left) ** 0.5))
+
+        insort(known, t)
+
+    return tuple(array(column) for column in zip(*schedule))
+
+
+def _build_bridge(w: ndarray, z: ndarray, schedule: tuple) -> None:
+    """
+    Fills in the points of Brownian paths, in place, following a schedule.
+
+    Parameters
+    ----------
+    w : ndarray
+        Brownian paths, one per row, with the known points filled in. Column
+        access is fastest if the array is in Fortran order.
+    z : ndarray
+        Standard normal draws, one column per point of the schedule.
+    schedule : tuple
+        Construction schedule (see `_get_bridge_schedule`).
+    """
+    for k, (t, left, right, wl, wr, sd) in enumerate(zip(*schedule)):
+        if wr == 0.0:
+            w[:, t] = w[:, left] + sd * z[:, k]
+        else:
+            w[:, t] = wl * w[:, left] + wr * w[:, right] + sd * z[:, k]
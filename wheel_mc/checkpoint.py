@@ -0,0 +1,325 @@
+import json
+import os
+from hashlib import sha256
+
+from numpy import array, concatenate, full, load, savez, zeros, ndarray
+
+from .models import InputData, SimulationData, SimulationState
+
+# Bumped whenever the layout of the checkpoint files changes
+_CHECKPOINT_VERSION = 1
+
+# Inputs that do not change the saved blocks of trading paths: the output of a
+# block is the same whatever the number of paths or workers, the logging,
+# profiling and summary options, or the engine. The export options are not
+# among them, since loaded blocks are not exported again
+_RESUMABLE_FIELDS = (
+    "number_of_trading_paths",
+    "n_workers",
+    "save_log",
+    "log_file",
+    "log_format",
+    "profile",
+    "progress_every",
+    "target_relative_error",
+    "target_metrics",
+    "confidence_level",
+    "summarize",
+    "control_variate",
+    "keep_state",
+    "premium_cache",
+    "engine",
+    "checkpoint_dir",
+)
+
+
+def save_state(state: SimulationState, file: str) -> None:
+    """
+    Saves the state of the trading paths at the end of a simulation in a
+    `.npz` file.
+
+    Parameters
+    ----------
+    state : SimulationState
+        State of the trading paths.
+    file : str
+        Path of the file.
+    """
+    with open(file, "wb") as f:
+        savez(f, **_get_state_arrays(state))
+
+
+def load_state(file: str) -> SimulationState:
+    """
+    Loads the state of the trading paths saved by `save_state`.
+
+    Parameters
+    ----------
+    file : str
+        Path of the file.
+
+    Returns
+    -------
+    SimulationState
+        State of the trading paths, from which a simulation can be continued
+        (see `run_simulation`).
+    """
+    with load(file) as stored:
+        return _get_state_from_arrays(stored)
+
+
+def _get_state_arrays(state: SimulationState, prefix: str = "") -> dict:
+    """
+    Returns the fields of a state as a dictionary of arrays, with the names
+    prefixed.
+    """
+    return {
+        prefix + field: array(getattr(state, field))
+        for field in SimulationState.model_fields
+    }
+
+
+def _get_state_from_arrays(stored, prefix: str = "") -> SimulationState:
+    """
+    Returns the state whose fields are stored as arrays with prefixed names.
+    """
+    return SimulationState(
+        periods=int(stored[prefix + "periods"]),
+        **{
+            field: stored[prefix + field]
+            for field in SimulationState.model_fields
+            if field != "periods"
+        },
+    )
+
+
+def _get_initial_state(inputs: InputData, npaths: int) -> SimulationState:
+    """
+    Returns the state of trading paths that have not started yet.
+
+    Parameters
+    ----------
+    inputs : InputData
+        Inputs used in the simulation.
+    npaths : int
+        Number of trading paths.
+
+    Returns
+    -------
+    SimulationState
+        State with the initial money and stock price, and no shares.
+    """
+    return SimulationState(
+        periods=0,
+        stock_prices=full(npaths, inputs.initial_stock_price),
+        money=full(npaths, inputs.initial_money),
+        stock=zeros(npaths, int),
+        invested_money=full(npaths, inputs.initial_money),
+        lots=zeros((npaths, 0)),
+        missed_trades=zeros(npaths, int),
+        open_calls=zeros(npaths, int),
+        open_puts=zeros(npaths, int),
+        exercised_calls=zeros(npaths, int),
+        exercised_puts=zeros(npaths, int),
+    )
+
+
+def _slice_state(state: SimulationState, start: int, npaths: int) -> SimulationState:
+    """
+    Returns the state of `npaths` consecutive trading paths from `start`.
+    """
+    return SimulationState(
+        periods=state.periods,
+        **{
+            field: getattr(state, field)[start : start + npaths]
+            for field in SimulationState.model_fields
+            if field != "periods"
+        },
+    )
+
+
+def _concatenate_states(states: list[SimulationState]) -> SimulationState:
+    """
+    Concatenates the states of consecutive blocks of trading paths, padding
+    the lots to the largest number held.
+    """
+    nlots = max(state.lots.shape[1] for state in states)
+
+    return SimulationState(
+        periods=states[0].periods,
+        lots=concatenate(
+            [
+                concatenate(
+                    (
+                        state.lots,
+                        zeros((state.lots.shape[0], nlots - state.lots.shape[1])),
+                    ),
+                    axis=1,
+                )
+                for state in states
+            ]
+        ),
+        **{
+            field: concatenate([getattr(state, field) for state in states])
+            for field in SimulationState.model_fields
+            if field not in ("periods", "lots")
+        },
+    )
+
+
+def _get_state_output(state: SimulationState) -> SimulationData:
+    """
+    Returns the output at the end of trading paths held in their state, from
+    which the summary of the paths is computed.
+    """
+    return SimulationData(
+        final_stock_prices=state.stock_prices,
+        money=state.money,
+        stock=state.stock,
+        invested_money=state.invested_money,
+        missed_trades=state.missed_trades,
+        open_calls=state.open_calls,
+        open_puts=state.open_puts,
+        exercised_calls=state.exercised_calls,
+        exercised_puts=state.exercised_puts,
+    )
+
+
+def _open_checkpoints(
+    inputs: InputData, initial_state: SimulationState | None = None
+) -> None:
+    """
+    Prepares the checkpoint directory of a simulation, recording which
+    simulation its blocks belong to, or checking that they belong to this one.
+
+    Parameters
+    ----------
+    inputs : InputData
+        Inputs used in the simulation.
+    initial_state : SimulationState | None, optional
+        State from which the trading paths are continued. Default is None.
+    """
+    params = {
+        field: value
+        for field, value in inputs.model_dump().items()
+        if field not in _RESUMABLE_FIELDS
+    }
+    params["version"] = _CHECKPOINT_VERSION
+
+    if inputs.sampler == "sobol":
+        # The number of trading paths sets the size of the replicates
+        params["number_of_trading_paths"] = inputs.number_of_trading_paths
+
+    if initial_state is not None:
+        digest = sha256()
+
+        for value in _get_state_arrays(initial_state).values():
+            digest.update(value.tobytes())
+
+        params["initial_state"] = digest.hexdigest()
+
+    fingerprint = sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    manifest = os.path.join(inputs.checkpoint_dir, "manifest.json")
+    os.makedirs(inputs.checkpoint_dir, exist_ok=True)
+
+    if os.path.exists(manifest):
+        with open(manifest) as f:
+            if json.load(f)["fingerprint"] != fingerprint:
+                raise ValueError(
+                    "Checkpoints in %s belong to a different simulation!"
+                    % inputs.checkpoint_dir
+                )
+    else:
+        with open(manifest, "w") as f:
+            json.dump({"fingerprint": fingerprint, "inputs": params}, f, indent=2)
+
+
+class _ShardCheckpoints:
+    """
+    Checkpoints of the blocks of trading paths of a shard, one `.npz` file per
+    block holding its reduced output, its end state and the state of the
+    random number generator of the shard after the block. Files are written
+    atomically, so an interrupted simulation leaves no partial block behind.
+    """
+
+    def __init__(self, inputs: InputData, shard: int):
+        self.directory = inputs.checkpoint_dir
+        self.shard = shard
+        # Random number generator of the shard, if any, set by the generator of
+        # the price paths
+        self.rng = None
+        self.loaded = {}
+
+    def _filename(self, start: int, npaths: int) -> str:
+        return os.path.join(
+            self.directory, "shard-%d-%d-%d.npz" % (self.shard, start, npaths)
+        )
+
+    def restore(self, start: int, npaths: int) -> bool:
+        """
+        Loads the output of a saved block, if any, into `loaded` and restores
+        the random number generator to its state after the block.
+
+        Parameters
+        ----------
+        start : int
+            Index of the first trading path of the block within the shard.
+        npaths : int
+            Number of trading paths in the block.
+
+        Returns
+        -------
+        bool
+            Whether or not the block was saved.
+        """
+        filename = self._filename(start, npaths)
+
+        if not os.path.exists(filename):
+            return False
+
+        with load(filename) as stored:
+            self.loaded[start] = SimulationData(
+                state=_get_state_from_arrays(stored, "state_"),
+                **{
+                    field: stored[field]
+                    for field in SimulationData.model_fields
+                    if field in stored
+                },
+            )
+
+            if self.rng is not None:
+                self.rng.bit_generator.state = json.loads(str(stored["rng_state"]))
+
+        return True
+
+    def save(self, start: int, result: SimulationData) -> None:
+        """
+        Saves the output of a block, with its end state, and the state of the
+        random number generator.
+
+        Parameters
+        ----------
+        start : int
+            Index of the first trading path of the block within the shard.
+        result : SimulationData
+            Reduced output of the block, with its end state.
+        """
+        filename = self._filename(start, result.state.money.size)
+        tmpname = "%s.%d.tmp" % (filename, os.getpid())
+        rng_state = (
+            "null" if self.rng is None else json.dumps(self.rng.bit_generator.state)
+        )
+
+        with open(tmpname, "wb") as f:
+            savez(
+                f,
+                rng_state=array(rng_state),
+                **_get_state_arrays(result.state, "state_"),
+                **{
+                    field: value
+                    for field, value in result
+                    if isinstance(value, ndarray)
+                },
+            )
+
+        os.replace(tmpname, filename)
@@ -0,0 +1,350 @@
+from numpy import (
+    dtype,
+    zeros,
+    fromfile,
+    argsort,
+    flatnonzero,
+    nonzero,
+    ones,
+    asarray,
+    ndarray,
+)
+
+PUT_WRITTEN = 0
+CALL_WRITTEN = 1
+PUT_EXERCISED = 2
+CALL_EXERCISED = 3
+MISSED_TRADE = 4
+PERIOD_SUMMARY = 5
+LOT_HELD = 6
+
+EVENT_DTYPE = dtype(
+    [
+        ("path", "i8"),
+        ("period", "i4"),
+        ("kind", "i1"),
+        ("days_to_maturity", "i2"),
+        ("spot", "f8"),
+        ("maturity_spot", "f8"),
+        ("strike", "f8"),
+        ("premium", "f8"),
+        ("purchase_price", "f8"),
+        ("money", "f8"),
+        ("stock", "i8"),
+        ("invested_money", "f8"),
+    ]
+)
+"""
+Record of a trading event. Depending on the kind of event, the fields are:
+    PUT_WRITTEN : days_to_maturity, strike and premium of the put.
+    CALL_WRITTEN : spot price when the call is written, days_to_maturity,
+        strike and premium of the call, and purchase_price of the covered lot.
+    PUT_EXERCISED : strike of the put (the purchase price of the new lot) and
+        money in the account right after the exercise (negative if money had
+        to come from the trader's pocket).
+    CALL_EXERCISED : strike of the call (the sale price) and purchase_price of
+        the sold lot.
+    MISSED_TRADE : no specific fields.
+    PERIOD_SUMMARY : spot price at day 1 of the period, and the money, stock
+        and invested_money at the end of the period.
+    LOT_HELD : purchase_price of a lot held by a trading path continued from a
+        state (see `SimulationState`), recorded before its first period, so
+        that the log can be rendered on its own.
+All records carry the spot price at the maturity of the period (maturity_spot).
+"""
+
+
+class EventRecorder:
+    """
+    Records trading events as typed records in a preallocated NumPy structured
+    array, which is flushed in bulk to a log file, either as binary records
+    (readable with `read_events`) or as human-readable text (see
+    `render_log`).
+
+    Parameters
+    ----------
+    filename : str
+        Log file, to which records are appended.
+    log_format : string, optional
+        Either 'binary' or 'text'. Default is 'binary'.
+    capacity : integer, optional
+        Initial number of records in the buffer. Default is 65,536.
+    """
+
+    def __init__(
+        self, filename: str, log_format: str = "binary", capacity: int = 65536
+    ):
+        self.filename = filename
+        self.log_format = log_format
+        self._buffer = zeros(capacity, EVENT_DTYPE)
+        self._size = 0
+
+    def record(self, kind: int, path: int, period: int, **fields) -> None:
+        """
+        Records a single event.
+
+        Parameters
+        ----------
+        kind : int
+            Kind of event.
+        path : int
+            Index of the trading path.
+        period : int
+            Index of the trading period.
+        **fields
+            Values of the other fields of the record (see `EVENT_DTYPE`).
+        """
+        self._reserve(1)
+        rec = self._buffer[self._size]
+        rec["kind"] = kind
+        rec["path"] = path
+        rec["period"] = period
+
+        for name, value in fields.items():
+            rec[name] = value
+
+        self._size += 1
+
+    def record_many(self, kind: int, path: ndarray, period: int, **fields) -> None:
+        """
+        Records one event per element of `path`.
+
+        Parameters
+        ----------
+        kind : int
+            Kind of events.
+        path : ndarray
+            Indices of the trading paths.
+        period : int
+            Index of the trading period.
+        **fields
+            Values of the other fields of the records, either scalars or arrays
+            of the same size as `path`.
+        """
+        n = path.size
+
+        if n == 0:
+            return
+
+        self._reserve(n)
+        recs = self._buffer[self._size : self._size + n]
+        recs["kind"] = kind
+        recs["path"] = path
+        recs["period"] = period
+
+        for name, value in fields.items():
+            recs[name] = value
+
+        self._size += n
+
+    def record_lots(self, first_path: int, period: int, lots: ndarray) -> None:
+        """
+        Records the lots held by a block of trading paths continued from a
+        state, one `LOT_HELD` event per lot, in the order of the lots.
+
+        Parameters
+        ----------
+        first_path : int
+            Index of the first trading path of the block.
+        period : int
+            Index of the first trading period of the continued paths.
+        lots : ndarray
+            Purchase prices of the lots held by each trading path, padded with
+            zeros (see `SimulationState`).
+        """
+        paths, k = nonzero(lots > 0.0)
+        self.record_many(
+            LOT_HELD, first_path + paths, period, purchase_price=lots[paths, k]
+        )
+
+    def flush(self) -> None:
+        """
+        Writes the recorded events to the log file and empties the buffer. In
+        text format, only whole trading paths must have been recorded.
+        """
+        if self._size == 0:
+            return
+
+        events = self._buffer[: self._size]
+
+        if self.log_format == "text":
+            with open(self.filename, "a") as f:
+                f.write(render_log(events))
+        else:
+            with open(self.filename, "ab") as f:
+                events.tofile(f)
+
+        self._size = 0
+
+    def _reserve(self, n: int) -> None:
+        """
+        Makes room for `n` more records, flushing binary records or growing the
+        buffer for text records, which are only rendered for whole paths.
+        """
+        if self._size + n <= self._buffer.size:
+            return
+        elif self.log_format == "binary":
+            self.flush()
+
+        if self._size + n > self._buffer.size:
+            buffer = zeros(max(2 * self._buffer.size, self._size + n), EVENT_DTYPE)
+            buffer[: self._size] = self._buffer[: self._size]
+            self._buffer = buffer
+
+
+def read_events(filename: str) -> ndarray:
+    """
+    Reads the events of a binary log file.
+
+    Parameters
+    ----------
+    filename : str
+        Binary log file.
+
+    Returns
+    -------
+    ndarray
+        Structured array of events (see `EVENT_DTYPE`).
+    """
+    return fromfile(filename, dtype=EVENT_DTYPE)
+
+
+def select_events(
+    events: ndarray,
+    path: int | None = None,
+    period: int | None = None,
+    kind: int | None = None,
+) -> ndarray:
+    """
+    Selects the events of a given trading path, trading period and/or kind.
+
+    Parameters
+    ----------
+    events : ndarray
+        Structured array of events.
+    path : int, optional
+        Index of the trading path. Default is None (any path).
+    period : int, optional
+        Index of the trading period. Default is None (any period).
+    kind : int, optional
+        Kind of event. Default is None (any kind).
+
+    Returns
+    -------
+    ndarray
+        Selected events.
+    """
+    mask = ones(events.size, bool)
+
+    for name, value in (("path", path), ("period", period), ("kind", kind)):
+        if value is not None:
+            mask &= events[name] == value
+
+    return events[mask]
+
+
+def render_log(events: ndarray) -> str:
+    """
+    Renders events as the human-readable text log.
+
+    Parameters
+    ----------
+    events : ndarray
+        Structured array of events of whole trading paths, in the order they
+        were recorded.
+
+    Returns
+    -------
+    str
+        Text log.
+    """
+    lots = {}
+    events = asarray(events)[argsort(events["path"], kind="stable")]
+    ends = flatnonzero(events["kind"] == PERIOD_SUMMARY)
+    lines = []
+    start = 0
+    current_path = None
+
+    for end in ends:
+        summary = events[end]
+        path = int(summary["path"])
+
+        if path != current_path:
+            lines.append("TRADING PATH #%d" % path)
+            current_path = path
+
+        held = lots.setdefault(path, [])
+        lines.append("   PERIOD #%d" % summary["period"])
+        lines.append("      Spot price at day 1: %.2f" % summary["spot"])
+        matured = False
+
+        for e in events[start:end]:
+            kind = e["kind"]
+
+            if kind == LOT_HELD:
+                held.append(float(e["purchase_price"]))
+                continue
+            elif kind in (CALL_EXERCISED, PUT_EXERCISED, MISSED_TRADE) and not matured:
+                lines.append("      ------")
+                lines.append("      Spot price at maturity: %.2f" % e["maturity_spot"])
+                matured = True
+
+            lines.append("      ------")
+
+            if kind == CALL_WRITTEN:
+                lines.append("      Covered call is written!")
+                lines.append("         Spot price: %.2f" % e["spot"])
+                lines.append("         Days to maturity: %d" % e["days_to_maturity"])
+                lines.append("         Call strike: %.2f" % e["strike"])
+                lines.append("         Call premium: %.2f" % e["premium"])
+                lines.append(
+                    "         Stock purchase price: %.2f" % e["purchase_price"]
+                )
+            elif kind == PUT_WRITTEN:
+                lines.append("      Cash-secured put is written!")
+                lines.append("         Days to maturity: %d" % e["days_to_maturity"])
+                lines.append("         Put strike: %.2f" % e["strike"])
+                lines.append("         Put premium: %.2f" % e["premium"])
+            elif kind == CALL_EXERCISED:
+                lines.append("      Call was exercised!")
+                lines.append("         Stock sale price: %.2f" % e["strike"])
+                lines.append(
+                    "         Stock purchase price: %.2f" % e["purchase_price"]
+                )
+                held.remove(float(e["purchase_price"]))
+            elif kind == PUT_EXERCISED:
+                lines.append("      Put was exercised!")
+                lines.append("         Stock purchase price: %.2f" % e["strike"])
+                held.append(float(e["strike"]))
+
+                if e["money"] < 0.0:
+                    lines.append("         Money from pocket: %.2f" % -e["money"])
+            elif kind == MISSED_TRADE:
+                lines.append("      No trade was open!")
+
+        if not matured:
+            lines.append("      ------")
+            lines.append(
+                "      Spot price at maturity: %.2f" % summary["maturity_spot"]
+            )
+
+        lines.append("      ------")
+        lines.append("      Invested money: %.2f" % summary["invested_money"])
+        lines.append("      Money in account: %.2f" % summary["money"])
+        lines.append("      Number of shares: %d" % summary["stock"])
+
+        if len(held) > 0:
+            lines.append("      Purchase prices: %s" % held)
+            lines.append("      Stock price: %.2f" % summary["maturity_spot"])
+            lines.append(
+                "      Total stock position: %.2f"
+                % (summary["maturity_spot"] * summary["stock"])
+            )
+
+        lines.append(
+            "      Total position (money+stock): %.2f"
+            % (summary["money"] + summary["stock"] * summary["maturity_spot"])
+        )
+        start = end + 1
+
+    return "".join(line + "\n" for line in lines)
@@ -0,0 +1,290 @@
+import json
+import os
+import re
+from typing import Iterator
+
+from numpy import concatenate, dtype, load, save, ndarray
+
+from .models import InputData, SimulationData
+
+try:
+    import pyarrow
+    from pyarrow import ipc
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Bumped whenever the layout of the exported files changes
+_EXPORT_VERSION = 1
+
+_BLOCK_PATTERN = re.compile(r"block-(\d+)-(\d+)(?:\.(\w+))?\.(npy|arrow)$")
+
+
+def read_export(
+    directory: str, fields: list[str] | None = None
+) -> Iterator[tuple[int, SimulationData]]:
+    """
+    Reads the output of a simulation exported to a directory (see the
+    `export_dir` input of `run_simulation`), one block of trading paths at a
+    time, without loading the whole output. The arrays of `.npy` exports are
+    memory-mapped, and those of Arrow exports are memory-mapped as long as
+    they are one-dimensional.
+
+    Parameters
+    ----------
+    directory : str
+        Directory of the export.
+    fields : list[str] | None, optional
+        Fields of `SimulationData` to read. Default is None, which means all
+        exported fields.
+
+    Yields
+    ------
+    tuple[int, SimulationData]
+        Index of the first trading path of the block in the whole simulation,
+        and the output of the block.
+    """
+    with open(os.path.join(directory, "manifest.json")) as f:
+        manifest = json.load(f)
+
+    columns = manifest["columns"]
+    fields = list(columns) if fields is None else fields
+
+    if any(field not in columns for field in fields):
+        raise ValueError("Exported fields are %s!" % (tuple(columns),))
+
+    for block in manifest["blocks"]:
+        if manifest["format"] == "npy":
+            arrays = {
+                field: load(
+                    os.path.join(directory, block["files"][field]), mmap_mode="r"
+                )
+                for field in fields
+            }
+        else:
+            with pyarrow.memory_map(os.path.join(directory, block["file"])) as source:
+                table = ipc.open_file(source).read_all()
+
+            arrays = {
+                field: _get_column_array(table.column(field), columns[field])
+                for field in fields
+            }
+
+        yield block["first_path"], SimulationData(**arrays)
+
+
+def load_export(directory: str, fields: list[str] | None = None) -> SimulationData:
+    """
+    Loads the output of a simulation exported to a directory into memory; see
+    `read_export`.
+
+    Parameters
+    ----------
+    directory : str
+        Directory of the export.
+    fields : list[str] | None, optional
+        Fields of `SimulationData` to load. Default is None, which means all
+        exported fields.
+
+    Returns
+    -------
+    SimulationData
+        Output data of the exported trading paths.
+    """
+    blocks = [result for _, result in read_export(directory, fields)]
+
+    return SimulationData(
+        **{
+            field: concatenate([getattr(result, field) for result in blocks])
+            for field in blocks[0].model_fields_set
+        }
+    )
+
+
+def _get_column_array(column, info: dict) -> ndarray:
+    """
+    Returns a column of an Arrow table as an array, with the trailing shape of
+    the field (a fixed-size list column holds a 2D array).
+    """
+    column = column.combine_chunks()
+
+    if len(info["shape"]) == 0:
+        return column.to_numpy()
+
+    return column.flatten().to_numpy().reshape(-1, *info["shape"])
+
+
+def _open_export(inputs: InputData) -> None:
+    """
+    Prepares the export directory of a simulation, removing the files of a
+    previous export. With checkpoints, the blocks exported before are kept,
+    since the blocks loaded from the checkpoints are not exported again.
+
+    Parameters
+    ----------
+    inputs : InputData
+        Inputs used in the simulation.
+    """
+    if inputs.export_format == "arrow" and not PYARROW_AVAILABLE:
+        raise ValueError("PyArrow is required to export Arrow files!")
+
+    os.makedirs(inputs.export_dir, exist_ok=True)
+
+    for name in os.listdir(inputs.export_dir):
+        if name == "manifest.json" or (
+            inputs.checkpoint_dir is None and _BLOCK_PATTERN.match(name)
+        ):
+            os.remove(os.path.join(inputs.export_dir, name))
+
+
+def _export_block(inputs: InputData, first_path: int, result: SimulationData) -> None:
+    """
+    Writes the per-path arrays of the output of a block of trading paths to the
+    export directory, either one `.npy` file per field or one Arrow IPC file
+    with a column per field. Files are written atomically, so an interrupted
+    simulation leaves no partial file behind.
+
+    Parameters
+    ----------
+    inputs : InputData
+        Inputs used in the simulation.
+    first_path : int
+        Index of the first trading path of the block in the whole simulation.
+    result : SimulationData
+        Reduced output of the block.
+    """
+    npaths = result.invested_money.size
+    stem = os.path.join(inputs.export_dir, "block-%d-%d" % (first_path, npaths))
+    arrays = {
+        field: value
+        for field, value in result
+        if isinstance(value, ndarray) and value.shape[:1] == (npaths,)
+    }
+
+    if inputs.export_format == "npy":
+        for field, value in arrays.items():
+            filename = "%s.%s.npy" % (stem, field)
+            tmpname = "%s.%d.tmp" % (filename, os.getpid())
+
+            with open(tmpname, "wb") as f:
+                save(f, value)
+
+            os.replace(tmpname, filename)
+    else:
+        table = pyarrow.table(
+            {
+                field: (
+                    pyarrow.FixedSizeListArray.from_arrays(
+                        value.ravel(), value.shape[1]
+                    )
+                    if value.ndim == 2
+                    else value
+                )
+                for field, value in arrays.items()
+            }
+        )
+        filename = stem + ".arrow"
+        tmpname = "%s.%d.tmp" % (filename, os.getpid())
+
+        with pyarrow.OSFile(tmpname, "wb") as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        os.replace(tmpname, filename)
+
+
+def _close_export(inputs: InputData, npaths: int, first_period: int = 0) -> None:
+    """
+    Writes the manifest of an export, listing its blocks in the order of the
+    trading paths and the type and per-path shape of every field. Blocks past
+    the simulated trading paths (e.g., shards discarded once the target
+    precision was met) are removed.
+
+    Parameters
+    ----------
+    inputs : InputData
+        Inputs used in the simulation.
+    npaths : int
+        Number of simulated trading paths.
+    first_period : int, optional
+        Number of trading periods simulated before the exported ones, when the
+        trading paths are continued. Default is zero.
+    """
+    blocks = {}
+
+    for name in os.listdir(inputs.export_dir):
+        match = _BLOCK_PATTERN.match(name)
+
+        if match is None or match.group(4) != inputs.export_format:
+            continue
+
+        start, n = int(match.group(1)), int(match.group(2))
+
+        if start >= npaths:
+            os.remove(os.path.join(inputs.export_dir, name))
+            continue
+
+        block = blocks.setdefault(start, {"first_path": start, "npaths": n})
+
+        if inputs.export_format == "npy":
+            block.setdefault("files", {})[match.group(3)] = name
+        else:
+            block["file"] = name
+
+    blocks = [blocks[start] for start in sorted(blocks)]
+
+    if sum(block["npaths"] for block in blocks) != npaths or any(
+        block["first_path"] != previous["first_path"] + previous["npaths"]
+        for previous, block in zip(blocks, blocks[1:])
+    ):
+        raise ValueError(
+            "Exported blocks in %s do not cover the simulated trading paths!"
+            % inputs.export_dir
+        )
+
+    columns = {}
+
+    if inputs.export_format == "npy":
+        for field, name in blocks[0]["files"].items():
+            value = load(os.path.join(inputs.export_dir, name), mmap_mode="r")
+            columns[field] = {"dtype": value.dtype.str, "shape": value.shape[1:]}
+    else:
+        with pyarrow.memory_map(
+            os.path.join(inputs.export_dir, blocks[0]["file"])
+        ) as source:
+            schema = ipc.open_file(source).schema
+
+        for field in schema:
+            value_type = field.type
+
+            if isinstance(value_type, pyarrow.FixedSizeListType):
+                shape = (value_type.list_size,)
+                value_type = value_type.value_type
+            else:
+                shape = ()
+
+            columns[field.name] = {
+                "dtype": dtype(value_type.to_pandas_dtype()).str,
+                "shape": shape,
+            }
+
+    manifest = os.path.join(inputs.export_dir, "manifest.json")
+    tmpname = "%s.%d.tmp" % (manifest, os.getpid())
+
+    with open(tmpname, "w") as f:
+        json.dump(
+            {
+                "version": _EXPORT_VERSION,
+                "format": inputs.export_format,
+                "number_of_trading_paths": npaths,
+                "first_period": first_period,
+                "columns": columns,
+                "blocks": blocks,
+                "inputs": inputs.model_dump(),
+            },
+            f,
+            indent=2,
+        )
+
+    os.replace(tmpname, manifest)
@@ -0,0 +1,427 @@
+import asyncio
+import json
+import os
+import pickle
+from collections import OrderedDict
+from concurrent.futures import Executor, Future
+from functools import partial
+from hashlib import sha256
+from threading import Lock, RLock
+
+from .models import InputData, SimulationData
+from .wheel_mc import run_simulation, _get_process_pool
+
+# Bumped whenever the output of a simulation changes for the same inputs
+_CACHE_VERSION = 1
+
+# Inputs that do not change the output of a simulation
+_CACHE_EXCLUDED_FIELDS = (
+    "n_workers",
+    "engine",
+    "premium_cache",
+    "progress_every",
+    "checkpoint_dir",
+)
+
+
+class ResultCache:
+    """
+    Cache of simulation outputs, keyed by a hash of the validated inputs, with
+    the least recently used outputs evicted when it exceeds its number of
+    entries. Outputs can also be persisted as pickle files in a directory, so
+    that they outlive the process, with the least recently used files evicted
+    when the directory exceeds its size cap.
+
+    Only seeded simulations that save no log and export no output are cached,
+    since the output of an unseeded simulation is random, and the files of the
+    others would not be written again.
+
+    Parameters
+    ----------
+    max_entries : integer, optional
+        Maximum number of outputs held in memory. Default is 128.
+    directory : str, optional
+        Directory where the outputs are persisted. It is created if needed.
+        Default is None (no persistence).
+    max_bytes : integer, optional
+        Maximum total size of the persisted files, in bytes. Default is None,
+        which means no limit.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 128,
+        directory: str | None = None,
+        max_bytes: int | None = None,
+    ):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(inputs: InputData) -> str | None:
+        """
+        Returns the key under which the output of a simulation is cached.
+
+        Parameters
+        ----------
+        inputs : InputData
+            Inputs used in the simulation.
+
+        Returns
+        -------
+        str | None
+            Hexadecimal hash of the inputs that determine the output, or None
+            if the output cannot be cached.
+        """
+        if inputs.seed is None or inputs.save_log or inputs.export_dir is not None:
+            return None
+
+        params = {
+            field: value
+            for field, value in inputs.model_dump().items()
+            if field not in _CACHE_EXCLUDED_FIELDS
+        }
+        params["version"] = _CACHE_VERSION
+
+        return sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+    def get(self, inputs: InputData) -> SimulationData | None:
+        """
+        Returns the cached output of a simulation.
+
+        Parameters
+        ----------
+        inputs : InputData
+            Inputs used in the simulation.
+
+        Returns
+        -------
+        SimulationData | None
+            Cached output, shared with every other caller, so it must not be
+            modified, or None if the simulation is not cached.
+        """
+        key = self.key(inputs)
+
+        if key is None:
+            return None
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+
+                return self._entries[key]
+
+        if self.directory is None:
+            return None
+
+        filename = os.path.join(self.directory, key + ".pkl")
+
+        try:
+            with open(filename, "rb") as f:
+                result = pickle.load(f)
+        except FileNotFoundError:
+            return None
+
+        os.utime(filename)
+        self._remember(key, result)
+
+        return result
+
+    def put(self, inputs: InputData, result: SimulationData) -> None:
+        """
+        Caches the output of a simulation.
+
+        Parameters
+        ----------
+        inputs : InputData
+            Inputs used in the simulation.
+        result : SimulationData
+            Output of the simulation.
+        """
+        key = self.key(inputs)
+
+        if key is None:
+            return
+
+        self._remember(key, result)
+
+        if self.directory is not None:
+            filename = os.path.join(self.directory, key + ".pkl")
+            tmpname = "%s.%d.tmp" % (filename, os.getpid())
+
+            with open(tmpname, "wb") as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+            os.replace(tmpname, filename)
+            self._evict(keep=filename)
+
+    def _remember(self, key: str, result: SimulationData) -> None:
+        """
+        Holds an output in memory, evicting the least recently used ones.
+        """
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _evict(self, keep: str) -> None:
+        """
+        Removes the least recently used files until the directory fits its size
+        cap.
+        """
+        if self.max_bytes is None:
+            return
+
+        files = [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(".pkl")
+        ]
+        files.sort(key=os.path.getmtime)
+        size = sum(os.path.getsize(name) for name in files)
+
+        for name in files:
+            if size <= self.max_bytes:
+                break
+            elif name != keep:
+                size -= os.path.getsize(name)
+                os.remove(name)
+
+    def clear(self) -> None:
+        """
+        Removes all cached outputs, in memory and on disk.
+        """
+        with self._lock:
+            self._entries.clear()
+
+        if self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith(".pkl"):
+                    os.remove(os.path.join(self.directory, name))
+
+
+class _Job:
+    """
+    Simulation running (or queued) in the executor of a job manager, and the
+    requests waiting for its output.
+    """
+
+    def __init__(self, key: str | None, future: Future):
+        self.key = key
+        self.future = future
+        self.requests = set()
+
+
+class JobManager:
+    """
+    Runs simulations in the background, in a process pool, for many concurrent
+    requests. Requests for inputs whose output is cached are answered at once,
+    and requests for the same inputs as a job already running or queued are
+    coalesced into that job. A request can be cancelled; its job is cancelled
+    when no other request waits for it and it has not started yet.
+
+    Parameters
+    ----------
+    max_workers : integer, optional
+        Number of simulations run at once, each in its own worker process
+        (spawned, not forked). Default is None, which means the number of CPUs.
+    max_pending : integer, optional
+        Maximum number of jobs running or queued; further requests are
+        rejected with a `RuntimeError` until some jobs finish. Default is None,
+        which means no limit.
+    cache : ResultCache, optional
+        Cache of the outputs of the simulations. Default is None, which means
+        a new in-memory cache with the default number of entries.
+    executor : Executor, optional
+        Executor used to run the simulations, in place of the process pool.
+        Default is None.
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        max_pending: int | None = None,
+        cache: ResultCache | None = None,
+        executor: Executor | None = None,
+    ):
+        self.max_pending = max_pending
+        self.cache = ResultCache() if cache is None else cache
+        self._executor = (
+            _get_process_pool(max_workers) if executor is None else executor
+        )
+        self._owns_executor = executor is None
+        self._jobs = {}
+        # Reentrant, since cancelling a job calls `_finish` in the same thread
+        self._lock = RLock()
+
+    @property
+    def pending(self) -> int:
+        """
+        Number of jobs running or queued.
+        """
+        with self._lock:
+            return len(self._jobs)
+
+    def submit(self, inputs: InputData | dict) -> Future:
+        """
+        Requests a simulation.
+
+        Parameters
+        ----------
+        inputs : InputData | dict
+            Inputs used in the simulation; see `run_simulation`.
+
+        Returns
+        -------
+        Future
+            Future of the output of the simulation (see `SimulationData`),
+            which is shared with coalesced requests and the cache, so it must
+            not be modified. Cancelling the future withdraws the request.
+        """
+        inputs = (
+            inputs
+            if isinstance(inputs, InputData)
+            else InputData.model_validate(inputs)
+        )
+        request = Future()
+        key = self.cache.key(inputs)
+        result = self.cache.get(inputs)
+
+        if result is not None:
+            request.set_running_or_notify_cancel()
+            request.set_result(result)
+
+            return request
+
+        with self._lock:
+            job = None if key is None else self._jobs.get(key)
+            new = job is None
+
+            if new:
+                if self.max_pending is not None and len(self._jobs) >= self.max_pending:
+                    raise RuntimeError("Too many pending simulations!")
+
+                job = _Job(key, self._executor.submit(run_simulation, inputs))
+                self._jobs[id(job) if key is None else key] = job
+
+            job.requests.add(request)
+
+        request.add_done_callback(partial(self._withdraw, job))
+
+        # Outside the lock, since the callback runs at once if the job is done
+        if new:
+            job.future.add_done_callback(partial(self._finish, job, inputs))
+
+        return request
+
+    def _finish(self, job: _Job, inputs: InputData, future: Future) -> None:
+        """
+        Caches the output of a finished job and answers its requests, or
+        cancels them if the job was cancelled.
+        """
+        with self._lock:
+            self._jobs.pop(id(job) if job.key is None else job.key, None)
+            requests = list(job.requests)
+
+        if future.cancelled():
+            for request in requests:
+                request.cancel()
+
+            return
+        elif future.exception() is None:
+            self.cache.put(inputs, future.result())
+
+        for request in requests:
+            if request.set_running_or_notify_cancel():
+                if future.exception() is None:
+                    request.set_result(future.result())
+                else:
+                    request.set_exception(future.exception())
+
+    def _withdraw(self, job: _Job, request: Future) -> None:
+        """
+        Removes a cancelled request from its job, cancelling the job if no
+        other request waits for it. The job is cancelled, and removed from the
+        pending jobs by `_finish`, within the lock, so that no new request can
+        be coalesced into it in between.
+        """
+        if not request.cancelled():
+            return
+
+        with self._lock:
+            job.requests.discard(request)
+
+            if len(job.requests) == 0:
+                job.future.cancel()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Cancels the queued jobs and shuts the process pool down.
+
+        Parameters
+        ----------
+        wait : bool, optional
+            Whether or not to wait for the running jobs to finish. Default is
+            True.
+        """
+        with self._lock:
+            jobs = list(self._jobs.values())
+
+        for job in jobs:
+            job.future.cancel()
+
+            for request in job.requests:
+                request.cancel()
+
+        if self._owns_executor:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def __enter__(self) -> "JobManager":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+
+
+_default_manager = None
+
+
+async def run_simulation_async(
+    inputs: InputData | dict, manager: JobManager | None = None
+) -> SimulationData:
+    """
+    Simulates the Wheel strategy in the background, without blocking the event
+    loop; see `run_simulation`. Cancelling the awaiting task withdraws the
+    request.
+
+    Parameters
+    ----------
+    inputs : InputData | dict
+        Inputs used in the simulation.
+    manager : JobManager, optional
+        Job manager that runs the simulation. Default is None, which means a
+        job manager shared by the process, created on first use.
+
+    Returns
+    -------
+    SimulationData
+        Output data generated by the simulation, shared with coalesced
+        requests and the cache, so it must not be modified.
+    """
+    global _default_manager
+
+    if manager is None:
+        if _default_manager is None:
+            _default_manager = JobManager()
+
+        manager = _default_manager
+
+    return await asyncio.wrap_future(manager.submit(inputs))
@@ -0,0 +1,215 @@
+"""
+Compiled kernel of the Wheel strategy, run by the 'numba' engine.
+
+The kernel is the per-path state machine of the loop engine, written over
+preallocated arrays, with the Black-Scholes premiums computed inline, so that
+Numba can compile it to machine code and spread the trading paths over
+threads. Without Numba, the same functions run as plain Python, which is only
+meant for testing the kernel: the 'numba' engine then falls back to the
+vectorized one.
+"""
+
+import math
+
+from numpy import empty, rint, int64
+
+from .models import _DAYS_PER_PERIOD
+from .pricing import _MINIMUM_PREMIUM
+
+try:
+    from numba import njit, prange
+
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+
+        return lambda function: function
+
+
+@njit(cache=True)
+def _round_cents(x: float) -> float:
+    # As `numpy.round(x, 2)`
+    return rint(x * 100.0) / 100.0
+
+
+@njit(cache=True)
+def _ndtr(a: float) -> float:
+    # Standard normal CDF, with the branches of `scipy.special.ndtr`
+    x = a * math.sqrt(0.5)
+    z = abs(x)
+
+    if z < math.sqrt(0.5):
+        return 0.5 + 0.5 * math.erf(x)
+
+    y = 0.5 * math.erfc(z)
+
+    return 1.0 - y if x > 0.0 else y
+
+
+@njit(cache=True)
+def _price_option(
+    is_call: bool, s: float, x: float, r: float, vol: float, t: float
+) -> float:
+    # As `price_options`, for a single option
+    d1 = (math.log(s / x) + (r + vol * vol / 2.0) * t) / (vol * math.sqrt(t))
+    d2 = d1 - vol * math.sqrt(t)
+
+    if is_call:
+        premium = s * _ndtr(d1) - x * math.exp(-r * t) * _ndtr(d2)
+    else:
+        premium = x * math.exp(-r * t) * _ndtr(-d2) - s * _ndtr(-d1)
+
+    return max(_round_cents(premium), _MINIMUM_PREMIUM)
+
+
+@njit(cache=True, parallel=True)
+def _run_wheel(
+    stock_prices,
+    nperiods,
+    noptions,
+    r,
+    vol,
+    call_strike_factor,
+    put_strike_factor,
+    deadline,
+    write_puts_if_no_calls,
+    minimum_price,
+    money,
+    stock,
+    invested_money,
+    lots,
+    nlots,
+    missed_trades,
+    open_calls,
+    open_puts,
+    exercised_calls,
+    exercised_puts,
+    call_windows,
+    lots_scanned,
+):
+    """
+    Simulates the Wheel strategy on price paths, updating the output arrays in
+    place. The first column of `money` and `stock`, the invested money, the
+    lots (left-aligned purchase prices, with room for one more per period) and
+    their numbers, and the event counters hold the state of the trading paths
+    at the start. The numbers of periods in which lots are held, and of lots
+    held, are counted for the profile.
+    """
+    npaths = stock_prices.shape[0]
+    width = stock_prices.shape[1] // nperiods
+    ndays = min(deadline, _DAYS_PER_PERIOD - 1)
+
+    for i in prange(npaths):
+        xc = empty(lots.shape[1])
+        call_day = empty(lots.shape[1], int64)
+        strikes = empty(ndays)
+        premiums = empty(ndays)
+        thresholds = empty(ndays)
+        xp = 0.0
+
+        for j in range(nperiods):
+            missed = True
+            write_put = written_call = written_put = False
+            m = (j + 1) * width - 1
+            day_1 = m - width + 1
+            maturity = day_1 + _DAYS_PER_PERIOD - 1
+            n = nlots[i]
+
+            if j > 0:
+                money[i, j] = money[i, j - 1]
+                stock[i, j] = stock[i, j - 1]
+
+            # Open new call or put position
+            if n > 0:
+                call_windows[i] += 1
+                lots_scanned[i] += n
+                best = -math.inf
+
+                for d in range(ndays):
+                    s = stock_prices[i, day_1 + d]
+                    strikes[d] = _round_cents(s + s * call_strike_factor)
+                    premiums[d] = _price_option(
+                        True, s, strikes[d], r, vol, (maturity - day_1 - d) / 252.0
+                    )
+                    best = max(best, strikes[d] + premiums[d])
+                    thresholds[d] = best
+
+                # First day on which each lot can be covered
+                for k in range(n):
+                    xc[k] = 0.0
+                    d = 0
+
+                    while d < ndays and thresholds[d] <= lots[i, k]:
+                        d += 1
+
+                    call_day[k] = d
+
+                # Calls are written day by day, and lot by lot within a day
+                for d in range(ndays):
+                    for k in range(n):
+                        if call_day[k] == d:
+                            xc[k] = strikes[d]
+                            money[i, j] += premiums[d] * noptions
+                            open_calls[i] += 1
+                            missed = False
+                            written_call = True
+
+                if (
+                    write_puts_if_no_calls
+                    and not written_call
+                    and ndays < _DAYS_PER_PERIOD - 1
+                ):
+                    write_put = True
+
+            if n == 0 or write_put:
+                day_open_put = day_1 + deadline - 1 if write_put else day_1
+                s = stock_prices[i, day_open_put]
+                xp = _round_cents(s - s * put_strike_factor)
+
+                if xp >= minimum_price:
+                    money[i, j] += (
+                        _price_option(
+                            False, s, xp, r, vol, (maturity - day_open_put) / 252.0
+                        )
+                        * noptions
+                    )
+                    open_puts[i] += 1
+                    written_put = True
+                    missed = False
+
+            # Check if an open call or put is exercised
+            if written_call:
+                kept = 0
+
+                for k in range(n):
+                    if xc[k] > 0.0 and xc[k] <= stock_prices[i, m]:
+                        money[i, j] += xc[k] * noptions
+                        stock[i, j] -= noptions
+                        exercised_calls[i] += 1
+                    else:
+                        lots[i, kept] = lots[i, k]
+                        kept += 1
+
+                for k in range(kept, n):
+                    lots[i, k] = 0.0
+
+                nlots[i] = kept
+
+            if written_put and xp >= stock_prices[i, m]:
+                money[i, j] -= xp * noptions
+                stock[i, j] += noptions
+                exercised_puts[i] += 1
+                lots[i, nlots[i]] = xp
+                nlots[i] += 1
+
+                if money[i, j] < 0.0:
+                    invested_money[i] -= money[i, j]
+                    money[i, j] = 0.0
+
+            if missed:
+                missed_trades[i] += 1
@@ -1,8 +1,29 @@
-from pydantic import BaseModel, Field, field_validator, ConfigDict
+from typing import Literal
+from pydantic import BaseModel, Field, field_validator, model_validator, ConfigDict
 from numpy import array, ndarray
+from .summary import SimulationSummary, _METRICS
+from .profiling import SimulationProfile
 
 _DAYS_PER_PERIOD = 21
 
+# Maximum dimension of the Sobol' points in SciPy
+_MAX_SOBOL_DIM = 21201
+
+# Inputs that determine the simulated price paths
+_MARKET_FIELDS = (
+    "initial_stock_price",
+    "risk_free_rate",
+    "volatility",
+    "number_of_periods",
+    "number_of_trading_paths",
+    "seed",
+    "shard_size",
+    "antithetic",
+    "sampler",
+    "qmc_replicates",
+    "sparse_days",
+)
+
 
 class InputData(BaseModel):
     """
@@ -43,6 +64,130 @@ class InputData(BaseModel):
         until the dealine. Default is False.
     save_log : boolean, optional
         Whether or not to save a log. Default is False.
+    log_file : string, optional
+        File where the log is saved. Default is 'log.dat'.
+    log_format : string, optional
+        Format of the log, either 'text' (human-readable) or 'binary' (structured
+        event records, see `read_events`). Default is 'text'.
+    engine : string, optional
+        Simulation engine, either 'loop' (reference engine, trading paths are
+        simulated one at a time), 'vectorized' (all trading paths are advanced
+        together, one period at a time, using NumPy arrays) or 'numba' (the
+        loop engine compiled with Numba and parallelized over the trading
+        paths; it saves no log, and falls back to the vectorized engine, with a
+        warning, if Numba is not installed). All engines produce the same
+        results. Default is 'loop'.
+    premium_cache : boolean, optional
+        Whether or not to look option premiums up in a table, keyed by option
+        type, spot price in cents and days to maturity, that is filled lazily,
+        instead of pricing every option. Premiums are identical either way.
+        Default is False.
+    seed : integer, optional
+        Seed of the root seed sequence from which an independent random number
+        generator is spawned for each shard of trading paths. For a given seed
+        and shard size, results do not depend on the number of workers. Default
+        is None, which means that a serial simulation draws from the global
+        NumPy random state.
+    shard_size : integer, optional
+        Maximum number of trading paths per shard. Default is 10,000.
+    n_workers : integer, optional
+        Number of worker processes among which the shards are distributed.
+        Workers are spawned, not forked, so a calling script must guard its
+        entry point with `if __name__ == "__main__"`. Default is 1.
+    chunk_size : integer, optional
+        Maximum number of trading paths generated and simulated at once within a
+        shard, which bounds the working memory. Paths are drawn in sequence from
+        the same random stream, so results do not depend on the chunk size.
+        Default is None, which means a whole shard at once.
+    keep_price_paths : boolean, optional
+        Whether or not to keep the simulated price paths in the output. Default
+        is True.
+    final_values_only : boolean, optional
+        Whether or not to keep only the money in the trading account and the
+        number of shares at the end of the trading paths, instead of their
+        values in every period. Default is False.
+    compact_output : boolean, optional
+        Whether or not to store the output in compact data types: stock prices
+        (including the final ones) as 32-bit integers in cents, numbers of
+        shares as 32-bit integers, and event counters as 16-bit (or 32-bit, if
+        they may overflow) integers. A `ValueError` is raised if a price or
+        number of shares does not fit. Default is False.
+    summarize : boolean, optional
+        Whether or not to accumulate a `SimulationSummary` of the trading paths
+        as they are simulated. Default is False.
+    keep_path_results : boolean, optional
+        Whether or not to keep the per-path arrays in the output. If False, only
+        the summary is returned. Default is True.
+    profile : boolean, optional
+        Whether or not to time the phases of the simulation and count the
+        options priced, lots scanned and paths completed (see
+        `SimulationProfile`). Default is False.
+    progress_every : integer, optional
+        Number of trading paths between calls of the progress callback of
+        `run_simulation`. Default is None, which means after every block of
+        trading paths.
+    target_relative_error : float, optional
+        Target relative standard error (or relative confidence interval
+        half-width, if `confidence_level` is given) of the means of the
+        `target_metrics`. If given, shards of trading paths are simulated in
+        order until the target is met, with `number_of_trading_paths` as the
+        maximum budget. Default is None, which means all paths are simulated.
+    target_metrics : tuple[str, ...], optional
+        Summary metrics (see `SimulationSummary`) whose relative errors must
+        meet the target. Default is ('final_position',).
+    confidence_level : float, optional
+        Confidence level of the normal confidence interval whose relative
+        half-width must meet the target. Default is None, which means the
+        relative standard error.
+    antithetic : boolean, optional
+        Whether or not to generate the price paths in antithetic pairs, the odd
+        paths being driven by the negated normal increments of the preceding
+        even paths. The summary then estimates the means over pair averages. The
+        number of trading paths, shard size and chunk size must be even.
+        Default is False.
+    control_variate : boolean, optional
+        Whether or not the summary estimates the means with the stock price at
+        the end of the trading paths as a control variate, whose expectation is
+        known analytically. Default is False.
+    sampler : string, optional
+        Sampler of the normal increments of the price paths, either 'pseudo'
+        (pseudo-random numbers) or 'sobol' (scrambled Sobol' points, through a
+        Brownian bridge that draws the period ends first and the days within
+        the periods last). Default is 'pseudo'.
+    qmc_replicates : integer, optional
+        Number of independently scrambled Sobol' sequences among which the
+        trading paths are split, in blocks of consecutive paths. The spread of
+        the replicate estimates gives the standard errors of the summary.
+        Powers of two paths per replicate keep the balance properties of the
+        points. Default is 8.
+    sparse_days : boolean, optional
+        Whether or not to simulate only the prices on the days observed by the
+        strategy, that is, the first `covered_calls_deadline` days (at most 20)
+        and the maturity of each period, in place of every trading day. The
+        skipped days can be filled in afterwards (see `fill_price_paths`).
+        Default is False.
+    keep_state : boolean, optional
+        Whether or not to output the state of the trading paths at the end of
+        the simulation (see `SimulationState`), from which they can be
+        continued for more periods. Default is False.
+    checkpoint_dir : string, optional
+        Directory where the output of every block of trading paths is saved as
+        soon as it is simulated, together with its end state and the state of
+        the random number generator. Blocks found there are loaded instead of
+        simulated, so an interrupted simulation is resumed, or a finished one
+        extended by more trading paths, by running it again. Requires a seed.
+        Default is None (no checkpoints).
+    export_dir : string, optional
+        Directory to which the per-path arrays of the output are written, block
+        by block, as soon as every block of trading paths is simulated, with a
+        manifest listing the blocks (see `read_export`). Combined with
+        `keep_path_results` set to False, the output is never held in memory
+        at once. Default is None (no export).
+    export_format : string, optional
+        Format of the exported files, either 'npy' (one `.npy` file per field
+        and block, which can be memory-mapped) or 'arrow' (one Arrow IPC file
+        per block, with a column per field; requires PyArrow). Default is
+        'npy'.
     """
 
     number_of_options: int = Field(default=100, gt=0)
@@ -58,6 +203,33 @@ class InputData(BaseModel):
     covered_calls_deadline: int = _DAYS_PER_PERIOD
     write_puts_if_no_calls: bool = False
     save_log: bool = False
+    log_file: str = "log.dat"
+    log_format: Literal["text", "binary"] = "text"
+    engine: Literal["loop", "vectorized", "numba"] = "loop"
+    premium_cache: bool = False
+    seed: int | None = Field(default=None, ge=0)
+    shard_size: int = Field(default=10000, gt=0)
+    n_workers: int = Field(default=1, gt=0)
+    chunk_size: int | None = Field(default=None, gt=0)
+    keep_price_paths: bool = True
+    final_values_only: bool = False
+    compact_output: bool = False
+    summarize: bool = False
+    keep_path_results: bool = True
+    profile: bool = False
+    progress_every: int | None = Field(default=None, gt=0)
+    target_relative_error: float | None = Field(default=None, gt=0.0)
+    target_metrics: tuple[str, ...] = ("final_position",)
+    confidence_level: float | None = Field(default=None, gt=0.0, lt=1.0)
+    antithetic: bool = False
+    control_variate: bool = False
+    sampler: Literal["pseudo", "sobol"] = "pseudo"
+    qmc_replicates: int = Field(default=8, gt=0)
+    sparse_days: bool = False
+    keep_state: bool = False
+    checkpoint_dir: str | None = None
+    export_dir: str | None = None
+    export_format: Literal["npy", "arrow"] = "npy"
 
     @field_validator("covered_calls_deadline")
     def validade_deadline(cls, val: int) -> int:
@@ -69,15 +241,128 @@ class InputData(BaseModel):
 
         return val
 
+    @field_validator("target_metrics")
+    def validate_target_metrics(cls, val: tuple[str, ...]) -> tuple[str, ...]:
+        if len(val) == 0 or any(metric not in _METRICS for metric in val):
+            raise ValueError("Target metrics must be in %s!" % (_METRICS,))
+
+        return val
+
+    @model_validator(mode="after")
+    def validate_log(self) -> "InputData":
+        if self.save_log and self.n_workers > 1:
+            raise ValueError("A log can only be saved by a single worker!")
+        elif self.save_log and self.engine == "numba":
+            raise ValueError("A log cannot be saved by the 'numba' engine!")
+
+        return self
+
+    @model_validator(mode="after")
+    def validate_checkpoints(self) -> "InputData":
+        if self.checkpoint_dir is not None:
+            if self.seed is None:
+                raise ValueError("Only seeded simulations can be checkpointed!")
+            elif self.save_log:
+                raise ValueError("A log cannot be saved with checkpoints!")
+
+        return self
+
+    @model_validator(mode="after")
+    def validate_sampler(self) -> "InputData":
+        if self.sampler == "sobol":
+            if self.sparse_days:
+                raise ValueError(
+                    "Sparse days are only available with the pseudo-random sampler!"
+                )
+            elif self.antithetic:
+                raise ValueError(
+                    "Antithetic pairs are only available with the pseudo-random "
+                    "sampler!"
+                )
+            elif self.qmc_replicates > self.number_of_trading_paths:
+                raise ValueError(
+                    "Number of replicates cannot exceed the number of trading paths!"
+                )
+            elif self.number_of_periods * _DAYS_PER_PERIOD - 1 > _MAX_SOBOL_DIM:
+                raise ValueError(
+                    "Sobol' points are limited to %d trading periods!"
+                    % ((_MAX_SOBOL_DIM + 1) // _DAYS_PER_PERIOD)
+                )
+
+        return self
+
+    @model_validator(mode="after")
+    def validate_antithetic(self) -> "InputData":
+        if self.antithetic and any(
+            n is not None and n % 2 != 0
+            for n in (self.number_of_trading_paths, self.shard_size, self.chunk_size)
+        ):
+            raise ValueError(
+                "Number of trading paths, shard size and chunk size must be even "
+                "for antithetic pairs!"
+            )
+
+        return self
+
+
+class SimulationState(BaseModel):
+    """
+    periods : integer
+        Number of trading periods simulated so far.
+    stock_prices : array
+        Numpy array containing the stock prices at the end of trading paths.
+    money : array
+        Numpy array containing the money in the trading account.
+    stock : array
+        Numpy array containing the number of shares owned by the trader.
+    invested_money : array
+        Numpy array containing the money spent by the trader to cover the
+        assigned puts.
+    lots : array
+        2D Numpy array containing the purchase prices of the lots of shares
+        held, left-aligned in each row and padded with zeros.
+    missed_trades : array
+        Numpy array containing the total number of missed trades.
+    open_calls : array
+        Numpy array containing the total number of open calls.
+    open_puts : array
+        Numpy array containing the total number of open puts.
+    exercised_calls : array
+        Numpy array containing the total number of exercised calls.
+    exercised_puts : array
+        Numpy array containing the total number of exercised puts.
+    """
+
+    periods: int = 0
+    stock_prices: ndarray = array([])
+    money: ndarray = array([])
+    stock: ndarray = array([])
+    invested_money: ndarray = array([])
+    lots: ndarray = array([])
+    missed_trades: ndarray = array([])
+    open_calls: ndarray = array([])
+    open_puts: ndarray = array([])
+    exercised_calls: ndarray = array([])
+    exercised_puts: ndarray = array([])
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
 
 class SimulationData(BaseModel):
     """
     stock_prices : array
-        2D Numpy array containing the stock prices generated by Monte Carlo.
+        2D Numpy array containing the stock prices generated by Monte Carlo (in
+        cents, if `compact_output` is True), only on the simulated days if
+        `sparse_days` is True. Empty if `keep_price_paths` is False.
+    final_stock_prices : array
+        Numpy array containing the stock prices at the end of trading paths (in
+        cents, if `compact_output` is True).
     money : array
-        2D Numpy array containing the money in the trading account.
+        2D Numpy array containing the money in the trading account (1D, at the
+        end of trading paths, if `final_values_only` is True).
     stock : array
-        2D Numpy array containing the number of shares owned by the trader.
+        2D Numpy array containing the number of shares owned by the trader (1D,
+        at the end of trading paths, if `final_values_only` is True).
     invested_money : array
         Numpy array containing the money spent by the trader to cover the
         assigned puts at the end of trading paths.
@@ -92,9 +377,23 @@ class SimulationData(BaseModel):
         Numpy array containing the total number of exercised calls.
     exercised_puts : array
         Numpy array containing the total number of exercised puts.
+    summary : SimulationSummary | None
+        Online summary statistics of the trading paths, if `summarize` is True
+        or `target_relative_error` is given.
+    profile : SimulationProfile | None
+        Timers and counters of the phases of the simulation, if `profile` is
+        True.
+    convergence : dict | None
+        If `target_relative_error` is given, the number of simulated trading
+        paths ('paths'), whether the target was met ('converged') and the
+        achieved relative error of each target metric ('relative_errors').
+    state : SimulationState | None
+        State of the trading paths at the end of the simulation, if
+        `keep_state` is True.
     """
 
     stock_prices: ndarray = array([])
+    final_stock_prices: ndarray = array([])
     money: ndarray = array([])
     stock: ndarray = array([])
     invested_money: ndarray = array([])
@@ -103,5 +402,58 @@ class SimulationData(BaseModel):
     open_puts: ndarray = array([])
     exercised_calls: ndarray = array([])
     exercised_puts: ndarray = array([])
+    summary: SimulationSummary | None = None
+    profile: SimulationProfile | None = None
+    convergence: dict | None = None
+    state: SimulationState | None = None
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
+
+
+class PortfolioData(BaseModel):
+    """
+    underlyings : list[SimulationData]
+        Output data of each underlying asset, in the order of the underlyings
+        (see `run_simulation`). With shared cash, the money of an underlying is
+        the balance of the shared account after its trades in each period.
+    money : array
+        2D Numpy array containing the money in the trading accounts, summed
+        over the underlyings, or in the shared account (1D, at the end of
+        trading paths, if `final_values_only` is True).
+    invested_money : array
+        Numpy array containing the money spent by the trader to cover the
+        assigned puts of all underlyings at the end of trading paths.
+    final_position : array
+        Numpy array containing the total position (money+stock of every
+        underlying) at the end of trading paths.
+    """
+
+    underlyings: list[SimulationData] = []
+    money: ndarray = array([])
+    invested_money: ndarray = array([])
+    final_position: ndarray = array([])
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+
+def _get_observed_days(inputs: InputData) -> list[int] | None:
+    """
+    Returns the days of each trading period whose prices are simulated, counted
+    from the first day of the period, or None if every day is simulated.
+
+    Parameters
+    ----------
+    inputs : InputData
+        Inputs used in the simulation.
+
+    Returns
+    -------
+    list[int] | None
+        Days on which calls may be written, followed by the maturity.
+    """
+    if not inputs.sparse_days:
+        return None
+
+    ndays = min(inputs.covered_calls_deadline, _DAYS_PER_PERIOD - 1)
+
+    return list(range(ndays)) + [_DAYS_PER_PERIOD - 1]
@@ -0,0 +1,143 @@
+import json
+import os
+from hashlib import sha256
+
+from numpy.lib.format import open_memmap
+
+from .models import InputData, _MARKET_FIELDS, _DAYS_PER_PERIOD, _get_observed_days
+from .wheel_mc import _get_shards, _iter_price_chunks
+
+# Bumped whenever the layout or generation of the stored price paths changes
+_STORE_VERSION = 1
+
+
+class PathStore:
+    """
+    Persistent on-disk store of simulated price paths, kept as `.npy` files
+    that are memory-mapped by the simulation, so paths are read lazily, block
+    by block, without copying. Files are keyed by a hash of the inputs that
+    determine the price paths, and the least recently used files are evicted
+    when the store exceeds its size cap.
+
+    Parameters
+    ----------
+    directory : str
+        Directory where the price paths are stored. It is created if needed.
+    max_bytes : integer, optional
+        Maximum total size of the stored files, in bytes. Default is None, which
+        means no limit.
+    """
+
+    def __init__(self, directory: str, max_bytes: int | None = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, inputs: InputData) -> str:
+        """
+        Returns the key under which the price paths of a simulation are stored.
+
+        Parameters
+        ----------
+        inputs : InputData
+            Inputs used in the simulation.
+
+        Returns
+        -------
+        str
+            Hexadecimal hash of the inputs that determine the price paths.
+        """
+        params = {field: getattr(inputs, field) for field in _MARKET_FIELDS}
+        params["days"] = _get_observed_days(inputs)
+        params["version"] = _STORE_VERSION
+
+        return sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+    def get(self, inputs: InputData) -> str:
+        """
+        Returns the file containing the price paths of a simulation, generating
+        and storing them first if they are not in the store yet.
+
+        Parameters
+        ----------
+        inputs : InputData
+            Inputs used in the simulation.
+
+        Returns
+        -------
+        str
+            Path of the `.npy` file with the price paths.
+        """
+        if inputs.seed is None:
+            raise ValueError("Only price paths of seeded simulations can be stored!")
+
+        filename = os.path.join(self.directory, self.key(inputs) + ".npy")
+
+        if os.path.exists(filename):
+            os.utime(filename)
+        else:
+            self._write(inputs, filename)
+            self._evict(keep=filename)
+
+        return filename
+
+    def _write(self, inputs: InputData, filename: str) -> None:
+        """
+        Generates the price paths of a simulation, shard by shard and chunk by
+        chunk, into a new file.
+        """
+        tmpname = "%s.%d.tmp" % (filename, os.getpid())
+        days = _get_observed_days(inputs)
+        stored = open_memmap(
+            tmpname,
+            mode="w+",
+            dtype=float,
+            shape=(
+                inputs.number_of_trading_paths,
+                inputs.number_of_periods
+                * (_DAYS_PER_PERIOD if days is None else len(days)),
+            ),
+        )
+
+        for shard, (first_path, stop) in enumerate(_get_shards(inputs)):
+            for start, stock_prices in _iter_price_chunks(
+                inputs, shard, first_path, stop - first_path, inputs.seed
+            ):
+                stored[
+                    first_path + start : first_path + start + stock_prices.shape[0]
+                ] = stock_prices
+
+        stored.flush()
+        del stored
+        os.replace(tmpname, filename)
+
+    def _evict(self, keep: str) -> None:
+        """
+        Removes the least recently used files until the store fits its size cap.
+        """
+        if self.max_bytes is None:
+            return
+
+        files = [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(".npy")
+        ]
+        files.sort(key=os.path.getmtime)
+        size = sum(os.path.getsize(name) for name in files)
+
+        for name in files:
+            if size <= self.max_bytes:
+                break
+            elif name != keep:
+                size -= os.path.getsize(name)
+                os.remove(name)
+
+    def clear(self) -> None:
+        """
+        Removes all stored price paths.
+        """
+        for name in os.listdir(self.directory):
+            if name.endswith(".npy"):
+                os.remove(os.path.join(self.directory, name))
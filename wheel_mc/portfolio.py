@@ -0,0 +1,523 @@
+from concurrent.futures import Executor
+
+from numpy import (
+    asarray,
+    allclose,
+    argsort,
+    concatenate,
+    empty,
+    flatnonzero,
+    full,
+    ndarray,
+    ones,
+    repeat,
+    round,
+    searchsorted,
+    take_along_axis,
+    tensordot,
+    vstack,
+    where,
+    zeros,
+)
+from numpy.linalg import cholesky, LinAlgError
+from numpy.random import normal
+
+from .models import (
+    InputData,
+    SimulationData,
+    SimulationState,
+    PortfolioData,
+    _DAYS_PER_PERIOD,
+    _get_observed_days,
+)
+from .pricing import price_options
+from .wheel_mc import (
+    _map_shards,
+    _reduce_result,
+    _concatenate_results,
+    _gen_price_paths,
+    _get_minimum_price,
+    _get_rng,
+)
+
+# Inputs that all underlyings must share
+_SHARED_FIELDS = (
+    "number_of_trading_paths",
+    "number_of_periods",
+    "risk_free_rate",
+    "seed",
+    "shard_size",
+    "chunk_size",
+    "n_workers",
+    "final_values_only",
+)
+
+
+def run_portfolio(
+    base_inputs: InputData | dict,
+    underlyings: list[dict],
+    correlation: ndarray | list | None = None,
+    shared_cash: bool = False,
+    executor: Executor | None = None,
+) -> PortfolioData:
+    """
+    Simulates the Wheel strategy on a portfolio of underlying assets at once,
+    on correlated price paths drawn together, chunk by chunk, from the random
+    number generator of each shard. All underlyings are simulated in one pass
+    over a state with one row per underlying and trading path, with the same
+    results as the engines of `run_simulation`, so the `engine` and
+    `premium_cache` inputs are not used. Logs, summaries, profiles, target
+    precision, checkpoints and exports are not available.
+
+    Parameters
+    ----------
+    base_inputs : InputData | dict
+        Inputs shared by all underlyings; see `run_simulation`. The number of
+        trading paths and periods, risk-free rate, seed, shard size, chunk size,
+        number of workers and simulated days are taken from here.
+    underlyings : list[dict]
+        Inputs of each underlying (e.g., initial stock price, volatility and
+        strike factors), overriding `base_inputs`.
+    correlation : array_like, optional
+        Correlation matrix of the daily returns of the underlyings, whose
+        Cholesky factor correlates the normal increments of the price paths.
+        Default is None, which means independent underlyings.
+    shared_cash : bool, optional
+        Whether or not the underlyings share one trading account, which starts
+        with the initial money of all of them, instead of each having its own.
+        Within each period, the trades of the underlyings are settled in
+        order, so the premiums and assignments of an underlying change the
+        money available to the next ones. Default is False.
+    executor : Executor, optional
+        Executor (e.g., a process pool) used to run the shards of trading paths,
+        in place of the one created according to `n_workers`. Default is None.
+
+    Returns
+    -------
+    PortfolioData
+        Output data of each underlying and of the whole portfolio.
+    """
+    base_inputs = (
+        base_inputs
+        if isinstance(base_inputs, InputData)
+        else InputData.model_validate(base_inputs)
+    )
+
+    if len(underlyings) == 0:
+        raise ValueError("A portfolio needs at least one underlying!")
+
+    variants = [
+        InputData.model_validate(base_inputs.model_dump() | dict(underlying))
+        for underlying in underlyings
+    ]
+
+    for variant in variants:
+        if any(
+            getattr(variant, field) != getattr(base_inputs, field)
+            for field in _SHARED_FIELDS
+        ) or _get_observed_days(variant) != _get_observed_days(base_inputs):
+            raise ValueError(
+                "Underlyings must share the inputs %s and the simulated days!"
+                % (_SHARED_FIELDS,)
+            )
+        elif variant.sampler != "pseudo" or variant.antithetic:
+            raise ValueError(
+                "Portfolios are only available with the pseudo-random sampler, "
+                "without antithetic pairs!"
+            )
+        elif (
+            variant.save_log
+            or variant.summarize
+            or variant.profile
+            or variant.target_relative_error is not None
+            or variant.checkpoint_dir is not None
+            or variant.export_dir is not None
+        ):
+            raise ValueError(
+                "Logs, summaries, profiles, target precision, checkpoints and "
+                "exports are not available for portfolios!"
+            )
+
+    factor = None if correlation is None else _get_cholesky(correlation, len(variants))
+
+    return _concatenate_portfolios(
+        _map_shards(
+            _simulate_portfolio_shard,
+            base_inputs,
+            executor,
+            variants,
+            factor,
+            shared_cash,
+        )
+    )
+
+
+def _get_cholesky(correlation: ndarray | list, nunderlyings: int) -> ndarray:
+    """
+    Returns the lower Cholesky factor of a correlation matrix.
+
+    Parameters
+    ----------
+    correlation : array_like
+        Correlation matrix of the underlyings.
+    nunderlyings : int
+        Number of underlyings.
+
+    Returns
+    -------
+    ndarray
+        Lower triangular matrix L such that L @ L.T is the correlation matrix.
+    """
+    correlation = asarray(correlation, float)
+
+    if (
+        correlation.shape != (nunderlyings, nunderlyings)
+        or not allclose(correlation, correlation.T)
+        or not allclose(correlation.diagonal(), 1.0)
+    ):
+        raise ValueError(
+            "Correlation must be a symmetric %d x %d matrix with unit diagonal!"
+            % (nunderlyings, nunderlyings)
+        )
+
+    try:
+        return cholesky(correlation)
+    except LinAlgError:
+        raise ValueError("Correlation matrix must be positive definite!")
+
+
+def _simulate_portfolio_shard(
+    variants: list[InputData],
+    factor: ndarray | None,
+    shared_cash: bool,
+    inputs: InputData,
+    shard: int,
+    first_path: int,
+    npaths: int,
+    entropy: int | None,
+    paths_file: str | None = None,
+) -> PortfolioData:
+    """
+    Generates the correlated price paths of all underlyings for a shard of
+    trading paths, in blocks of at most `chunk_size` paths, and simulates the
+    Wheel strategy on them.
+
+    Parameters
+    ----------
+    variants : list[InputData]
+        Inputs of the underlyings.
+    factor : ndarray | None
+        Cholesky factor of the correlation matrix, or None if the underlyings
+        are independent.
+    shared_cash : bool
+        Whether or not the underlyings share one trading account.
+    inputs : InputData
+        Inputs shared by the underlyings.
+    shard : int
+        Index of the shard.
+    first_path : int
+        Index of the first trading path of the shard in the whole simulation.
+    npaths : int
+        Number of trading paths in the shard.
+    entropy : int | None
+        Entropy of the root seed sequence. If None, the global NumPy random
+        state is used.
+    paths_file : str | None, optional
+        Unused; price paths of portfolios are not stored. Default is None.
+
+    Returns
+    -------
+    PortfolioData
+        Output data generated by the simulation of the shard.
+    """
+    rng = _get_rng(entropy, shard)
+    chunk_size = npaths if inputs.chunk_size is None else inputs.chunk_size
+    days = _get_observed_days(inputs)
+    ncols = inputs.number_of_periods * (_DAYS_PER_PERIOD if days is None else len(days))
+    results = []
+
+    for start in range(0, npaths, chunk_size):
+        # Normal increments of every underlying, drawn at once in a 3D array
+        # (underlying x path x day) and correlated across the underlyings
+        shape = (len(variants), min(chunk_size, npaths - start), ncols)
+        z = normal(0, 1, shape) if rng is None else rng.standard_normal(shape)
+
+        if factor is not None:
+            z = tensordot(factor, z, axes=1)
+
+        stock_prices = empty(shape)
+
+        for k, variant in enumerate(variants):
+            stock_prices[k] = _gen_price_paths(
+                variant.initial_stock_price,
+                variant.risk_free_rate,
+                variant.volatility,
+                variant.number_of_periods,
+                shape[1],
+                days=days,
+                normals=z[k],
+            )
+
+        chunk = _simulate_portfolio_chunk(variants, stock_prices, shared_cash)
+        money = (
+            chunk[-1].money if shared_cash else sum(result.money for result in chunk)
+        )
+
+        final_position = money[:, -1] + sum(
+            result.stock[:, -1] * prices[:, -1]
+            for result, prices in zip(chunk, stock_prices)
+        )
+        results.append(
+            PortfolioData(
+                money=money[:, -1].copy() if inputs.final_values_only else money,
+                invested_money=sum(result.invested_money for result in chunk),
+                final_position=final_position,
+                underlyings=[
+                    _reduce_result(variant, result)
+                    for variant, result in zip(variants, chunk)
+                ],
+            )
+        )
+
+    return _concatenate_portfolios(results)
+
+
+def _simulate_portfolio_chunk(
+    variants: list[InputData], stock_prices: ndarray, shared_cash: bool
+) -> list[SimulationData]:
+    """
+    Simulates the Wheel strategy on a block of price paths of all underlyings
+    at once, as the vectorized engine does for a single one, over a state with
+    one row per underlying and trading path, and the inputs of each underlying
+    broadcast over its rows. Options are priced, and lots searched and
+    settled, for all rows together. Only the money is settled one underlying
+    at a time, when the underlyings share one trading account: within each
+    period, the premiums and assignments of an underlying are settled on the
+    balance left by the previous one.
+
+    Parameters
+    ----------
+    variants : list[InputData]
+        Inputs of the underlyings.
+    stock_prices : ndarray
+        Simulated price paths, as a 3D array (underlying x path x day).
+    shared_cash : bool
+        Whether or not the underlyings share one trading account.
+
+    Returns
+    -------
+    list[SimulationData]
+        Output data of each underlying, with the end state of its trading
+        paths. With shared cash, the money of an underlying is the balance of
+        the shared account after its trades.
+    """
+    nunderlyings, npaths, ncols = stock_prices.shape
+    nrows = nunderlyings * npaths
+    nperiods = variants[0].number_of_periods
+    width = ncols // nperiods
+    prices = stock_prices.reshape(nrows, ncols)
+    r = variants[0].risk_free_rate
+
+    # Inputs of the underlyings, repeated over their rows
+    def get_rows(field: str) -> ndarray:
+        return repeat([getattr(variant, field) for variant in variants], npaths)
+
+    vol = get_rows("volatility")
+    call_strike_factor = get_rows("call_strike_factor")
+    put_strike_factor = get_rows("put_strike_factor")
+    noptions = get_rows("number_of_options")
+    deadline = get_rows("covered_calls_deadline")
+    write_puts_if_no_calls = get_rows("write_puts_if_no_calls")
+    minimum_price = repeat(
+        [_get_minimum_price(variant) for variant in variants], npaths
+    )
+
+    money = zeros((nrows, nperiods))
+    money[:, 0] = get_rows("initial_money")
+    stock = zeros((nrows, nperiods), int)
+    invested_money = get_rows("initial_money").astype(float)
+    missed_trades = zeros(nrows, int)
+    open_calls = zeros(nrows, int)
+    open_puts = zeros(nrows, int)
+    exercised_calls = zeros(nrows, int)
+    exercised_puts = zeros(nrows, int)
+    # Lots are held lot by lot (lot x row), so that each lot is contiguous
+    purchase_price = zeros((0, nrows))
+    nlots = zeros(nrows, int)
+    xp = zeros(nrows)
+    account = full(npaths, sum(variant.initial_money for variant in variants))
+    # Rows whose money is settled together: each underlying in turn with shared
+    # cash, or all rows at once
+    blocks = (
+        [(k * npaths, (k + 1) * npaths) for k in range(nunderlyings)]
+        if shared_cash
+        else [(0, nrows)]
+    )
+
+    for j in range(nperiods):
+        # Columns of the first day and of the maturity of the period, and the
+        # day of the maturity counted as the columns of the other days
+        m = (j + 1) * width - 1
+        day_1 = m - width + 1
+        maturity = day_1 + _DAYS_PER_PERIOD - 1
+        missed = ones(nrows, bool)
+        written_call = zeros(nrows, bool)
+        write_put = zeros(nrows, bool)
+        xc = zeros(purchase_price.shape)
+        held = purchase_price > 0.0
+        has_lots = nlots > 0
+        # Rows and amounts credited to the money, in the order of the engines
+        credits = []
+
+        if j > 0:
+            stock[:, j] = stock[:, j - 1]
+
+        # Open new call or put position
+        searching = has_lots.copy()
+
+        for d in range(_DAYS_PER_PERIOD - 1):
+            searching &= (held & (xc == 0.0)).any(axis=0)
+            write_put |= (
+                searching & (deadline == d) & write_puts_if_no_calls & ~written_call
+            )
+            searching &= deadline > d
+
+            if not searching.any():
+                break
+
+            idx = flatnonzero(searching)
+            s = prices[idx, day_1 + d]
+            xctmp = round((s + s * call_strike_factor[idx]), 2)
+            c = price_options(
+                "call", s, xctmp, r, vol[idx], (maturity - day_1 - d) / 252.0
+            )
+
+            for k in range(purchase_price.shape[0]):
+                q = (
+                    held[k, idx]
+                    & (xc[k, idx] == 0.0)
+                    & ((xctmp + c) > purchase_price[k, idx])
+                )
+                rows = idx[q]
+                xc[k, rows] = xctmp[q]
+                credits.append((rows, c[q] * noptions[rows]))
+                open_calls[rows] += 1
+                missed[rows] = False
+                written_call[rows] = True
+
+        written_put = zeros(nrows, bool)
+        idx = flatnonzero(~has_lots | write_put)
+
+        if idx.size > 0:
+            day_open_put = where(write_put[idx], day_1 + deadline[idx] - 1, day_1)
+            s = prices[idx, day_open_put]
+            xp[idx] = round((s - s * put_strike_factor[idx]), 2)
+            q = xp[idx] >= minimum_price[idx]
+            idx, day_open_put, s = idx[q], day_open_put[q], s[q]
+            p = price_options(
+                "put", s, xp[idx], r, vol[idx], (maturity - day_open_put) / 252.0
+            )
+            credits.append((idx, p * noptions[idx]))
+            open_puts[idx] += 1
+            written_put[idx] = True
+            missed[idx] = False
+
+        # Check if an open call or put is exercised
+        if written_call.any():
+            for k in range(purchase_price.shape[0]):
+                q = written_call & (xc[k] > 0.0) & (xc[k] <= prices[:, m])
+                rows = flatnonzero(q)
+                credits.append((rows, xc[k, rows] * noptions[rows]))
+                stock[q, j] -= noptions[q]
+                exercised_calls[q] += 1
+                purchase_price[k, q] = 0.0
+
+            # Keeps the remaining lots first and in their original order
+            order = argsort(purchase_price == 0.0, axis=0, kind="stable")
+            purchase_price = take_along_axis(purchase_price, order, axis=0)
+            nlots = (purchase_price > 0.0).sum(axis=0)
+
+        q = written_put & (xp >= prices[:, m])
+        assigned = flatnonzero(q)
+
+        if assigned.size > 0:
+            stock[q, j] += noptions[q]
+            exercised_puts[q] += 1
+
+            if nlots[q].max() == purchase_price.shape[0]:
+                purchase_price = vstack((purchase_price, zeros((1, nrows))))
+
+            purchase_price[nlots[q], q] = xp[q]
+            nlots[q] += 1
+
+        missed_trades[missed] += 1
+
+        # Settles the money of each block of rows in turn
+        for start, stop in blocks:
+            if shared_cash:
+                money[start:stop, j] = account
+            elif j > 0:
+                money[:, j] = money[:, j - 1]
+
+            for rows, amounts in credits + [
+                (assigned, -xp[assigned] * noptions[assigned])
+            ]:
+                first, last = searchsorted(rows, (start, stop))
+                money[rows[first:last], j] += amounts[first:last]
+
+            first, last = searchsorted(assigned, (start, stop))
+            rows = assigned[first:last]
+            rows = rows[money[rows, j] < 0.0]
+            invested_money[rows] -= money[rows, j]
+            money[rows, j] = 0.0
+            account = money[start:stop, j]
+
+    return [
+        SimulationData(
+            stock_prices=stock_prices[k],
+            final_stock_prices=stock_prices[k, :, -1].copy(),
+            money=money[rows],
+            stock=stock[rows],
+            invested_money=invested_money[rows],
+            missed_trades=missed_trades[rows],
+            open_calls=open_calls[rows],
+            open_puts=open_puts[rows],
+            exercised_calls=exercised_calls[rows],
+            exercised_puts=exercised_puts[rows],
+            state=SimulationState(
+                periods=nperiods,
+                stock_prices=stock_prices[k, :, -1].copy(),
+                money=money[rows, -1].copy(),
+                stock=stock[rows, -1].copy(),
+                invested_money=invested_money[rows].copy(),
+                lots=purchase_price[: nlots[rows].max(initial=0), rows].T.copy(),
+                missed_trades=missed_trades[rows].copy(),
+                open_calls=open_calls[rows].copy(),
+                open_puts=open_puts[rows].copy(),
+                exercised_calls=exercised_calls[rows].copy(),
+                exercised_puts=exercised_puts[rows].copy(),
+            ),
+        )
+        for k, rows in enumerate(
+            slice(k * npaths, (k + 1) * npaths) for k in range(nunderlyings)
+        )
+    ]
+
+
+def _concatenate_portfolios(results: list[PortfolioData]) -> PortfolioData:
+    """
+    Concatenates the outputs of consecutive blocks or shards of trading paths
+    of a portfolio, in order.
+    """
+    if len(results) == 1:
+        return results[0]
+
+    return PortfolioData(
+        underlyings=[
+            _concatenate_results([result.underlyings[k] for result in results])
+            for k in range(len(results[0].underlyings))
+        ],
+        money=concatenate([result.money for result in results]),
+        invested_money=concatenate([result.invested_money for result in results]),
+        final_position=concatenate([result.final_position for result in results]),
+    )
@@ -0,0 +1,288 @@
+from collections import OrderedDict
+
+from numpy import (
+    asarray,
+    exp,
+    log,
+    sqrt,
+    round,
+    rint,
+    maximum,
+    arange,
+    empty,
+    zeros,
+    flatnonzero,
+    unique,
+    broadcast_arrays,
+    errstate,
+    int64,
+    ndarray,
+)
+from numpy.typing import ArrayLike
+from scipy.special import ndtr
+
+_MINIMUM_PREMIUM = 0.01
+
+
+def price_options(
+    optype: str,
+    s: ArrayLike,
+    x: ArrayLike,
+    r: ArrayLike,
+    vol: ArrayLike,
+    time_to_maturity: ArrayLike,
+) -> ndarray:
+    """
+    Returns the premiums of a batch of options calculated using the
+    Black-Scholes model.
+
+    All numerical arguments may be scalars or NumPy arrays, which are broadcast
+    against each other. The normal CDF is evaluated with `scipy.special.ndtr`,
+    avoiding the per-call overhead of `scipy.stats`.
+
+    Parameters
+    ----------
+    optype : string
+        Option type (either 'call' or 'put').
+    s : array_like
+        Stock prices.
+    x : array_like
+        Strikes.
+    r : array_like
+        Annualized risk-free interest rates.
+    vol : array_like
+        Annualized volatilities.
+    time_to_maturity : array_like
+        Times left to maturity, in years.
+
+    Returns
+    -------
+    ndarray
+        Option premiums, rounded to cents and never lower than US$ 0.01.
+    """
+    s = asarray(s, float)
+    x = asarray(x, float)
+    t = asarray(time_to_maturity, float)
+    d1 = (log(s / x) + (r + vol * vol / 2.0) * t) / (vol * sqrt(t))
+    d2 = d1 - vol * sqrt(t)
+
+    if optype == "call":
+        premium = s * ndtr(d1) - x * exp(-r * t) * ndtr(d2)
+    elif optype == "put":
+        premium = x * exp(-r * t) * ndtr(-d2) - s * ndtr(-d1)
+    else:
+        raise ValueError("Option type must be either 'call' or 'put'!")
+
+    return maximum(round(premium, 2), _MINIMUM_PREMIUM)
+
+
+class PremiumCache:
+    """
+    Memoizing table of option premiums keyed by option type, spot price in
+    cents and days to maturity.
+
+    Spot prices are rounded to cents, strikes are a fixed fraction away from
+    the spot price (also rounded to cents), times to maturity are whole trading
+    days, and the interest rate and volatility are constant during a
+    simulation, so a premium depends only on the key. For each option type,
+    premiums are held in a dense table with a row per days to maturity, over
+    the range of spot prices reached so far, which is extended and filled
+    lazily, a page of consecutive spot prices at a time, so that a batch of
+    options is looked up in one gather whatever their days to maturity. The
+    least recently used tables are evicted when the total number of pages
+    exceeds the limit. Looked-up premiums are identical to those returned by
+    `price_options`.
+
+    Parameters
+    ----------
+    r : float
+        Annualized risk-free interest rate.
+    vol : float
+        Annualized volatility.
+    call_strike_factor : float
+        Call strike position above the spot price.
+    put_strike_factor : float
+        Put strike position below the spot price.
+    page_size : integer, optional
+        Number of consecutive spot prices, in cents, per page. Default is 1,024.
+    max_pages : integer, optional
+        Maximum number of pages held in the tables. Default is 4,096 (32 MB).
+    """
+
+    def __init__(
+        self,
+        r: float,
+        vol: float,
+        call_strike_factor: float,
+        put_strike_factor: float,
+        page_size: int = 1024,
+        max_pages: int = 4096,
+    ):
+        self.r = r
+        self.vol = vol
+        self.strike_factors = {"call": call_strike_factor, "put": -put_strike_factor}
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self._tables = OrderedDict()
+        self._npages = 0
+
+    def premium(self, optype: str, s: float, days_to_maturity: int) -> float:
+        """
+        Returns the premium of a single option.
+
+        Parameters
+        ----------
+        optype : string
+            Option type (either 'call' or 'put').
+        s : float
+            Stock price, rounded to cents.
+        days_to_maturity : int
+            Trading days left to maturity.
+
+        Returns
+        -------
+        float
+            Option premium.
+        """
+        cents = int(rint(s * 100.0))
+        table = self._tables.get(optype)
+
+        if table is not None:
+            first, premiums, filled = table
+            page = cents // self.page_size - first
+
+            if (
+                days_to_maturity < filled.shape[0]
+                and 0 <= page < filled.shape[1]
+                and filled[days_to_maturity, page]
+            ):
+                return premiums[days_to_maturity, cents - first * self.page_size]
+
+        return float(self.lookup(optype, s, days_to_maturity))
+
+    def lookup(self, optype: str, s: ArrayLike, days_to_maturity: ArrayLike) -> ndarray:
+        """
+        Returns the premiums of a batch of options.
+
+        Parameters
+        ----------
+        optype : string
+            Option type (either 'call' or 'put').
+        s : array_like
+            Stock prices, rounded to cents.
+        days_to_maturity : array_like
+            Trading days left to maturity.
+
+        Returns
+        -------
+        ndarray
+            Option premiums.
+        """
+        cents = rint(asarray(s, float) * 100.0).astype(int64)
+        days = asarray(days_to_maturity, int64)
+
+        if cents.size == 0:
+            return empty(cents.shape)
+
+        pages = cents // self.page_size
+        table = self._tables.get(optype)
+
+        if table is not None:
+            # Looked up in one gather if every page is already filled
+            first, premiums, filled = table
+            offsets = pages - first
+
+            if (
+                offsets.min() >= 0
+                and offsets.max() < filled.shape[1]
+                and days.max() < filled.shape[0]
+                and filled[days, offsets].all()
+            ):
+                self._tables.move_to_end(optype)
+
+                return premiums[days, cents - first * self.page_size]
+
+        first, premiums = self._get_table(optype, days, pages)
+
+        return premiums[days, cents - first * self.page_size]
+
+    def _get_table(
+        self, optype: str, days: ndarray, pages: ndarray
+    ) -> tuple[int, ndarray]:
+        """
+        Returns the table of premiums of an option type, extended and filled so
+        that it covers the given days to maturity and pages of spot prices, and
+        the index of its first page.
+        """
+        days, pages = broadcast_arrays(days, pages)
+        low, high, nrows = int(pages.min()), int(pages.max()), int(days.max()) + 1
+
+        if optype in self._tables:
+            first, premiums, filled = self._tables.pop(optype)
+            self._npages -= filled.size
+        else:
+            first, premiums, filled = low, empty((0, 0)), zeros((0, 0), bool)
+
+        if low < first or high >= first + filled.shape[1] or nrows > filled.shape[0]:
+            # Extends the table, keeping the pages already computed; a side
+            # that is extended at least doubles the table, so that spot prices
+            # drifting a page at a time do not copy it every time
+            new_first, stop = first, first + filled.shape[1]
+
+            if low < first:
+                new_first = max(min(low, first - filled.shape[1]), 0)
+
+            if high >= stop:
+                stop = max(high + 1, stop + filled.shape[1])
+
+            npages = stop - new_first
+            shift = first - new_first
+            new_premiums = empty((max(nrows, filled.shape[0]), npages * self.page_size))
+            new_premiums[
+                : filled.shape[0],
+                shift * self.page_size : (shift + filled.shape[1]) * self.page_size,
+            ] = premiums
+            new_filled = zeros((new_premiums.shape[0], npages), bool)
+            new_filled[: filled.shape[0], shift : shift + filled.shape[1]] = filled
+            first, premiums, filled = new_first, new_premiums, new_filled
+
+        needed = ~filled[days, pages - first]
+
+        if needed.any():
+            days, pages = days[needed], pages[needed] - first
+
+            for d in unique(days).tolist():
+                rows = days == d
+                low, high = int(pages[rows].min()), int(pages[rows].max())
+                missing = flatnonzero(~filled[d, low : high + 1]) + low
+                start, stop = missing[0], missing[-1] + 1
+                s = (
+                    arange(
+                        (first + start) * self.page_size,
+                        (first + stop) * self.page_size,
+                    )
+                    / 100.0
+                )
+
+                with errstate(divide="ignore", invalid="ignore"):
+                    premiums[d, start * self.page_size : stop * self.page_size] = (
+                        price_options(
+                            optype,
+                            s,
+                            round((s + s * self.strike_factors[optype]), 2),
+                            self.r,
+                            self.vol,
+                            d / 252.0,
+                        )
+                    )
+
+                filled[d, start:stop] = True
+
+        self._tables[optype] = (first, premiums, filled)
+        self._npages += filled.size
+
+        while self._npages > self.max_pages and len(self._tables) > 1:
+            _, (_, _, evicted) = self._tables.popitem(last=False)
+            self._npages -= evicted.size
+
+        return first, premiums
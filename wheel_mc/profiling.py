@@ -0,0 +1,164 @@
+from time import perf_counter
+from typing import Callable
+
+_PHASES = (
+    "path_generation",
+    "call_writing",
+    "put_writing",
+    "exercise",
+    "logging",
+    "export",
+)
+_COUNTERS = (
+    "options_priced",
+    "lots_scanned",
+    "paths_completed",
+)
+
+
+class SimulationProfile:
+    """
+    Cumulative timers and counters of the phases of a simulation, filled in
+    when profiling is enabled. Profiles of separate blocks, shards or runs can
+    be merged.
+
+    The timed phases, in seconds, are:
+        path_generation : generation (or reading) of the price paths.
+        call_writing : search for the days on which covered calls are written,
+            including the pricing of the calls.
+        put_writing : writing of cash-secured puts, including their pricing.
+        exercise : settlement of the exercised calls and puts.
+        logging : recording of the trading events and writing of the log.
+        export : writing of the exported output (see `export_dir`).
+    Time spent elsewhere (e.g., bookkeeping between periods) is reported as
+    'other'.
+
+    The counters are defined by the strategy, so that every engine counts them
+    the same way:
+        options_priced : number of option premiums the strategy needs, that is,
+            one call premium per day of the search window for covered calls in
+            every period in which lots are held, plus one put premium per
+            written put. An engine may compute fewer (e.g., the vectorized
+            engine stops searching once every lot is covered) or look them up.
+        lots_scanned : number of lots held at the start of every period, which
+            are checked in the search for covered calls.
+        paths_completed : number of simulated trading paths.
+    The 'numba' engine does not time the phases within its compiled kernel.
+    """
+
+    phases = _PHASES
+    counters = _COUNTERS
+
+    def __init__(self):
+        self.timers = dict.fromkeys(_PHASES, 0.0)
+        self.counts = dict.fromkeys(_COUNTERS, 0)
+        self.wall_time = 0.0
+        self._tic = perf_counter()
+
+    def start(self) -> None:
+        """
+        Starts timing a new phase.
+        """
+        self._tic = perf_counter()
+
+    def lap(self, phase: str) -> None:
+        """
+        Adds the time elapsed since the last lap (or start) to a phase and
+        starts timing the next one.
+
+        Parameters
+        ----------
+        phase : string
+            Timed phase.
+        """
+        toc = perf_counter()
+        self.timers[phase] += toc - self._tic
+        self._tic = toc
+
+    def merge(self, other: "SimulationProfile") -> "SimulationProfile":
+        """
+        Merges another profile into this one.
+
+        Parameters
+        ----------
+        other : SimulationProfile
+            Profile of separate trading paths.
+
+        Returns
+        -------
+        SimulationProfile
+            This profile, updated.
+        """
+        for phase in _PHASES:
+            self.timers[phase] += other.timers[phase]
+
+        for counter in _COUNTERS:
+            self.counts[counter] += other.counts[counter]
+
+        self.wall_time += other.wall_time
+
+        return self
+
+    @property
+    def throughput(self) -> float:
+        """
+        Number of trading paths simulated per second of wall time.
+        """
+        if self.wall_time <= 0.0:
+            return 0.0
+
+        return self.counts["paths_completed"] / self.wall_time
+
+    def to_dict(self) -> dict:
+        """
+        Returns the timers and counters as a flat dictionary.
+
+        Returns
+        -------
+        dict
+            Wall time, throughput, time per phase (keyed as '<phase>_time') and
+            counters.
+        """
+        stats = {"wall_time": self.wall_time, "throughput": self.throughput}
+
+        for phase in _PHASES:
+            stats[phase + "_time"] = self.timers[phase]
+
+        stats["other_time"] = max(self.wall_time - sum(self.timers.values()), 0.0)
+
+        return stats | self.counts
+
+
+class _ProgressTracker:
+    """
+    Accumulates the progress of a simulation, block by block, and reports it
+    to a callback every `every` trading paths and on completion.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[int, int, SimulationProfile], None],
+        total: int,
+        every: int | None,
+    ):
+        self.callback = callback
+        self.total = total
+        self.every = every
+        self.profile = SimulationProfile()
+        self._start = perf_counter()
+        self._next = 0 if every is None else every
+
+    def advance(self, npaths: int, profile: SimulationProfile | None) -> None:
+        if profile is None:
+            self.profile.counts["paths_completed"] += npaths
+        else:
+            self.profile.merge(profile)
+
+        done = self.profile.counts["paths_completed"]
+
+        if done >= self._next or done == self.total:
+            self.profile.wall_time = perf_counter() - self._start
+            self.callback(done, self.total, self.profile)
+
+            while self._next <= done:
+                self._next += 1 if self.every is None else self.every
@@ -0,0 +1,182 @@
+import warnings
+from collections import deque
+from functools import lru_cache
+
+from numpy import (
+    zeros,
+    arange,
+    ascontiguousarray,
+    clip,
+    exp,
+    log,
+    round,
+    sqrt,
+    ndarray,
+)
+from numpy.random import default_rng, SeedSequence
+from scipy.special import ndtri
+from scipy.stats.qmc import Sobol
+
+from .models import _DAYS_PER_PERIOD
+from .bridge import _get_bridge_schedule, _build_bridge
+
+# Smallest and largest uniforms mapped to normals, so that no point of a
+# scrambled sequence lands on an infinite normal
+_EPS = 1e-12
+
+
+def _get_bridge_order(nperiods: int) -> list[int]:
+    """
+    Returns the order in which the days of the price paths are constructed by
+    the Brownian bridge: first the period ends, by recursive bisection
+    starting from the last day, and then the days within the periods, level by
+    level of a bisection run over all periods at once.
+
+    Parameters
+    ----------
+    nperiods : int
+        Number of trading periods.
+
+    Returns
+    -------
+    list[int]
+        Days (columns of the price paths, day zero excluded) in construction
+        order.
+    """
+    ends = [(j + 1) * _DAYS_PER_PERIOD - 1 for j in range(nperiods)]
+    order = [ends[-1]]
+    queue = deque([(0, nperiods - 1)])
+
+    while queue:
+        lo, hi = queue.popleft()
+
+        if lo < hi:
+            mid = (lo + hi - 1) // 2
+            order.append(ends[mid])
+            queue.append((lo, mid))
+            queue.append((mid + 1, hi))
+
+    # Days strictly between consecutive period ends (or day zero)
+    queue = deque([(max(end - _DAYS_PER_PERIOD + 1, 1), end) for end in ends])
+
+    while queue:
+        lo, hi = queue.popleft()
+
+        if lo < hi:
+            mid = (lo + hi - 1) // 2
+            order.append(mid)
+            queue.append((lo, mid))
+            queue.append((mid + 1, hi))
+
+    return order
+
+
+class _SobolNormals:
+    """
+    Standard normal draws from randomized (scrambled) Sobol' sequences, one
+    independent scramble per replicate of `replicate_size` consecutive trading
+    paths. The draws of a trading path depend only on its index, so paths do
+    not depend on how they are split into shards and chunks.
+    """
+
+    def __init__(self, dim: int, entropy: int, replicate_size: int):
+        self.dim = dim
+        self.entropy = entropy
+        self.replicate_size = replicate_size
+        self._replicate = None
+        self._engine = None
+
+    def draw(self, first_path: int, npaths: int) -> ndarray:
+        z = zeros((npaths, self.dim))
+        path = first_path
+
+        while path < first_path + npaths:
+            replicate, point = divmod(path, self.replicate_size)
+            n = min(self.replicate_size - point, first_path + npaths - path)
+
+            if replicate != self._replicate or self._engine.num_generated != point:
+                self._replicate = replicate
+                self._engine = Sobol(
+                    self.dim,
+                    scramble=True,
+                    seed=default_rng(
+                        SeedSequence(self.entropy, spawn_key=(replicate,))
+                    ),
+                )
+
+                if point > 0:
+                    self._engine.fast_forward(point)
+
+            with warnings.catch_warnings():
+                # Chunks need not hold powers of two points
+                warnings.simplefilter("ignore", UserWarning)
+                z[path - first_path : path - first_path + n] = self._engine.random(n)
+
+            path += n
+
+        clip(z, _EPS, 1.0 - _EPS, out=z)
+
+        return ndtri(z, out=z)
+
+
+@lru_cache(maxsize=8)
+def _get_period_bridge(nperiods: int) -> tuple:
+    """
+    Returns the Brownian bridge schedule of price paths with a number of
+    trading periods (see `_get_bridge_order`).
+    """
+    return _get_bridge_schedule(_get_bridge_order(nperiods))
+
+
+def _gen_qmc_price_paths(
+    s0: float,
+    r: float,
+    vol: float,
+    nperiods: int,
+    first_path: int,
+    npaths: int,
+    normals: _SobolNormals,
+) -> ndarray:
+    """
+    Generates price paths from Sobol' points through a Brownian bridge, so
+    that the first (best distributed) dimensions of the points drive the
+    period ends, and the last ones the days within the periods.
+
+    Parameters
+    ----------
+    s0 : float
+        Initial stock price.
+    r : float
+        Annualized risk free interest rate.
+    vol : float
+        Annualized volatility.
+    nperiods : int
+        Number of trading periods.
+    first_path : int
+        Index of the first price path in the whole simulation.
+    npaths : int
+        Number of price paths.
+    normals : _SobolNormals
+        Source of the normal draws, of dimension one less than the number of
+        simulated days.
+
+    Returns
+    -------
+    ndarray
+        Simulated price paths, with the same distribution as those generated by
+        `_gen_price_paths`.
+    """
+    T = nperiods * _DAYS_PER_PERIOD
+    w = zeros((npaths, T), order="F")
+    _build_bridge(w, normals.draw(first_path, npaths), _get_period_bridge(nperiods))
+
+    # Daily volatility and drift, as in `_gen_price_paths`
+    w *= vol / sqrt(252.0)
+    w += (r - 0.5 * vol**2.0) / 252.0 * arange(T)
+    w += log(s0)
+    s = ascontiguousarray(w)
+    del w
+    exp(s, out=s)
+    round(s, 2, out=s)
+
+    return s
@@ -0,0 +1,515 @@
+from math import sqrt
+
+from numpy import ceil, log, unique, ndarray
+from scipy.special import ndtri
+
+_METRICS = (
+    "final_position",
+    "invested_money",
+    "missed_trades",
+    "open_calls",
+    "open_puts",
+    "exercised_calls",
+    "exercised_puts",
+)
+
+
+class _RunningMoments:
+    """
+    Count, mean and sum of squared deviations of a stream of values, updated
+    block by block with Welford's algorithm and merged with Chan's formula.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+
+    def update(self, values: ndarray) -> None:
+        if values.size == 0:
+            return
+
+        block = _RunningMoments()
+        block.count = values.size
+        block.mean = float(values.mean())
+        block.m2 = float(((values - block.mean) ** 2).sum())
+        block.min = float(values.min())
+        block.max = float(values.max())
+        self.merge(block)
+
+    def merge(self, other: "_RunningMoments") -> None:
+        if other.count == 0:
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+
+class _RunningComoments:
+    """
+    Count, means, sums of squared deviations and sum of cross deviations of a
+    stream of pairs of values (y, x), updated block by block and merged with
+    the bivariate form of Chan's formula.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean_y = 0.0
+        self.mean_x = 0.0
+        self.m2_y = 0.0
+        self.m2_x = 0.0
+        self.c_xy = 0.0
+
+    def update(self, y: ndarray, x: ndarray) -> None:
+        if y.size == 0:
+            return
+
+        block = _RunningComoments()
+        block.count = y.size
+        block.mean_y = float(y.mean())
+        block.mean_x = float(x.mean())
+        dy = y - block.mean_y
+        dx = x - block.mean_x
+        block.m2_y = float((dy * dy).sum())
+        block.m2_x = float((dx * dx).sum())
+        block.c_xy = float((dy * dx).sum())
+        self.merge(block)
+
+    def merge(self, other: "_RunningComoments") -> None:
+        if other.count == 0:
+            return
+
+        count = self.count + other.count
+        dy = other.mean_y - self.mean_y
+        dx = other.mean_x - self.mean_x
+        f = self.count * other.count / count
+        self.mean_y += dy * other.count / count
+        self.mean_x += dx * other.count / count
+        self.m2_y += other.m2_y + dy * dy * f
+        self.m2_x += other.m2_x + dx * dx * f
+        self.c_xy += other.c_xy + dy * dx * f
+        self.count = count
+
+
+class _QuantileSketch:
+    """
+    Mergeable quantile sketch with logarithmically spaced buckets, such that
+    any quantile is estimated within a relative accuracy of the exact value.
+    Sketches with the same accuracy merge exactly.
+    """
+
+    def __init__(self, relative_accuracy: float):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1.0 + relative_accuracy) / (1.0 - relative_accuracy)
+        self._log_gamma = float(log(self.gamma))
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+
+    def update(self, values: ndarray) -> None:
+        self.zeros += int((values == 0.0).sum())
+
+        for store, x in (
+            (self.positive, values[values > 0.0]),
+            (self.negative, -values[values < 0.0]),
+        ):
+            if x.size > 0:
+                keys, counts = unique(
+                    ceil(log(x) / self._log_gamma).astype(int), return_counts=True
+                )
+
+                for key, count in zip(keys.tolist(), counts.tolist()):
+                    store[key] = store.get(key, 0) + count
+
+    def merge(self, other: "_QuantileSketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only sketches with the same accuracy can be merged!")
+
+        for store, other_store in (
+            (self.positive, other.positive),
+            (self.negative, other.negative),
+        ):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+
+        self.zeros += other.zeros
+
+    def quantile(self, q: float) -> float:
+        count = self.zeros + sum(self.positive.values()) + sum(self.negative.values())
+
+        if count == 0:
+            return float("nan")
+
+        rank = q * (count - 1)
+        seen = 0
+
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+
+            if seen > rank:
+                return -self._value(key)
+
+        seen += self.zeros
+
+        if seen > rank:
+            return 0.0
+
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+
+            if seen > rank:
+                return self._value(key)
+
+        return self._value(max(self.positive))
+
+    def _value(self, key: int) -> float:
+        return 2.0 * self.gamma**key / (self.gamma + 1.0)
+
+
+class SimulationSummary:
+    """
+    Online summary statistics of the trading paths, accumulated block by block
+    as the simulation progresses, so that large runs can report without
+    holding per-path arrays. Summaries of separate shards or runs can be
+    merged: exactly for the moments and approximately (within the relative
+    accuracy of the quantile sketches) for the quantiles.
+
+    The summarized metrics are:
+        final_position : total position (money+stock) at the end of trading
+            paths.
+        invested_money : money spent by the trader to cover the assigned puts.
+        missed_trades : number of missed trades.
+        open_calls : number of open calls.
+        open_puts : number of open puts.
+        exercised_calls : number of exercised calls.
+        exercised_puts : number of exercised puts.
+
+    Besides the plain sample statistics, variance-reduced estimators of the
+    means are reported (see `estimate`): over antithetic pairs of trading
+    paths, whose averages are independent, and/or with the stock price at the
+    end of the trading paths as a control variate of known expectation. For
+    randomized quasi-Monte Carlo, means are estimated per replicate and the
+    standard errors follow from the spread of the replicate estimates.
+
+    Parameters
+    ----------
+    relative_accuracy : float, optional
+        Relative accuracy of the quantile estimates. Default is 0.01.
+    antithetic : bool, optional
+        Whether or not consecutive trading paths (0 and 1, 2 and 3, ...) are
+        antithetic pairs. Blocks must then hold whole pairs. Default is False.
+    control_mean : float, optional
+        Expectation of the stock price at the end of the trading paths, used as
+        a control variate. Default is None (no control variate).
+    replicate_size : integer, optional
+        Number of consecutive trading paths per independent replicate. Default
+        is None (no replicates).
+    """
+
+    metrics = _METRICS
+
+    def __init__(
+        self,
+        relative_accuracy: float = 0.01,
+        antithetic: bool = False,
+        control_mean: float | None = None,
+        replicate_size: int | None = None,
+    ):
+        self.relative_accuracy = relative_accuracy
+        self.antithetic = antithetic
+        self.control_mean = control_mean
+        self.replicate_size = replicate_size
+        self._comoments = {metric: _RunningComoments() for metric in _METRICS}
+        self._replicates = {}
+        self._moments = {metric: _RunningMoments() for metric in _METRICS}
+        self._sketches = {
+            metric: _QuantileSketch(relative_accuracy) for metric in _METRICS
+        }
+
+    @property
+    def count(self) -> int:
+        """
+        Number of summarized trading paths.
+        """
+        return self._moments["final_position"].count
+
+    def update(self, data, first_path: int = 0) -> None:
+        """
+        Adds the trading paths of a block of simulation output to the summary.
+
+        Parameters
+        ----------
+        data : SimulationData
+            Output of a block of trading paths.
+        first_path : integer, optional
+            Index of the first trading path of the block in the whole
+            simulation, which determines the replicates of the paths. Default
+            is zero.
+        """
+        money = data.money[:, -1] if data.money.ndim == 2 else data.money
+        stock = data.stock[:, -1] if data.stock.ndim == 2 else data.stock
+        values = {
+            "final_position": money + stock * data.final_stock_prices,
+            "invested_money": data.invested_money,
+            "missed_trades": data.missed_trades,
+            "open_calls": data.open_calls,
+            "open_puts": data.open_puts,
+            "exercised_calls": data.exercised_calls,
+            "exercised_puts": data.exercised_puts,
+        }
+
+        control = data.final_stock_prices.astype(float)
+
+        if self.antithetic:
+            control = 0.5 * (control[0::2] + control[1::2])
+
+        for metric, x in values.items():
+            x = x.astype(float)
+            self._moments[metric].update(x)
+            self._sketches[metric].update(x)
+            self._comoments[metric].update(
+                0.5 * (x[0::2] + x[1::2]) if self.antithetic else x, control
+            )
+
+            if self.replicate_size is not None:
+                self._update_replicates(metric, x, control, first_path)
+
+    def _update_replicates(
+        self, metric: str, x: ndarray, control: ndarray, first_path: int
+    ) -> None:
+        start = 0
+
+        while start < x.size:
+            replicate = (first_path + start) // self.replicate_size
+            stop = min((replicate + 1) * self.replicate_size - first_path, x.size)
+            self._replicates.setdefault(
+                replicate, {metric: _RunningComoments() for metric in _METRICS}
+            )[metric].update(x[start:stop], control[start:stop])
+            start = stop
+
+    def merge(self, other: "SimulationSummary") -> "SimulationSummary":
+        """
+        Merges another summary into this one.
+
+        Parameters
+        ----------
+        other : SimulationSummary
+            Summary of separate trading paths.
+
+        Returns
+        -------
+        SimulationSummary
+            This summary, updated.
+        """
+        if (other.antithetic, other.control_mean, other.replicate_size) != (
+            self.antithetic,
+            self.control_mean,
+            self.replicate_size,
+        ):
+            raise ValueError("Only summaries with the same estimators can be merged!")
+
+        for metric in _METRICS:
+            self._moments[metric].merge(other._moments[metric])
+            self._sketches[metric].merge(other._sketches[metric])
+            self._comoments[metric].merge(other._comoments[metric])
+
+        for replicate, comoments in other._replicates.items():
+            for metric, moments in self._replicates.setdefault(
+                replicate, {metric: _RunningComoments() for metric in _METRICS}
+            ).items():
+                moments.merge(comoments[metric])
+
+        return self
+
+    def mean(self, metric: str) -> float:
+        """
+        Returns the mean of a metric.
+        """
+        return self._moments[metric].mean
+
+    def variance(self, metric: str) -> float:
+        """
+        Returns the sample variance of a metric.
+        """
+        moments = self._moments[metric]
+
+        return moments.m2 / (moments.count - 1) if moments.count > 1 else 0.0
+
+    def std(self, metric: str) -> float:
+        """
+        Returns the sample standard deviation of a metric.
+        """
+        return sqrt(self.variance(metric))
+
+    def stderr(self, metric: str) -> float:
+        """
+        Returns the standard error of the mean of a metric.
+        """
+        return sqrt(self.variance(metric) / self.count) if self.count > 0 else 0.0
+
+    def estimate(self, metric: str) -> tuple[float, float]:
+        """
+        Returns the variance-reduced estimate of the mean of a metric and its
+        standard error. Without antithetic pairs, a control variate or
+        replicates, these are the sample mean and its standard error. With
+        replicates, the estimate is the average of the replicate estimates, and
+        its standard error follows from their spread (it is infinite with less
+        than two replicates).
+
+        Parameters
+        ----------
+        metric : string
+            Summarized metric.
+
+        Returns
+        -------
+        tuple[float, float]
+            Estimate of the mean and its standard error.
+        """
+        if self.replicate_size is not None:
+            means = [
+                self._estimate(comoments[metric])[0]
+                for comoments in self._replicates.values()
+            ]
+            n = len(means)
+
+            if n < 2:
+                return (means[0] if n == 1 else 0.0), float("inf")
+
+            mean = sum(means) / n
+
+            return mean, sqrt(sum((x - mean) ** 2 for x in means) / (n - 1) / n)
+
+        return self._estimate(self._comoments[metric])
+
+    def _estimate(self, moments: _RunningComoments) -> tuple[float, float]:
+        n = moments.count
+        mean = moments.mean_y
+        variance = moments.m2_y / (n - 1) if n > 1 else 0.0
+
+        if self.control_mean is not None and moments.m2_x > 0.0:
+            beta = moments.c_xy / moments.m2_x
+            mean -= beta * (moments.mean_x - self.control_mean)
+            variance = (moments.m2_y - beta * moments.c_xy) / (n - 2) if n > 2 else 0.0
+
+        return mean, sqrt(max(variance, 0.0) / n) if n > 0 else 0.0
+
+    def relative_error(
+        self, metric: str, confidence_level: float | None = None
+    ) -> float:
+        """
+        Returns the relative error of the mean of a metric.
+
+        Parameters
+        ----------
+        metric : string
+            Summarized metric.
+        confidence_level : float, optional
+            Confidence level of a normal confidence interval. Default is None,
+            which means the relative standard error.
+
+        Returns
+        -------
+        float
+            Standard error (or confidence interval half-width) of the estimate
+            of the mean (see `estimate`) divided by its absolute value; infinite
+            if it cannot be estimated yet.
+        """
+        mean, stderr = self.estimate(metric)
+
+        if self._comoments[metric].count < 2:
+            return float("inf")
+        elif stderr == 0.0:
+            return 0.0
+        elif mean == 0.0:
+            return float("inf")
+
+        z = (
+            1.0
+            if confidence_level is None
+            else float(ndtri(0.5 + 0.5 * confidence_level))
+        )
+
+        return z * stderr / abs(mean)
+
+    def min(self, metric: str) -> float:
+        """
+        Returns the minimum of a metric.
+        """
+        return self._moments[metric].min
+
+    def max(self, metric: str) -> float:
+        """
+        Returns the maximum of a metric.
+        """
+        return self._moments[metric].max
+
+    def quantile(self, metric: str, q: float) -> float:
+        """
+        Returns an estimate of a quantile of a metric, clipped to the observed
+        range.
+
+        Parameters
+        ----------
+        metric : string
+            Summarized metric.
+        q : float
+            Quantile, between 0 and 1.
+
+        Returns
+        -------
+        float
+            Estimate of the quantile.
+        """
+        if q < 0.0 or q > 1.0:
+            raise ValueError("Quantile must be between 0 and 1!")
+
+        return min(
+            max(self._sketches[metric].quantile(q), self.min(metric)),
+            self.max(metric),
+        )
+
+    def to_dict(self, quantiles: tuple[float, ...] = (0.05, 0.5, 0.95)) -> dict:
+        """
+        Returns the summary statistics as a flat dictionary.
+
+        Parameters
+        ----------
+        quantiles : tuple[float, ...], optional
+            Quantiles reported for each metric. Default is (0.05, 0.5, 0.95).
+
+        Returns
+        -------
+        dict
+            Summary statistics, keyed as '<metric>_<statistic>', including the
+            variance-reduced estimate of the mean and its standard error
+            ('estimate' and 'estimate_stderr') if enabled.
+        """
+        stats = {"paths": self.count}
+
+        for metric in _METRICS:
+            stats[metric + "_mean"] = self.mean(metric)
+            stats[metric + "_std"] = self.std(metric)
+            stats[metric + "_stderr"] = self.stderr(metric)
+
+            for q in quantiles:
+                stats[metric + "_q%g" % (100 * q)] = self.quantile(metric, q)
+
+            if (
+                self.antithetic
+                or self.control_mean is not None
+                or self.replicate_size is not None
+            ):
+                (
+                    stats[metric + "_estimate"],
+                    stats[metric + "_estimate_stderr"],
+                ) = self.estimate(metric)
+
+        return stats
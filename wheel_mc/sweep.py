@@ -0,0 +1,166 @@
+from concurrent.futures import Executor
+from itertools import product
+
+from .models import InputData, _MARKET_FIELDS, _get_observed_days
+from .summary import SimulationSummary
+from .path_store import PathStore
+from .wheel_mc import (
+    _map_shards,
+    _iter_price_chunks,
+    _simulate_chunk,
+    _get_premium_cache,
+    _get_summary,
+    _get_available_engine,
+)
+
+
+def run_sweep(
+    base_inputs: InputData | dict,
+    grid: dict[str, list] | list[dict],
+    executor: Executor | None = None,
+    path_store: PathStore | None = None,
+) -> list[dict]:
+    """
+    Simulates the Wheel strategy for every point of a grid of inputs, using
+    common random numbers: the price paths are generated once per market
+    configuration and every strategy variant is evaluated on them, chunk by
+    chunk, in a single pass.
+
+    Parameters
+    ----------
+    base_inputs : InputData | dict
+        Inputs shared by all grid points; see `run_simulation`. The number of
+        trading paths, shard size, chunk size and number of workers are taken
+        from here. Logs, exports, target precision, checkpoints and profiling
+        are not available.
+    grid : dict[str, list] | list[dict]
+        Either a dictionary mapping input names to lists of values, whose
+        Cartesian product is swept, or an explicit list of grid points, each a
+        dictionary of inputs overriding `base_inputs`. Grid points that change
+        the market inputs (initial stock price, volatility, risk-free rate,
+        number of periods, number of trading paths, seed, shard size,
+        antithetic pairs, sampler, number of replicates or, with sparse days,
+        covered calls deadline) are simulated on their own price paths.
+    executor : Executor, optional
+        Executor (e.g., a process pool) used to run the shards of trading paths,
+        in place of the one created according to `n_workers`. Default is None.
+    path_store : PathStore, optional
+        Persistent store from which the price paths of each market
+        configuration are read in place of generating them. Default is None.
+
+    Returns
+    -------
+    list[dict]
+        One record per grid point, in grid order, containing the grid point
+        inputs followed by the summary statistics of the trading paths (see
+        `SimulationSummary.to_dict`). The records can be passed straight to
+        `pandas.DataFrame`.
+    """
+    base_inputs = (
+        base_inputs
+        if isinstance(base_inputs, InputData)
+        else InputData.model_validate(base_inputs)
+    )
+
+    if isinstance(grid, dict):
+        points = [dict(zip(grid, values)) for values in product(*grid.values())]
+    else:
+        points = [dict(point) for point in grid]
+
+    variants = [
+        InputData.model_validate(base_inputs.model_dump() | point) for point in points
+    ]
+
+    if any(variant.engine == "numba" for variant in variants):
+        variants = [_get_available_engine(variant) for variant in variants]
+
+    if any(variant.save_log for variant in variants):
+        raise ValueError("Logs cannot be saved in a sweep!")
+    elif any(variant.export_dir is not None for variant in variants):
+        raise ValueError("Outputs cannot be exported in a sweep!")
+    elif any(
+        variant.target_relative_error is not None
+        or variant.checkpoint_dir is not None
+        or variant.profile
+        for variant in variants
+    ):
+        raise ValueError(
+            "Target precision, checkpoints and profiling are not available in a "
+            "sweep!"
+        )
+
+    groups = {}
+
+    for i, variant in enumerate(variants):
+        key = tuple(getattr(variant, field) for field in _MARKET_FIELDS) + tuple(
+            _get_observed_days(variant) or ()
+        )
+        groups.setdefault(key, []).append(i)
+
+    summaries = [None] * len(variants)
+
+    for indices in groups.values():
+        group = [variants[i] for i in indices]
+        paths_file = None if path_store is None else path_store.get(group[0])
+
+        for shard_summaries in _map_shards(
+            _sweep_shard, group[0], executor, group, paths_file=paths_file
+        ):
+            for i, summary in zip(indices, shard_summaries):
+                summaries[i] = (
+                    summary if summaries[i] is None else summaries[i].merge(summary)
+                )
+
+    return [point | summary.to_dict() for point, summary in zip(points, summaries)]
+
+
+def _sweep_shard(
+    variants: list[InputData],
+    inputs: InputData,
+    shard: int,
+    first_path: int,
+    npaths: int,
+    entropy: int | None,
+    paths_file: str | None = None,
+) -> list[SimulationSummary]:
+    """
+    Generates the price paths of a shard of trading paths once and simulates
+    every strategy variant on them.
+
+    Parameters
+    ----------
+    variants : list[InputData]
+        Inputs of the strategy variants, sharing the same market inputs.
+    inputs : InputData
+        Inputs from which the price paths are generated.
+    shard : int
+        Index of the shard.
+    first_path : int
+        Index of the first trading path of the shard in the whole simulation.
+    npaths : int
+        Number of trading paths in the shard.
+    entropy : int | None
+        Entropy of the root seed sequence. If None, the global NumPy random
+        state is used.
+    paths_file : str | None, optional
+        File of stored price paths read instead of generating them. Default is
+        None.
+
+    Returns
+    -------
+    list[SimulationSummary]
+        Summaries of the shard, one per strategy variant.
+    """
+    summaries = [_get_summary(variant) for variant in variants]
+    caches = [_get_premium_cache(variant) for variant in variants]
+
+    for start, stock_prices in _iter_price_chunks(
+        inputs, shard, first_path, npaths, entropy, paths_file
+    ):
+        for variant, summary, cache in zip(variants, summaries, caches):
+            summary.update(
+                _simulate_chunk(variant, stock_prices, first_path + start, cache=cache),
+                first_path + start,
+            )
+
+    return summaries
@@ -1,11 +1,82 @@
-from numpy import full, zeros, exp, cumsum, round, ndarray
-from numpy.random import normal
+from numpy import (
+    ascontiguousarray,
+    full,
+    zeros,
+    empty,
+    negative,
+    ones,
+    exp,
+    cumsum,
+    round,
+    where,
+    flatnonzero,
+    argsort,
+    take_along_axis,
+    hstack,
+    arange,
+    diff,
+    maximum,
+    searchsorted,
+    concatenate,
+    load,
+    array,
+    rint,
+    iinfo,
+    int16,
+    int32,
+    ndarray,
+)
+from numpy.random import normal, default_rng, Generator, SeedSequence
+from concurrent.futures import Executor, ProcessPoolExecutor
+from warnings import warn
+from functools import partial
+from multiprocessing import get_context
+from itertools import repeat
+from time import perf_counter
+from typing import Callable, Iterator, TYPE_CHECKING
 from numpy.lib.scimath import log, sqrt
-from scipy import stats
-from .models import InputData, SimulationData, _DAYS_PER_PERIOD
+from .pricing import price_options, PremiumCache
+from .summary import SimulationSummary
+from .profiling import SimulationProfile, _ProgressTracker
+from .qmc import _SobolNormals, _gen_qmc_price_paths
+from .kernels import _run_wheel, NUMBA_AVAILABLE
+from .events import (
+    EventRecorder,
+    PUT_WRITTEN,
+    CALL_WRITTEN,
+    PUT_EXERCISED,
+    CALL_EXERCISED,
+    MISSED_TRADE,
+    PERIOD_SUMMARY,
+)
+from .models import (
+    InputData,
+    SimulationData,
+    SimulationState,
+    _DAYS_PER_PERIOD,
+    _get_observed_days,
+)
+from .checkpoint import (
+    _ShardCheckpoints,
+    _open_checkpoints,
+    _get_initial_state,
+    _get_state_output,
+    _slice_state,
+    _concatenate_states,
+)
+from .export import _open_export, _export_block, _close_export
 
+if TYPE_CHECKING:
+    from .path_store import PathStore
 
-def run_simulation(inputs: InputData | dict) -> SimulationData:
+
+def run_simulation(
+    inputs: InputData | dict,
+    executor: Executor | None = None,
+    path_store: "PathStore | None" = None,
+    callback: Callable[[int, int, SimulationProfile], None] | None = None,
+    initial_state: SimulationState | None = None,
+) -> SimulationData:
     """
     Simulates the Wheel strategy for a number of price paths of the underlying asset
     assuming a Black-Scholes world.
@@ -51,17 +122,180 @@ def run_simulation(inputs: InputData | dict) -> SimulationData:
                 until the dealine. Default is False.
             save_log : boolean, optional
                 Whether or not to save a log. Default is False.
+            log_file : string, optional
+                File where the log is saved. Default is 'log.dat'.
+            log_format : string, optional
+                Format of the log, either 'text' (human-readable) or 'binary'
+                (structured event records, see `read_events`). Default is 'text'.
+            engine : string, optional
+                Simulation engine, either 'loop' (reference engine, trading paths
+                are simulated one at a time), 'vectorized' (all trading paths are
+                advanced together, one period at a time, using NumPy arrays) or
+                'numba' (the loop engine compiled with Numba and parallelized
+                over the trading paths; it saves no log, and falls back to the
+                vectorized engine, with a warning, if Numba is not installed).
+                All engines produce the same results. Default is 'loop'.
+            premium_cache : boolean, optional
+                Whether or not to look option premiums up in a table, keyed by
+                option type, spot price in cents and days to maturity, that is
+                filled lazily, instead of pricing every option. Premiums are
+                identical either way. Default is False.
+            seed : integer, optional
+                Seed of the root seed sequence from which an independent random
+                number generator is spawned for each shard of trading paths. For a
+                given seed and shard size, results do not depend on the number of
+                workers. Default is None, which means that a serial simulation draws
+                from the global NumPy random state.
+            shard_size : integer, optional
+                Maximum number of trading paths per shard. Default is 10,000.
+            n_workers : integer, optional
+                Number of worker processes among which the shards are distributed.
+                Workers are spawned, not forked, so a calling script must guard
+                its entry point with `if __name__ == "__main__"`. Default is 1.
+            chunk_size : integer, optional
+                Maximum number of trading paths generated and simulated at once
+                within a shard, which bounds the working memory. Paths are drawn in
+                sequence from the same random stream, so results do not depend on
+                the chunk size. Default is None, which means a whole shard at once.
+            keep_price_paths : boolean, optional
+                Whether or not to keep the simulated price paths in the output.
+                Default is True.
+            final_values_only : boolean, optional
+                Whether or not to keep only the money in the trading account and the
+                number of shares at the end of the trading paths, instead of their
+                values in every period. Default is False.
+            compact_output : boolean, optional
+                Whether or not to store the output in compact data types: stock
+                prices (including the final ones) as 32-bit integers in cents,
+                numbers of shares as 32-bit integers, and event counters as
+                16-bit (or 32-bit, if they may overflow) integers. A
+                `ValueError` is raised if a price or number of shares does not
+                fit. Default is False.
+            summarize : boolean, optional
+                Whether or not to accumulate a `SimulationSummary` of the trading
+                paths as they are simulated. Default is False.
+            keep_path_results : boolean, optional
+                Whether or not to keep the per-path arrays in the output. If False,
+                only the summary is returned. Default is True.
+            profile : boolean, optional
+                Whether or not to time the phases of the simulation and count the
+                options priced, lots scanned and paths completed (see
+                `SimulationProfile`). Default is False.
+            progress_every : integer, optional
+                Number of trading paths between calls of `callback`. Default is
+                None, which means after every block of trading paths.
+            target_relative_error : float, optional
+                Target relative standard error (or relative confidence interval
+                half-width, if `confidence_level` is given) of the means of the
+                `target_metrics`. If given, shards of trading paths are simulated
+                in order, in waves of `n_workers` shards, until the target is met
+                after some shard, with `number_of_trading_paths` as the maximum
+                budget. For a given seed and shard size, the number of simulated
+                paths does not depend on the number of workers. Default is None,
+                which means all paths are simulated.
+            target_metrics : tuple[str, ...], optional
+                Summary metrics (see `SimulationSummary`) whose relative errors
+                must meet the target. Default is ('final_position',).
+            confidence_level : float, optional
+                Confidence level of the normal confidence interval whose relative
+                half-width must meet the target. Default is None, which means the
+                relative standard error.
+            antithetic : boolean, optional
+                Whether or not to generate the price paths in antithetic pairs,
+                the odd paths being driven by the negated normal increments of the
+                preceding even paths. The summary then estimates the means over
+                pair averages. The number of trading paths, shard size and chunk
+                size must be even. Default is False.
+            control_variate : boolean, optional
+                Whether or not the summary estimates the means with the stock
+                price at the end of the trading paths as a control variate, whose
+                expectation is known analytically. Default is False.
+            sampler : string, optional
+                Sampler of the normal increments of the price paths, either
+                'pseudo' (pseudo-random numbers) or 'sobol' (scrambled Sobol'
+                points, through a Brownian bridge that draws the period ends
+                first and the days within the periods last). Default is 'pseudo'.
+            qmc_replicates : integer, optional
+                Number of independently scrambled Sobol' sequences among which
+                the trading paths are split, in blocks of consecutive paths. The
+                spread of the replicate estimates gives the standard errors of
+                the summary. Powers of two paths per replicate keep the balance
+                properties of the points. Default is 8.
+            sparse_days : boolean, optional
+                Whether or not to simulate only the prices on the days observed
+                by the strategy, that is, the first `covered_calls_deadline` days
+                (at most 20) and the maturity of each period, in place of every
+                trading day. The skipped days can be filled in afterwards (see
+                `fill_price_paths`). Default is False.
+            keep_state : boolean, optional
+                Whether or not to output the state of the trading paths at the
+                end of the simulation (see `SimulationState`), from which they
+                can be continued for more periods. Default is False.
+            checkpoint_dir : string, optional
+                Directory where the output of every block of trading paths is
+                saved as soon as it is simulated, together with its end state
+                and the state of the random number generator. Blocks found
+                there are loaded instead of simulated, so an interrupted
+                simulation is resumed, or a finished one extended by more
+                trading paths (with the same seed, shard size and export
+                options), by running it again. The chunk size sets how often
+                checkpoints are saved. Requires a seed. Default is None (no
+                checkpoints).
+            export_dir : string, optional
+                Directory to which the per-path arrays of the output (as reduced
+                by the output options) are written, block by block, as soon as
+                every block of trading paths is simulated, with a manifest
+                listing the blocks, so they can be read lazily (see
+                `read_export`). Combined with `keep_path_results` set to False,
+                the output is never held in memory at once. Default is None (no
+                export).
+            export_format : string, optional
+                Format of the exported files, either 'npy' (one `.npy` file per
+                field and block, which can be memory-mapped) or 'arrow' (one
+                Arrow IPC file per block, with a column per field; requires
+                PyArrow). Default is 'npy'.
+    executor : Executor, optional
+        Executor (e.g., a process pool) used to run the shards of trading paths,
+        in place of the one created according to `n_workers`. Default is None.
+    path_store : PathStore, optional
+        Persistent store from which the price paths are read, memory-mapped, in
+        place of generating them. Paths missing from the store are generated
+        and stored first. Requires a seed. Default is None.
+    callback : Callable, optional
+        Function called in the calling process as `callback(completed, total,
+        profile)` as the simulation progresses, every `progress_every` trading
+        paths (after every block of paths in a serial run, or every shard in a
+        parallel run) and on completion, where `profile` is the cumulative
+        `SimulationProfile` of the completed paths, with the elapsed wall time.
+        Default is None.
+    initial_state : SimulationState, optional
+        State of the trading paths at the end of a previous simulation (see
+        `keep_state` and `load_state`), from which they are continued for
+        `number_of_periods` more periods, on new price paths starting from the
+        stock prices of the state. The number of trading paths must match the
+        state. The money, shares, lots and event counters carry over, and the
+        periods are numbered after those of the state. Only pseudo-random
+        price paths, without a path store or a control variate, can be
+        continued. Default is None.
 
     Returns
     -------
     SimulationData
         Output data generated by the simulation, as follows:
             stock_prices : array
-                2D Numpy array containing the stock prices generated by Monte Carlo.
+                2D Numpy array containing the stock prices generated by Monte Carlo
+                (in cents, if `compact_output` is True), only on the simulated
+                days if `sparse_days` is True. Empty if `keep_price_paths` is
+                False.
+            final_stock_prices : array
+                Numpy array containing the stock prices at the end of trading paths
+                (in cents, if `compact_output` is True).
             money : array
-                2D Numpy array containing the money in the trading account.
+                2D Numpy array containing the money in the trading account (1D, at
+                the end of trading paths, if `final_values_only` is True).
             stock : array
-                2D Numpy array containing the number of shares owned by the trader.
+                2D Numpy array containing the number of shares owned by the trader
+                (1D, at the end of trading paths, if `final_values_only` is True).
             invested_money : array
                 Numpy array containing the money spent by the trader to cover the
                 assigned puts at the end of trading paths.
@@ -76,121 +310,955 @@ def run_simulation(inputs: InputData | dict) -> SimulationData:
                 Numpy array containing the total number of exercised calls.
             exercised_puts : array
                 Numpy array containing the total number of exercised puts.
+            summary : SimulationSummary | None
+                Online summary statistics of the trading paths, if `summarize` is
+                True or `target_relative_error` is given.
+            profile : SimulationProfile | None
+                Timers and counters of the phases of the simulation, if `profile`
+                is True.
+            convergence : dict | None
+                If `target_relative_error` is given, the number of simulated
+                trading paths ('paths'), whether the target was met
+                ('converged') and the achieved relative error of each target
+                metric ('relative_errors').
+            state : SimulationState | None
+                State of the trading paths at the end of the simulation, if
+                `keep_state` is True.
     """
     inputs = (
         inputs if isinstance(inputs, InputData) else InputData.model_validate(inputs)
     )
 
-    money = zeros((inputs.number_of_trading_paths, inputs.number_of_periods))
-    money[:, 0] = inputs.initial_money
-    stock = zeros((inputs.number_of_trading_paths, inputs.number_of_periods), int)
-    missed_trades = zeros(inputs.number_of_trading_paths, int)
-    open_calls = zeros(inputs.number_of_trading_paths, int)
-    open_puts = zeros(inputs.number_of_trading_paths, int)
-    exercised_calls = zeros(inputs.number_of_trading_paths, int)
-    exercised_puts = zeros(inputs.number_of_trading_paths, int)
-    invested_money = full(inputs.number_of_trading_paths, inputs.initial_money)
-    minimum_price = (
-        inputs.initial_stock_price * inputs.minimum_price_factor
-        if inputs.initial_stock_price * inputs.minimum_price_factor > 0.01
-        else 0.01
+    inputs = _get_available_engine(inputs)
+
+    if initial_state is not None:
+        if initial_state.money.size != inputs.number_of_trading_paths:
+            raise ValueError("Number of trading paths must match the initial state!")
+        elif inputs.sampler == "sobol" or path_store is not None:
+            raise ValueError("Only pseudo-random price paths can be continued!")
+        elif inputs.control_variate:
+            raise ValueError(
+                "A control variate is not available when continuing a simulation!"
+            )
+
+    if inputs.checkpoint_dir is not None:
+        _open_checkpoints(inputs, initial_state)
+
+    if inputs.export_dir is not None:
+        _open_export(inputs)
+
+    if inputs.save_log:
+        if executor is not None:
+            raise ValueError("A log can only be saved by a single worker!")
+
+        if inputs.log_format == "text":
+            with open(inputs.log_file, "w") as f:
+                f.write("-------- LOG --------\n\n")
+        else:
+            open(inputs.log_file, "wb").close()
+
+    start = perf_counter()
+    paths_file = None if path_store is None else path_store.get(inputs)
+    progress = (
+        None
+        if callback is None
+        else _ProgressTracker(
+            callback, inputs.number_of_trading_paths, inputs.progress_every
+        ).advance
     )
 
-    stock_prices = _gen_price_paths(
-        inputs.initial_stock_price,
-        inputs.risk_free_rate,
-        inputs.volatility,
-        inputs.number_of_periods,
-        inputs.number_of_trading_paths,
+    if inputs.target_relative_error is None:
+        result = _concatenate_results(
+            _map_shards(
+                _simulate_shard,
+                inputs,
+                executor,
+                paths_file=paths_file,
+                progress=progress,
+                initial_state=initial_state,
+            )
+        )
+    elif executor is None and inputs.n_workers > 1:
+        with _get_process_pool(inputs.n_workers) as pool:
+            result = _simulate_adaptive(
+                inputs, pool, paths_file, progress, initial_state
+            )
+    else:
+        result = _simulate_adaptive(
+            inputs, executor, paths_file, progress, initial_state
+        )
+
+    if inputs.export_dir is not None:
+        _close_export(
+            inputs,
+            (
+                inputs.number_of_trading_paths
+                if result.convergence is None
+                else result.convergence["paths"]
+            ),
+            0 if initial_state is None else initial_state.periods,
+        )
+
+    if result.profile is not None:
+        result.profile.wall_time = perf_counter() - start
+
+    return result
+
+
+def _map_shards(
+    function: Callable,
+    inputs: InputData,
+    executor: Executor | None,
+    *args,
+    paths_file: str | None = None,
+    progress: Callable[[int, SimulationProfile | None], None] | None = None,
+    shards: range | None = None,
+    initial_state: SimulationState | None = None,
+) -> list:
+    """
+    Applies a function to every shard of trading paths, either serially, in a
+    process pool with `n_workers` workers, or in a given executor.
+
+    Parameters
+    ----------
+    function : Callable
+        Function called as `function(*args, inputs, shard, first_path, npaths,
+        entropy, paths_file)`, or with the state of the trading paths of the
+        shard as an extra argument if `initial_state` is given; see
+        `_simulate_shard`.
+    inputs : InputData
+        Inputs used in the simulation.
+    executor : Executor | None
+        Executor used to run the shards. If None, a process pool is created when
+        `n_workers` is greater than one.
+    *args
+        Leading arguments passed to the function for every shard.
+    paths_file : str | None, optional
+        File of stored price paths read by the shards instead of generating
+        them. Default is None.
+    progress : Callable | None, optional
+        Function called as `progress(npaths, profile)` as trading paths are
+        completed: passed on to the function in a serial run, which then calls
+        it after every block of paths, or called in this process after every
+        shard in a parallel run. Default is None.
+    shards : range | None, optional
+        Indices of the shards to run. Default is None, which means all shards.
+    initial_state : SimulationState | None, optional
+        State from which the trading paths are continued, sliced by shard, so
+        that each shard receives only the state of its paths. Default is None.
+
+    Returns
+    -------
+    list
+        Values returned by the function, in shard order.
+    """
+    # Without a seed, a serial run draws from the global NumPy random state,
+    # whereas a parallel run needs independent streams, and Sobol' points need
+    # scrambles, from fresh entropy
+    entropy = (
+        SeedSequence().entropy
+        if inputs.seed is None
+        and (executor is not None or inputs.n_workers > 1 or inputs.sampler == "sobol")
+        else inputs.seed
+    )
+    bounds = _get_shards(inputs)
+    indices = range(len(bounds)) if shards is None else shards
+    shards = [bounds[shard] for shard in indices]
+    args = (
+        *(repeat(arg) for arg in args),
+        repeat(inputs),
+        indices,
+        [start for start, _ in shards],
+        [stop - start for start, stop in shards],
+        repeat(entropy),
+        repeat(paths_file),
     )
 
-    if inputs.save_log:
-        with open("log.dat", "w") as f:
-            f.write("-------- LOG --------\n\n")
+    if initial_state is not None:
+        args = (
+            *args,
+            [
+                _slice_state(initial_state, start, stop - start)
+                for start, stop in shards
+            ],
+        )
 
-    for i in range(inputs.number_of_trading_paths):
-        written_call = written_put = False
-        purchase_price = []
+    if executor is not None:
+        return _collect_shards(executor.map(function, *args), shards, progress)
+    elif inputs.n_workers > 1:
+        with _get_process_pool(inputs.n_workers) as pool:
+            return _collect_shards(pool.map(function, *args), shards, progress)
+
+    if progress is not None:
+        function = partial(function, progress=progress)
+
+    return list(map(function, *args))
+
+
+def _collect_shards(
+    results: Iterator,
+    shards: list[tuple[int, int]],
+    progress: Callable[[int, SimulationProfile | None], None] | None,
+) -> list:
+    """
+    Collects the results of the shards as they are completed, reporting the
+    progress after every shard.
+    """
+    if progress is None:
+        return list(results)
+
+    collected = []
+
+    for (start, stop), result in zip(shards, results):
+        collected.append(result)
+        progress(stop - start, result.profile)
+
+    return collected
+
+
+def _simulate_adaptive(
+    inputs: InputData,
+    executor: Executor | None,
+    paths_file: str | None = None,
+    progress: Callable[[int, SimulationProfile | None], None] | None = None,
+    initial_state: SimulationState | None = None,
+) -> SimulationData:
+    """
+    Simulates shards of trading paths, in order and in waves of `n_workers`
+    shards, until the relative errors of the means of the target metrics meet
+    the target. Convergence is checked after every shard, in shard order, so
+    the shards of a wave past the one meeting the target are discarded.
+
+    Parameters
+    ----------
+    inputs : InputData
+        Inputs used in the simulation.
+    executor : Executor | None
+        Executor used to run the shards. If None, shards are run serially.
+    paths_file : str | None, optional
+        File of stored price paths read by the shards instead of generating
+        them. Default is None.
+    progress : Callable | None, optional
+        Progress function (see `_map_shards`). Default is None.
+    initial_state : SimulationState | None, optional
+        State from which the trading paths are continued. Default is None.
+
+    Returns
+    -------
+    SimulationData
+        Output data generated by the simulation of the shards used, with the
+        convergence report.
+    """
+    nshards = len(_get_shards(inputs))
+    wave = 1 if executor is None else inputs.n_workers
+    summary = _get_summary(inputs)
+    results = []
+    errors = {}
+    converged = False
+
+    for first_shard in range(0, nshards, wave):
+        for result in _map_shards(
+            _simulate_shard,
+            inputs,
+            executor,
+            paths_file=paths_file,
+            progress=progress,
+            shards=range(first_shard, min(first_shard + wave, nshards)),
+            initial_state=initial_state,
+        ):
+            results.append(result)
+            summary.merge(result.summary)
+            errors = {
+                metric: summary.relative_error(metric, inputs.confidence_level)
+                for metric in inputs.target_metrics
+            }
+
+            if max(errors.values()) <= inputs.target_relative_error:
+                converged = True
+                break
+
+        if converged:
+            break
+
+    result = _concatenate_results(results)
+    result.convergence = {
+        "paths": summary.count,
+        "converged": converged,
+        "relative_errors": errors,
+    }
+
+    return result
+
+
+def _simulate_shard(
+    inputs: InputData,
+    shard: int,
+    first_path: int,
+    npaths: int,
+    entropy: int | None,
+    paths_file: str | None = None,
+    initial_state: SimulationState | None = None,
+    progress: Callable[[int, SimulationProfile | None], None] | None = None,
+) -> SimulationData:
+    """
+    Generates the price paths of a shard of trading paths and simulates the
+    Wheel strategy on them, in blocks of at most `chunk_size` paths drawn in
+    sequence from the random number generator of the shard. With checkpoints,
+    every block is saved once simulated, and the blocks saved before are
+    loaded instead. With an export directory, every block is exported once
+    simulated.
+
+    Parameters
+    ----------
+    inputs : InputData
+        Inputs used in the simulation.
+    shard : int
+        Index of the shard.
+    first_path : int
+        Index of the first trading path of the shard in the whole simulation.
+    npaths : int
+        Number of trading paths in the shard.
+    entropy : int | None
+        Entropy of the seed sequence from which the random number generator of
+        the shard is spawned. If None, the global NumPy random state is used.
+    paths_file : str | None, optional
+        File of stored price paths (see `PathStore`) read instead of generating
+        them. Default is None.
+    initial_state : SimulationState | None, optional
+        State from which the trading paths of the shard are continued. Default
+        is None.
+    progress : Callable | None, optional
+        Function called as `progress(npaths, profile)` after every block of
+        trading paths, with the number of paths and the profile of the block.
+        Default is None.
+
+    Returns
+    -------
+    SimulationData
+        Output data generated by the simulation of the shard.
+    """
+    summary = (
+        _get_summary(inputs)
+        if inputs.summarize or inputs.target_relative_error is not None
+        else None
+    )
+    recorder = (
+        EventRecorder(inputs.log_file, inputs.log_format) if inputs.save_log else None
+    )
+    cache = _get_premium_cache(inputs)
+    checkpoints = (
+        None if inputs.checkpoint_dir is None else _ShardCheckpoints(inputs, shard)
+    )
+    profile = SimulationProfile() if inputs.profile else None
+    block_profile = None
+    tic = perf_counter()
+    results = []
+
+    for start, stock_prices in _iter_price_chunks(
+        inputs,
+        shard,
+        first_path,
+        npaths,
+        entropy,
+        paths_file,
+        initial_state,
+        checkpoints,
+    ):
+        if profile is not None:
+            # The block was generated (or loaded) since the end of the previous
+            # one
+            block_profile = SimulationProfile()
+            block_profile.timers["path_generation"] = perf_counter() - tic
+
+        if stock_prices is None:
+            # The block was saved by a previous run
+            result = checkpoints.loaded.pop(start)
+            nchunk = result.state.money.size
+
+            if summary is not None:
+                summary.update(_get_state_output(result.state), first_path + start)
+        else:
+            nchunk = stock_prices.shape[0]
+            state = (
+                None
+                if initial_state is None
+                else _slice_state(initial_state, start, nchunk)
+            )
+
+            if recorder is not None and state is not None:
+                # The lots carried over are logged, so the log renders on its own
+                recorder.record_lots(first_path + start, state.periods, state.lots)
+
+            result = _simulate_chunk(
+                inputs,
+                stock_prices,
+                first_path + start,
+                recorder,
+                cache,
+                block_profile,
+                state,
+            )
+
+            if recorder is not None:
+                if block_profile is not None:
+                    block_profile.start()
+
+                recorder.flush()
+
+                if block_profile is not None:
+                    block_profile.lap("logging")
+
+            if summary is not None:
+                summary.update(result, first_path + start)
+
+            result = _reduce_result(inputs, result)
+
+            if inputs.export_dir is not None:
+                if block_profile is not None:
+                    block_profile.start()
+
+                _export_block(inputs, first_path + start, result)
+
+                if block_profile is not None:
+                    block_profile.lap("export")
+
+                if not inputs.keep_path_results:
+                    result = SimulationData(state=result.state)
+
+            if checkpoints is not None:
+                checkpoints.save(start, result)
+
+        if not inputs.keep_state:
+            result.state = None
+
+        results.append(result)
+
+        if block_profile is not None:
+            block_profile.counts["paths_completed"] = nchunk
+            block_profile.wall_time = perf_counter() - tic
+            profile.merge(block_profile)
+
+        if progress is not None:
+            progress(nchunk, block_profile)
+
+        tic = perf_counter()
+
+    result = _concatenate_results(results)
+    result.summary = summary
+    result.profile = profile
+
+    return result
+
+
+def _iter_price_chunks(
+    inputs: InputData,
+    shard: int,
+    first_path: int,
+    npaths: int,
+    entropy: int | None,
+    paths_file: str | None = None,
+    initial_state: SimulationState | None = None,
+    checkpoints: _ShardCheckpoints | None = None,
+) -> Iterator[tuple[int, ndarray | None]]:
+    """
+    Generates the price paths of a shard in blocks of at most `chunk_size`
+    paths, drawn in sequence from the random number generator of the shard, or
+    reads them lazily, block by block, from a file of stored price paths.
+
+    Parameters
+    ----------
+    inputs : InputData
+        Inputs used in the simulation.
+    shard : int
+        Index of the shard.
+    first_path : int
+        Index of the first trading path of the shard in the whole simulation.
+    npaths : int
+        Number of trading paths in the shard.
+    entropy : int | None
+        Entropy of the root seed sequence. If None, the global NumPy random
+        state is used.
+    paths_file : str | None, optional
+        File of stored price paths, memory-mapped and read without copying.
+        Default is None.
+    initial_state : SimulationState | None, optional
+        State of the trading paths of the shard, whose stock prices the price
+        paths continue. Default is None.
+    checkpoints : _ShardCheckpoints | None, optional
+        Checkpoints of the shard. Saved blocks are loaded instead of generated,
+        and the random number generator is restored to its state after them.
+        Default is None.
+
+    Yields
+    ------
+    tuple[int, ndarray | None]
+        Index of the first trading path of the block within the shard and the
+        simulated price paths of the block, or None if the block was loaded
+        from the checkpoints.
+    """
+    chunk_size = npaths if inputs.chunk_size is None else inputs.chunk_size
+    stored = normals = rng = None
+
+    if paths_file is not None:
+        stored = load(paths_file, mmap_mode="r")
+    elif inputs.sampler == "sobol":
+        normals = _SobolNormals(
+            inputs.number_of_periods * _DAYS_PER_PERIOD - 1,
+            entropy,
+            _get_replicate_size(inputs),
+        )
+    else:
+        rng = _get_rng(
+            entropy, shard, 0 if initial_state is None else initial_state.periods
+        )
+
+    if checkpoints is not None:
+        checkpoints.rng = rng
+
+    for start in range(0, npaths, chunk_size):
+        n = min(chunk_size, npaths - start)
+
+        if checkpoints is not None and checkpoints.restore(start, n):
+            yield start, None
+        elif stored is not None:
+            yield start, stored[first_path + start : first_path + start + n]
+        elif normals is not None:
+            yield start, _gen_qmc_price_paths(
+                inputs.initial_stock_price,
+                inputs.risk_free_rate,
+                inputs.volatility,
+                inputs.number_of_periods,
+                first_path + start,
+                n,
+                normals,
+            )
+        else:
+            yield start, _gen_price_paths(
+                (
+                    inputs.initial_stock_price
+                    if initial_state is None
+                    else initial_state.stock_prices[start : start + n]
+                ),
+                inputs.risk_free_rate,
+                inputs.volatility,
+                inputs.number_of_periods,
+                n,
+                rng,
+                inputs.antithetic,
+                _get_observed_days(inputs),
+                initial_state is not None,
+            )
+
+
+def _simulate_chunk(
+    inputs: InputData,
+    stock_prices: ndarray,
+    first_path: int,
+    recorder: EventRecorder | None = None,
+    cache: PremiumCache | None = None,
+    profile: SimulationProfile | None = None,
+    state: SimulationState | None = None,
+) -> SimulationData:
+    """
+    Simulates the Wheel strategy on a block of price paths with the engine
+    selected in the inputs.
+
+    Parameters
+    ----------
+    inputs : InputData
+        Inputs used in the simulation.
+    stock_prices : ndarray
+        Simulated price paths.
+    first_path : int
+        Index of the first trading path of the block in the whole simulation.
+    recorder : EventRecorder | None, optional
+        Recorder of the trading events. Default is None (no log).
+    cache : PremiumCache | None, optional
+        Table of premiums looked up instead of pricing each option. Default is
+        None (no table).
+    profile : SimulationProfile | None, optional
+        Profile whose timers and counters are updated. Default is None (no
+        profiling).
+    state : SimulationState | None, optional
+        State from which the trading paths of the block are continued. Default
+        is None.
+
+    Returns
+    -------
+    SimulationData
+        Output data generated by the simulation of the block.
+    """
+    if inputs.engine == "vectorized":
+        return _simulate_vectorized(
+            inputs, stock_prices, first_path, recorder, cache, profile, state
+        )
+    elif inputs.engine == "numba":
+        return _simulate_compiled(inputs, stock_prices, profile, state)
+
+    return _simulate_loop(
+        inputs, stock_prices, first_path, recorder, cache, profile, state
+    )
+
+
+def _reduce_result(inputs: InputData, result: SimulationData) -> SimulationData:
+    """
+    Drops or compacts the output of a block of trading paths according to the
+    output options, so that the full block can be released. The per-path arrays
+    of an exported block are kept, and dropped once exported.
+
+    Parameters
+    ----------
+    inputs : InputData
+        Inputs used in the simulation.
+    result : SimulationData
+        Output of the block of trading paths.
+
+    Returns
+    -------
+    SimulationData
+        Reduced output of the block of trading paths.
+    """
+    if not (inputs.keep_state or inputs.checkpoint_dir is not None):
+        result.state = None
+
+    if not inputs.keep_path_results and inputs.export_dir is None:
+        return SimulationData(state=result.state)
+
+    if not inputs.keep_price_paths:
+        result.stock_prices = array([])
+
+    if inputs.final_values_only:
+        result.money = result.money[:, -1].copy()
+        result.stock = result.stock[:, -1].copy()
+
+    if inputs.compact_output:
+        counter_dtype = int16 if inputs.number_of_periods <= iinfo(int16).max else int32
+        result.stock_prices = _to_int32(
+            rint(result.stock_prices * 100.0), "Stock prices in cents"
+        )
+        result.final_stock_prices = _to_int32(
+            rint(result.final_stock_prices * 100.0), "Stock prices in cents"
+        )
+        result.stock = _to_int32(result.stock, "Numbers of shares")
+        result.missed_trades = result.missed_trades.astype(counter_dtype)
+        result.open_puts = result.open_puts.astype(counter_dtype)
+        result.exercised_puts = result.exercised_puts.astype(counter_dtype)
+        result.open_calls = result.open_calls.astype(int32)
+        result.exercised_calls = result.exercised_calls.astype(int32)
+
+    return result
+
+
+def _to_int32(values: ndarray, name: str) -> ndarray:
+    """
+    Returns values converted to 32-bit integers, checking that they fit, so
+    that compact output never wraps around silently.
+
+    Parameters
+    ----------
+    values : ndarray
+        Integral values.
+    name : str
+        Name of the values, reported if they do not fit.
+
+    Returns
+    -------
+    ndarray
+        Values as 32-bit integers.
+    """
+    if abs(values).max(initial=0) > iinfo(int32).max:
+        raise ValueError(
+            "%s exceed the range of 32-bit integers of compact output!" % name
+        )
+
+    return values.astype(int32)
+
+
+def _get_available_engine(inputs: InputData) -> InputData:
+    """
+    Returns the inputs with the 'numba' engine replaced by the 'vectorized'
+    one, which gives the same results, with a warning, if Numba is not
+    installed: the kernel of the 'numba' engine would otherwise run as plain
+    Python, much slower than any other engine.
+
+    Parameters
+    ----------
+    inputs : InputData
+        Inputs used in the simulation.
+
+    Returns
+    -------
+    InputData
+        Inputs with an available engine.
+    """
+    if inputs.engine != "numba" or NUMBA_AVAILABLE:
+        return inputs
+
+    warn(
+        "Numba is not installed, so the 'vectorized' engine is used in place of "
+        "the 'numba' one.",
+        stacklevel=3,
+    )
+
+    return inputs.model_copy(update={"engine": "vectorized"})
+
+
+def _get_process_pool(max_workers: int | None) -> ProcessPoolExecutor:
+    """
+    Returns a pool of worker processes started with the 'spawn' method rather
+    than forked: the threads of Numba's threading layer, started by the 'numba'
+    engine in this process, do not survive a fork, which hangs the interpreter
+    at exit.
+
+    Parameters
+    ----------
+    max_workers : int | None
+        Number of worker processes. If None, the number of CPUs.
+
+    Returns
+    -------
+    ProcessPoolExecutor
+        Pool of worker processes.
+    """
+    return ProcessPoolExecutor(max_workers, mp_context=get_context("spawn"))
+
+
+def _get_shards(inputs: InputData) -> list[tuple[int, int]]:
+    """
+    Splits the trading paths into shards of at most `shard_size` paths.
+
+    Parameters
+    ----------
+    inputs : InputData
+        Inputs used in the simulation.
+
+    Returns
+    -------
+    list[tuple[int, int]]
+        Index of the first trading path and index past the last trading path of
+        each shard.
+    """
+    return [
+        (start, min(start + inputs.shard_size, inputs.number_of_trading_paths))
+        for start in range(0, inputs.number_of_trading_paths, inputs.shard_size)
+    ]
+
+
+def _get_rng(entropy: int | None, shard: int, periods: int = 0) -> Generator | None:
+    """
+    Returns the random number generator of a shard.
+
+    Parameters
+    ----------
+    entropy : int | None
+        Entropy of the root seed sequence. If None, no generator is returned and
+        the global NumPy random state is used instead.
+    shard : int
+        Index of the shard.
+    periods : int, optional
+        Number of trading periods already simulated, when the trading paths are
+        continued, so that the continuation draws from a stream of its own.
+        Default is zero.
+
+    Returns
+    -------
+    Generator | None
+        Independent random number generator of the shard, spawned from the root
+        seed sequence.
+    """
+    if entropy is None:
+        return None
+
+    return default_rng(
+        SeedSequence(entropy, spawn_key=(shard,) if periods == 0 else (shard, periods))
+    )
+
+
+def _concatenate_results(results: list[SimulationData]) -> SimulationData:
+    """
+    Concatenates the outputs of the simulated shards, in order.
+
+    Parameters
+    ----------
+    results : list[SimulationData]
+        Outputs of the shards.
+
+    Returns
+    -------
+    SimulationData
+        Output of the whole simulation.
+    """
+    if len(results) == 1:
+        return results[0]
+
+    summaries = [result.summary for result in results if result.summary is not None]
+    profiles = [result.profile for result in results if result.profile is not None]
+    states = [result.state for result in results if result.state is not None]
+
+    for summary in summaries[1:]:
+        summaries[0].merge(summary)
 
-        if inputs.save_log:
-            strlog = "TRADING PATH #%d\n" % i
+    for profile in profiles[1:]:
+        profiles[0].merge(profile)
+
+    return SimulationData(
+        summary=summaries[0] if len(summaries) > 0 else None,
+        profile=profiles[0] if len(profiles) > 0 else None,
+        state=_concatenate_states(states) if len(states) > 0 else None,
+        **{
+            field: concatenate([getattr(result, field) for result in results])
+            for field in SimulationData.model_fields
+            if field not in ("summary", "profile", "convergence", "state")
+        },
+    )
+
+
+def _simulate_loop(
+    inputs: InputData,
+    stock_prices: ndarray,
+    first_path: int = 0,
+    recorder: EventRecorder | None = None,
+    cache: PremiumCache | None = None,
+    profile: SimulationProfile | None = None,
+    state: SimulationState | None = None,
+) -> SimulationData:
+    """
+    Simulates the Wheel strategy path by path and period by period. This is the
+    reference engine.
+
+    Parameters
+    ----------
+    inputs : InputData
+        Inputs used in the simulation.
+    stock_prices : ndarray
+        Simulated price paths.
+    first_path : int, optional
+        Index of the first trading path in the whole simulation, used to number
+        the trading paths in the log. Default is zero.
+    recorder : EventRecorder | None, optional
+        Recorder of the trading events. Default is None (no log).
+    cache : PremiumCache | None, optional
+        Table of premiums looked up instead of pricing each option. Default is
+        None (no table).
+    profile : SimulationProfile | None, optional
+        Profile whose timers and counters are updated. Default is None (no
+        profiling).
+    state : SimulationState | None, optional
+        State from which the trading paths are continued, the price paths
+        starting on the day after its stock prices. Default is None (trading
+        paths start from the inputs).
+
+    Returns
+    -------
+    SimulationData
+        Output data generated by the simulation, with the end state of the
+        trading paths.
+    """
+    npaths = stock_prices.shape[0]
+
+    if state is None:
+        state = _get_initial_state(inputs, npaths)
+
+    first_period = state.periods
+    money = zeros((npaths, inputs.number_of_periods))
+    money[:, 0] = state.money
+    stock = zeros((npaths, inputs.number_of_periods), int)
+    stock[:, 0] = state.stock
+    missed_trades = state.missed_trades.astype(int)
+    open_calls = state.open_calls.astype(int)
+    open_puts = state.open_puts.astype(int)
+    exercised_calls = state.exercised_calls.astype(int)
+    exercised_puts = state.exercised_puts.astype(int)
+    invested_money = state.invested_money.astype(float)
+    minimum_price = _get_minimum_price(inputs)
+    width = stock_prices.shape[1] // inputs.number_of_periods
+
+    lots = []
+
+    for i in range(npaths):
+        written_call = written_put = False
+        purchase_price = [x for x in state.lots[i] if x > 0.0]
 
         for j in range(inputs.number_of_periods):
             missed = True
             write_put = False
-            m = (j + 1) * _DAYS_PER_PERIOD - 1
-            day_1 = m - _DAYS_PER_PERIOD + 1
-
-            if inputs.save_log:
-                strlog += "   PERIOD #%d\n" % j
-                strlog += "      Spot price at day 1: %.2f\n" % stock_prices[i, day_1]
+            # Columns of the first day and of the maturity of the period, and
+            # the day of the maturity counted as the columns of the other days
+            m = (j + 1) * width - 1
+            day_1 = m - width + 1
+            maturity = day_1 + _DAYS_PER_PERIOD - 1
 
             if j > 0:
                 money[i, j] = money[i, j - 1]
                 stock[i, j] = stock[i, j - 1]
 
+            if profile is not None:
+                profile.start()
+
             # Open new call or put position
             if len(purchase_price) > 0:
                 xc = [0.0 for x in purchase_price]
                 write_put = False
 
-                for l in range(day_1, m):
-                    if 0.0 not in xc:
-                        break
-                    elif (l - day_1) == inputs.covered_calls_deadline:
-                        if inputs.write_puts_if_no_calls and not written_call:
-                            write_put = True
+                # Strikes and premiums of the whole search window at once; each
+                # lot is covered on the first day whose strike plus premium
+                # exceeds its purchase price
+                ndays = min(inputs.covered_calls_deadline, _DAYS_PER_PERIOD - 1)
+                s = stock_prices[i, day_1 : day_1 + ndays]
+                xctmp = round((s + s * inputs.call_strike_factor), 2)
+                days_to_maturity = maturity - arange(day_1, day_1 + ndays)
+                c = (
+                    cache.lookup("call", s, days_to_maturity)
+                    if cache is not None
+                    else price_options(
+                        "call",
+                        s,
+                        xctmp,
+                        inputs.risk_free_rate,
+                        inputs.volatility,
+                        days_to_maturity / 252.0,
+                    )
+                )
+                call_day = _get_first_call_days(xctmp + c, purchase_price)
+
+                if profile is not None:
+                    profile.counts["options_priced"] += ndays
+                    profile.counts["lots_scanned"] += len(purchase_price)
 
+                for k in argsort(call_day, kind="stable"):
+                    d = call_day[k]
+
+                    if d == ndays:
                         break
-                    else:
-                        xctmp = round(
-                            (
-                                stock_prices[i, l]
-                                + stock_prices[i, l] * inputs.call_strike_factor
-                            ),
-                            2,
-                        )
-                        t2m = (m - l) / 252.0
-                        c = _get_option_price(
-                            "call",
-                            stock_prices[i, l],
-                            xctmp,
-                            inputs.risk_free_rate,
-                            inputs.volatility,
-                            t2m,
+
+                    xc[k] = xctmp[d]
+                    money[i, j] += c[d] * inputs.number_of_options
+                    open_calls[i] += 1
+                    missed = False
+                    written_call = True
+
+                    if recorder is not None:
+                        recorder.record(
+                            CALL_WRITTEN,
+                            first_path + i,
+                            first_period + j,
+                            spot=s[d],
+                            maturity_spot=stock_prices[i, m],
+                            days_to_maturity=days_to_maturity[d],
+                            strike=xc[k],
+                            premium=c[d],
+                            purchase_price=purchase_price[k],
                         )
 
-                        if c < 0.01:
-                            c = 0.01
-
-                    for k in range(len(purchase_price)):
-                        if xc[k] > 0.0:
-                            continue
-
-                        if (xctmp + c) > purchase_price[k]:
-                            xc[k] = xctmp
-                            money[i, j] += c * inputs.number_of_options
-                            open_calls[i] += 1
-
-                            if missed:
-                                missed = False
-
-                            if not written_call:
-                                written_call = True
-
-                            if inputs.save_log:
-                                strlog += "      ------\n"
-                                strlog += "      Covered call is written!\n"
-                                strlog += (
-                                    "         Spot price: %.2f\n" % stock_prices[i, l]
-                                )
-                                strlog += "         Days to maturity: %d\n" % (m - l)
-                                strlog += "         Call strike: %.2f\n" % xc[k]
-                                strlog += "         Call premium: %.2f\n" % c
-                                strlog += (
-                                    "         Stock purchase price: %.2f\n"
-                                    % purchase_price[k]
-                                )
+                if (
+                    inputs.write_puts_if_no_calls
+                    and not written_call
+                    and ndays < _DAYS_PER_PERIOD - 1
+                ):
+                    write_put = True
+
+                if profile is not None:
+                    profile.lap("call_writing")
 
             if len(purchase_price) == 0 or write_put:
                 if write_put:
@@ -199,7 +1267,7 @@ def run_simulation(inputs: InputData | dict) -> SimulationData:
                 else:
                     day_open_put = day_1
 
-                t2m = (m - day_open_put) / 252.0
+                t2m = (maturity - day_open_put) / 252.0
                 xp = round(
                     (
                         stock_prices[i, day_open_put]
@@ -209,38 +1277,49 @@ def run_simulation(inputs: InputData | dict) -> SimulationData:
                 )
 
                 if xp >= minimum_price:
-                    p = _get_option_price(
-                        "put",
-                        stock_prices[i, day_open_put],
-                        xp,
-                        inputs.risk_free_rate,
-                        inputs.volatility,
-                        t2m,
-                    )
-
-                    if p < 0.01:
-                        p = 0.01
+                    if cache is not None:
+                        p = cache.premium(
+                            "put",
+                            stock_prices[i, day_open_put],
+                            maturity - day_open_put,
+                        )
+                    else:
+                        p = _get_option_price(
+                            "put",
+                            stock_prices[i, day_open_put],
+                            xp,
+                            inputs.risk_free_rate,
+                            inputs.volatility,
+                            t2m,
+                        )
 
                     money[i, j] += p * inputs.number_of_options
                     open_puts[i] += 1
                     written_put = True
 
+                    if profile is not None:
+                        profile.counts["options_priced"] += 1
+
                     if missed:
                         missed = False
 
-                    if inputs.save_log:
-                        strlog += "      ------\n"
-                        strlog += "      Cash-secured put is written!\n"
-                        strlog += "         Days to maturity: %d\n" % (m - day_open_put)
-                        strlog += "         Put strike: %.2f\n" % xp
-                        strlog += "         Put premium: %.2f\n" % p
+                    if recorder is not None:
+                        recorder.record(
+                            PUT_WRITTEN,
+                            first_path + i,
+                            first_period + j,
+                            spot=stock_prices[i, day_open_put],
+                            maturity_spot=stock_prices[i, m],
+                            days_to_maturity=maturity - day_open_put,
+                            strike=xp,
+                            premium=p,
+                        )
+
+                if profile is not None:
+                    profile.lap("put_writing")
             # ---
 
             # Check if an open call or put is exercised
-            if inputs.save_log:
-                strlog += "      ------\n"
-                strlog += "      Spot price at maturity: %.2f\n" % stock_prices[i, m]
-
             if written_call:
                 for k in range(len(purchase_price)):
                     if xc[k] > 0.0 and xc[k] <= stock_prices[i, m]:
@@ -248,13 +1327,14 @@ def run_simulation(inputs: InputData | dict) -> SimulationData:
                         stock[i, j] -= inputs.number_of_options
                         exercised_calls[i] += 1
 
-                        if inputs.save_log:
-                            strlog += "      ------\n"
-                            strlog += "      Call was exercised!\n"
-                            strlog += "         Stock sale price: %.2f\n" % xc[k]
-                            strlog += (
-                                "         Stock purchase price: %.2f\n"
-                                % purchase_price[k]
+                        if recorder is not None:
+                            recorder.record(
+                                CALL_EXERCISED,
+                                first_path + i,
+                                first_period + j,
+                                maturity_spot=stock_prices[i, m],
+                                strike=xc[k],
+                                purchase_price=purchase_price[k],
                             )
 
                         purchase_price[k] = 0.0
@@ -270,75 +1350,649 @@ def run_simulation(inputs: InputData | dict) -> SimulationData:
 
                     purchase_price.append(xp)
 
-                    if inputs.save_log:
-                        strlog += "      ------\n"
-                        strlog += "      Put was exercised!\n"
-                        strlog += "         Stock purchase price: %.2f\n" % xp
+                    if recorder is not None:
+                        recorder.record(
+                            PUT_EXERCISED,
+                            first_path + i,
+                            first_period + j,
+                            maturity_spot=stock_prices[i, m],
+                            strike=xp,
+                            money=money[i, j],
+                        )
 
                     if money[i, j] < 0.0:
                         invested_money[i] -= money[i, j]
-
-                        if inputs.save_log:
-                            strlog += "         Money from pocket: %.2f\n" % (
-                                -money[i, j]
-                            )
-
                         money[i, j] = 0.0
 
                 written_put = False
+
+            if profile is not None:
+                profile.lap("exercise")
             # ---
 
             if missed:
                 missed_trades[i] += 1
 
-                if inputs.save_log:
-                    strlog += "      ------\n"
-                    strlog += "      No trade was open!\n"
-
-            if inputs.save_log:
-                strlog += "      ------\n"
-                strlog += "      Invested money: %.2f\n" % invested_money[i]
-                strlog += "      Money in account: %.2f\n" % money[i, j]
-                strlog += "      Number of shares: %d\n" % stock[i, j]
-
-                if len(purchase_price) > 0:
-                    strlog += "      Purchase prices: %s\n" % purchase_price
-                    strlog += "      Stock price: %.2f\n" % stock_prices[i, m]
-                    strlog += "      Total stock position: %.2f\n" % (
-                        stock_prices[i, m] * stock[i, j]
+                if recorder is not None:
+                    recorder.record(
+                        MISSED_TRADE,
+                        first_path + i,
+                        first_period + j,
+                        maturity_spot=stock_prices[i, m],
+                    )
+
+            if recorder is not None:
+                recorder.record(
+                    PERIOD_SUMMARY,
+                    first_path + i,
+                    first_period + j,
+                    spot=stock_prices[i, day_1],
+                    maturity_spot=stock_prices[i, m],
+                    money=money[i, j],
+                    stock=stock[i, j],
+                    invested_money=invested_money[i],
+                )
+
+                if profile is not None:
+                    profile.lap("logging")
+
+        lots.append(purchase_price)
+
+    nlots = max((len(purchase_price) for purchase_price in lots), default=0)
+    end_lots = zeros((npaths, nlots))
+
+    for i, purchase_price in enumerate(lots):
+        end_lots[i, : len(purchase_price)] = purchase_price
+
+    return SimulationData(
+        stock_prices=stock_prices,
+        final_stock_prices=stock_prices[:, -1].copy(),
+        money=money,
+        stock=stock,
+        invested_money=invested_money,
+        missed_trades=missed_trades,
+        open_calls=open_calls,
+        open_puts=open_puts,
+        exercised_calls=exercised_calls,
+        exercised_puts=exercised_puts,
+        state=SimulationState(
+            periods=first_period + inputs.number_of_periods,
+            stock_prices=stock_prices[:, -1].copy(),
+            money=money[:, -1].copy(),
+            stock=stock[:, -1].copy(),
+            invested_money=invested_money.copy(),
+            lots=end_lots,
+            missed_trades=missed_trades.copy(),
+            open_calls=open_calls.copy(),
+            open_puts=open_puts.copy(),
+            exercised_calls=exercised_calls.copy(),
+            exercised_puts=exercised_puts.copy(),
+        ),
+    )
+
+
+def _simulate_vectorized(
+    inputs: InputData,
+    stock_prices: ndarray,
+    first_path: int = 0,
+    recorder: EventRecorder | None = None,
+    cache: PremiumCache | None = None,
+    profile: SimulationProfile | None = None,
+    state: SimulationState | None = None,
+) -> SimulationData:
+    """
+    Simulates the Wheel strategy advancing all trading paths together, one
+    period at a time, with the state of the paths held in NumPy arrays.
+
+    The purchase prices of the assigned lots are kept left-aligned in a padded
+    2D array (a zero marks an empty slot) and the per-path flags of the loop
+    engine become boolean masks. Operations are applied in the same order as
+    in the loop engine, so both engines produce identical results.
+
+    Parameters
+    ----------
+    inputs : InputData
+        Inputs used in the simulation.
+    stock_prices : ndarray
+        Simulated price paths.
+    first_path : int, optional
+        Index of the first trading path in the whole simulation, used to number
+        the trading paths in the log. Default is zero.
+    recorder : EventRecorder | None, optional
+        Recorder of the trading events. Default is None (no log).
+    cache : PremiumCache | None, optional
+        Table of premiums looked up instead of pricing each option. Default is
+        None (no table).
+    profile : SimulationProfile | None, optional
+        Profile whose timers and counters are updated. Default is None (no
+        profiling).
+    state : SimulationState | None, optional
+        State from which the trading paths are continued, the price paths
+        starting on the day after its stock prices. Default is None (trading
+        paths start from the inputs).
+
+    Returns
+    -------
+    SimulationData
+        Output data generated by the simulation, with the end state of the
+        trading paths.
+    """
+    npaths = stock_prices.shape[0]
+
+    if state is None:
+        state = _get_initial_state(inputs, npaths)
+
+    first_period = state.periods
+    money = zeros((npaths, inputs.number_of_periods))
+    money[:, 0] = state.money
+    stock = zeros((npaths, inputs.number_of_periods), int)
+    stock[:, 0] = state.stock
+    missed_trades = state.missed_trades.astype(int)
+    open_calls = state.open_calls.astype(int)
+    open_puts = state.open_puts.astype(int)
+    exercised_calls = state.exercised_calls.astype(int)
+    exercised_puts = state.exercised_puts.astype(int)
+    invested_money = state.invested_money.astype(float)
+    minimum_price = _get_minimum_price(inputs)
+    purchase_price = state.lots.astype(float)
+    nlots = (purchase_price > 0.0).sum(axis=1)
+    xp = zeros(npaths)
+    width = stock_prices.shape[1] // inputs.number_of_periods
+    # Days of the search window for covered calls
+    ndays = min(inputs.covered_calls_deadline, _DAYS_PER_PERIOD - 1)
+
+    for j in range(inputs.number_of_periods):
+        # Columns of the first day and of the maturity of the period, and the
+        # day of the maturity counted as the columns of the other days
+        m = (j + 1) * width - 1
+        day_1 = m - width + 1
+        maturity = day_1 + _DAYS_PER_PERIOD - 1
+        missed = ones(npaths, bool)
+        written_call = zeros(npaths, bool)
+        write_put = zeros(npaths, bool)
+        xc = zeros(purchase_price.shape)
+        held = purchase_price > 0.0
+        has_lots = nlots > 0
+
+        if j > 0:
+            money[:, j] = money[:, j - 1]
+            stock[:, j] = stock[:, j - 1]
+
+        if profile is not None:
+            profile.start()
+            # Counted as in the loop engine: the whole search window of every
+            # path holding lots, whatever the paths that stop searching early
+            profile.counts["options_priced"] += ndays * int(has_lots.sum())
+            profile.counts["lots_scanned"] += int(nlots.sum())
+
+        # Open new call or put position
+        searching = has_lots.copy()
+
+        for l in range(day_1, maturity):
+            searching &= (held & (xc == 0.0)).any(axis=1)
+
+            if (l - day_1) == inputs.covered_calls_deadline:
+                if inputs.write_puts_if_no_calls:
+                    write_put = searching & ~written_call
+
+                break
+            elif not searching.any():
+                break
+
+            idx = flatnonzero(searching)
+            s = stock_prices[idx, l]
+            xctmp = round((s + s * inputs.call_strike_factor), 2)
+            c = (
+                cache.lookup("call", s, maturity - l)
+                if cache is not None
+                else price_options(
+                    "call",
+                    s,
+                    xctmp,
+                    inputs.risk_free_rate,
+                    inputs.volatility,
+                    (maturity - l) / 252.0,
+                )
+            )
+
+            for k in range(purchase_price.shape[1]):
+                q = (
+                    held[idx, k]
+                    & (xc[idx, k] == 0.0)
+                    & ((xctmp + c) > purchase_price[idx, k])
+                )
+                rows = idx[q]
+                xc[rows, k] = xctmp[q]
+                money[rows, j] += c[q] * inputs.number_of_options
+                open_calls[rows] += 1
+                missed[rows] = False
+                written_call[rows] = True
+
+                if recorder is not None:
+                    recorder.record_many(
+                        CALL_WRITTEN,
+                        first_path + rows,
+                        first_period + j,
+                        spot=s[q],
+                        maturity_spot=stock_prices[rows, m],
+                        days_to_maturity=maturity - l,
+                        strike=xctmp[q],
+                        premium=c[q],
+                        purchase_price=purchase_price[rows, k],
                     )
 
-                strlog += "      Total position (money+stock): %.2f\n" % (
-                    money[i, j] + stock[i, j] * stock_prices[i, m]
+        if profile is not None:
+            profile.lap("call_writing")
+
+        written_put = zeros(npaths, bool)
+        idx = flatnonzero(~has_lots | write_put)
+
+        if idx.size > 0:
+            day_open_put = where(
+                write_put[idx], day_1 + inputs.covered_calls_deadline - 1, day_1
+            )
+            s = stock_prices[idx, day_open_put]
+            xp[idx] = round((s - s * inputs.put_strike_factor), 2)
+            q = xp[idx] >= minimum_price
+            idx, day_open_put, s = idx[q], day_open_put[q], s[q]
+            p = (
+                cache.lookup("put", s, maturity - day_open_put)
+                if cache is not None
+                else price_options(
+                    "put",
+                    s,
+                    xp[idx],
+                    inputs.risk_free_rate,
+                    inputs.volatility,
+                    (maturity - day_open_put) / 252.0,
+                )
+            )
+            money[idx, j] += p * inputs.number_of_options
+            open_puts[idx] += 1
+            written_put[idx] = True
+            missed[idx] = False
+
+            if profile is not None:
+                profile.counts["options_priced"] += idx.size
+
+            if recorder is not None:
+                recorder.record_many(
+                    PUT_WRITTEN,
+                    first_path + idx,
+                    first_period + j,
+                    spot=s,
+                    maturity_spot=stock_prices[idx, m],
+                    days_to_maturity=maturity - day_open_put,
+                    strike=xp[idx],
+                    premium=p,
+                )
+
+        if profile is not None:
+            profile.lap("put_writing")
+        # ---
+
+        # Check if an open call or put is exercised
+        if written_call.any():
+            for k in range(purchase_price.shape[1]):
+                q = written_call & (xc[:, k] > 0.0) & (xc[:, k] <= stock_prices[:, m])
+                money[q, j] += xc[q, k] * inputs.number_of_options
+                stock[q, j] -= inputs.number_of_options
+                exercised_calls[q] += 1
+
+                if recorder is not None:
+                    recorder.record_many(
+                        CALL_EXERCISED,
+                        first_path + flatnonzero(q),
+                        first_period + j,
+                        maturity_spot=stock_prices[q, m],
+                        strike=xc[q, k],
+                        purchase_price=purchase_price[q, k],
+                    )
+
+                purchase_price[q, k] = 0.0
+
+            # Keeps the remaining lots left-aligned and in their original order
+            order = argsort(purchase_price == 0.0, axis=1, kind="stable")
+            purchase_price = take_along_axis(purchase_price, order, axis=1)
+            nlots = (purchase_price > 0.0).sum(axis=1)
+
+        q = written_put & (xp >= stock_prices[:, m])
+
+        if q.any():
+            money[q, j] -= xp[q] * inputs.number_of_options
+            stock[q, j] += inputs.number_of_options
+            exercised_puts[q] += 1
+
+            if nlots[q].max() == purchase_price.shape[1]:
+                purchase_price = hstack((purchase_price, zeros((npaths, 1))))
+
+            purchase_price[q, nlots[q]] = xp[q]
+            nlots[q] += 1
+
+            if recorder is not None:
+                recorder.record_many(
+                    PUT_EXERCISED,
+                    first_path + flatnonzero(q),
+                    first_period + j,
+                    maturity_spot=stock_prices[q, m],
+                    strike=xp[q],
+                    money=money[q, j],
                 )
 
-        if inputs.save_log:
-            with open("log.dat", "a") as f:
-                f.write(strlog)
-
-        return SimulationData(
-            stock_prices=stock_prices,
-            money=money,
-            stock=stock,
-            invested_money=invested_money,
-            missed_trades=missed_trades,
-            open_calls=open_calls,
-            open_puts=open_puts,
-            exercised_calls=exercised_calls,
-            exercised_puts=exercised_puts,
+            q &= money[:, j] < 0.0
+            invested_money[q] -= money[q, j]
+            money[q, j] = 0.0
+
+        if profile is not None:
+            profile.lap("exercise")
+        # ---
+
+        missed_trades[missed] += 1
+
+        if recorder is not None:
+            recorder.record_many(
+                MISSED_TRADE,
+                first_path + flatnonzero(missed),
+                first_period + j,
+                maturity_spot=stock_prices[missed, m],
+            )
+            recorder.record_many(
+                PERIOD_SUMMARY,
+                first_path + arange(npaths),
+                first_period + j,
+                spot=stock_prices[:, day_1],
+                maturity_spot=stock_prices[:, m],
+                money=money[:, j],
+                stock=stock[:, j],
+                invested_money=invested_money,
+            )
+
+            if profile is not None:
+                profile.lap("logging")
+
+    return SimulationData(
+        stock_prices=stock_prices,
+        final_stock_prices=stock_prices[:, -1].copy(),
+        money=money,
+        stock=stock,
+        invested_money=invested_money,
+        missed_trades=missed_trades,
+        open_calls=open_calls,
+        open_puts=open_puts,
+        exercised_calls=exercised_calls,
+        exercised_puts=exercised_puts,
+        state=SimulationState(
+            periods=first_period + inputs.number_of_periods,
+            stock_prices=stock_prices[:, -1].copy(),
+            money=money[:, -1].copy(),
+            stock=stock[:, -1].copy(),
+            invested_money=invested_money.copy(),
+            lots=purchase_price[:, : nlots.max(initial=0)].copy(),
+            missed_trades=missed_trades.copy(),
+            open_calls=open_calls.copy(),
+            open_puts=open_puts.copy(),
+            exercised_calls=exercised_calls.copy(),
+            exercised_puts=exercised_puts.copy(),
+        ),
+    )
+
+
+def _simulate_compiled(
+    inputs: InputData,
+    stock_prices: ndarray,
+    profile: SimulationProfile | None = None,
+    state: SimulationState | None = None,
+) -> SimulationData:
+    """
+    Simulates the Wheel strategy with the compiled kernel of the loop engine
+    (see `kernels`), over arrays allocated beforehand. The kernel prices the
+    options inline, so no premium table is used, and records no events.
+
+    Parameters
+    ----------
+    inputs : InputData
+        Inputs used in the simulation.
+    stock_prices : ndarray
+        Simulated price paths.
+    profile : SimulationProfile | None, optional
+        Profile to which the counters are added. The phases are not timed
+        within the kernel. Default is None.
+    state : SimulationState | None, optional
+        State from which the trading paths are continued. Default is None
+        (trading paths start from the inputs).
+
+    Returns
+    -------
+    SimulationData
+        Output data generated by the simulation, with the end state of the
+        trading paths.
+    """
+    npaths = stock_prices.shape[0]
+
+    if state is None:
+        state = _get_initial_state(inputs, npaths)
+
+    money = zeros((npaths, inputs.number_of_periods))
+    money[:, 0] = state.money
+    stock = zeros((npaths, inputs.number_of_periods), int)
+    stock[:, 0] = state.stock
+    counters = {
+        field: getattr(state, field).astype(int)
+        for field in (
+            "missed_trades",
+            "open_calls",
+            "open_puts",
+            "exercised_calls",
+            "exercised_puts",
+        )
+    }
+    invested_money = state.invested_money.astype(float)
+    # At most one lot is added per period
+    lots = zeros((npaths, state.lots.shape[1] + inputs.number_of_periods))
+    lots[:, : state.lots.shape[1]] = state.lots
+    nlots = (lots > 0.0).sum(axis=1)
+    # Numbers of periods in which lots are held, and of lots held, per path
+    call_windows = zeros(npaths, int)
+    lots_scanned = zeros(npaths, int)
+
+    _run_wheel(
+        ascontiguousarray(stock_prices, float),
+        inputs.number_of_periods,
+        inputs.number_of_options,
+        inputs.risk_free_rate,
+        inputs.volatility,
+        inputs.call_strike_factor,
+        inputs.put_strike_factor,
+        inputs.covered_calls_deadline,
+        inputs.write_puts_if_no_calls,
+        _get_minimum_price(inputs),
+        money,
+        stock,
+        invested_money,
+        lots,
+        nlots,
+        counters["missed_trades"],
+        counters["open_calls"],
+        counters["open_puts"],
+        counters["exercised_calls"],
+        counters["exercised_puts"],
+        call_windows,
+        lots_scanned,
+    )
+
+    if profile is not None:
+        profile.counts["options_priced"] += int(
+            min(inputs.covered_calls_deadline, _DAYS_PER_PERIOD - 1)
+            * call_windows.sum()
+            + (counters["open_puts"] - state.open_puts).sum()
+        )
+        profile.counts["lots_scanned"] += int(lots_scanned.sum())
+
+    return SimulationData(
+        stock_prices=stock_prices,
+        final_stock_prices=stock_prices[:, -1].copy(),
+        money=money,
+        stock=stock,
+        invested_money=invested_money,
+        **counters,
+        state=SimulationState(
+            periods=state.periods + inputs.number_of_periods,
+            stock_prices=stock_prices[:, -1].copy(),
+            money=money[:, -1].copy(),
+            stock=stock[:, -1].copy(),
+            invested_money=invested_money.copy(),
+            lots=lots[:, : nlots.max(initial=0)].copy(),
+            **{field: value.copy() for field, value in counters.items()},
+        ),
+    )
+
+
+def _get_premium_cache(inputs: InputData) -> PremiumCache | None:
+    """
+    Returns a table of premiums for the simulation, if enabled.
+
+    Parameters
+    ----------
+    inputs : InputData
+        Inputs used in the simulation.
+
+    Returns
+    -------
+    PremiumCache | None
+        Empty table of premiums, or None if `premium_cache` is False.
+    """
+    if not inputs.premium_cache:
+        return None
+
+    return PremiumCache(
+        inputs.risk_free_rate,
+        inputs.volatility,
+        inputs.call_strike_factor,
+        inputs.put_strike_factor,
+    )
+
+
+def _get_summary(inputs: InputData) -> SimulationSummary:
+    """
+    Returns an empty summary for the simulation, with the variance-reduced
+    estimators selected in the inputs.
+
+    Parameters
+    ----------
+    inputs : InputData
+        Inputs used in the simulation.
+
+    Returns
+    -------
+    SimulationSummary
+        Empty summary.
+    """
+    control_mean = None
+
+    if inputs.control_variate:
+        # Expected stock price on the last simulated day, under the drift of
+        # the simulated price paths
+        control_mean = inputs.initial_stock_price * float(
+            exp(
+                inputs.risk_free_rate
+                / 252.0
+                * (inputs.number_of_periods * _DAYS_PER_PERIOD - 1)
+            )
         )
 
+    return SimulationSummary(
+        antithetic=inputs.antithetic,
+        control_mean=control_mean,
+        replicate_size=(
+            _get_replicate_size(inputs)
+            if inputs.sampler == "sobol" and inputs.qmc_replicates > 1
+            else None
+        ),
+    )
+
+
+def _get_replicate_size(inputs: InputData) -> int:
+    """
+    Returns the number of consecutive trading paths per replicate of the Sobol'
+    points (the last replicate may hold fewer paths).
+
+    Parameters
+    ----------
+    inputs : InputData
+        Inputs used in the simulation.
+
+    Returns
+    -------
+    int
+        Number of trading paths per replicate.
+    """
+    return -(-inputs.number_of_trading_paths // inputs.qmc_replicates)
+
+
+def _get_first_call_days(thresholds: ndarray, purchase_price: list) -> ndarray:
+    """
+    Returns, for each lot, the first day of the search window on which a
+    covered call can be written, that is, on which the call strike plus the
+    call premium exceeds the purchase price of the lot.
+
+    Parameters
+    ----------
+    thresholds : ndarray
+        Call strike plus call premium on each day of the search window.
+    purchase_price : list
+        Purchase prices of the lots.
+
+    Returns
+    -------
+    ndarray
+        Index of the first eligible day of each lot, or the length of the
+        window if there is none.
+    """
+    # The running maximum is non-decreasing, so the first day on which it
+    # exceeds a purchase price is found by binary search
+    return searchsorted(maximum.accumulate(thresholds), purchase_price, side="right")
+
+
+def _get_minimum_price(inputs: InputData) -> float:
+    """
+    Returns the stock price below which no puts are written.
+
+    Parameters
+    ----------
+    inputs : InputData
+        Inputs used in the simulation.
+
+    Returns
+    -------
+    float
+        Minimum stock price.
+    """
+    return (
+        inputs.initial_stock_price * inputs.minimum_price_factor
+        if inputs.initial_stock_price * inputs.minimum_price_factor > 0.01
+        else 0.01
+    )
+
 
 def _gen_price_paths(
-    s0: float, r: float, vol: float, nperiods: int, npaths: int
+    s0: float | ndarray,
+    r: float,
+    vol: float,
+    nperiods: int,
+    npaths: int,
+    rng: Generator | None = None,
+    antithetic: bool = False,
+    days: list[int] | None = None,
+    continued: bool = False,
+    normals: ndarray | None = None,
 ) -> ndarray:
     """
     Generates price paths.
 
     Parameters
     ----------
-    s0 : float
-        Initial stock price.
+    s0 : float | ndarray
+        Initial stock price, or initial stock price of each path.
     r : float
         Annualized risk free interest rate.
     vol : float
@@ -347,6 +2001,28 @@ def _gen_price_paths(
         Number of trading periods.
     npaths : int
         Number of price paths.
+    rng : Generator | None, optional
+        Random number generator. If None, the global NumPy random state is used.
+        Default is None.
+    antithetic : bool, optional
+        Whether or not to generate antithetic pairs of price paths, the odd
+        paths being driven by the negated normal increments of the preceding
+        even paths. Default is False.
+    days : list[int] | None, optional
+        Days of each trading period whose prices are simulated, counted from the
+        first day of the period, the first (0) and the last (the maturity)
+        included; the prices on the other days are skipped, the increments
+        being scaled to the gaps between the simulated days. Default is None,
+        which means every day.
+    continued : bool, optional
+        Whether or not the price paths continue from `s0` on the day before
+        their first day, as when trading paths are continued, instead of
+        starting at `s0`. Default is False.
+    normals : ndarray | None, optional
+        Standard normal increments of the price paths, one row per path and one
+        column per simulated day, used (and overwritten by the prices) instead
+        of drawing them, e.g., correlated increments of several underlyings.
+        Default is None.
 
     Returns
     -------
@@ -358,9 +2034,45 @@ def _gen_price_paths(
     t = 1.0 / T  # Fraction of T corresponding to one trading day
     r = r / 12 * nperiods  # Risk-free interest rate for T
     vol = vol * sqrt(T / 252)  # Volatility for T
-    s = (r - 0.5 * vol**2.0) * t + vol * sqrt(t) * normal(0, 1, (npaths, T))
-    s[:, 0] = log(s0)
-    s = round(exp(cumsum(s, axis=1)), 2)
+    ncols = T if days is None else nperiods * len(days)
+    n = (npaths + 1) // 2 if antithetic else npaths
+
+    if normals is not None:
+        s = normals
+    elif rng is None:
+        s = normal(0, 1, (n, ncols))
+    else:
+        s = rng.standard_normal((n, ncols))
+
+    if antithetic:
+        z = s
+        s = empty((npaths, ncols))
+        s[0::2] = z
+        negative(z[: npaths // 2], out=s[1::2])
+        del z
+
+    # Operations are performed in place so that no temporary copies of the
+    # (npaths, T) matrix are created
+    if days is None:
+        s *= vol * sqrt(t)
+        s += (r - 0.5 * vol**2.0) * t
+    else:
+        # Fractions of T between consecutive simulated days
+        gaps = t * diff(
+            (arange(nperiods)[:, None] * _DAYS_PER_PERIOD + array(days)).ravel(),
+            prepend=-1 if continued else 0,
+        )
+        s *= vol * sqrt(gaps)
+        s += (r - 0.5 * vol**2.0) * gaps
+
+    if continued:
+        s[:, 0] += log(s0)
+    else:
+        s[:, 0] = log(s0)
+
+    cumsum(s, axis=1, out=s)
+    exp(s, out=s)
+    round(s, 2, out=s)
 
     return s
 
@@ -385,28 +2097,6 @@ def _get_option_price(
     Returns
     -------
     float
-        Option premium.
+        Option premium, never lower than US$ 0.01.
     """
-    d1 = (log(s / x) + (r + vol * vol / 2.0) * time_to_maturity) / (
-        vol * sqrt(time_to_maturity)
-    )
-    d2 = d1 - vol * sqrt(time_to_maturity)
-
-    if optype == "call":
-        premium = round(
-            (
-                s * stats.norm.cdf(d1)
-                - x * exp(-r * time_to_maturity) * stats.norm.cdf(d2)
-            ),
-            2,
-        )
-    elif optype == "put":
-        premium = round(
-            (
-                x * exp(-r * time_to_maturity) * stats.norm.cdf(-d2)
-                - s * stats.norm.cdf(-d1)
-            ),
-            2,
-        )
-
-    return premium
+    return price_options(optype, s, x, r, vol, time_to_maturity)[()]